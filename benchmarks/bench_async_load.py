@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Teste de carga: caminho assíncrono do ResearchAgent
+Executa ResearchAgent.process com níveis crescentes de concorrência contra um
+servidor local que imita o Pinecone (/query) e o Gemini (/embed, /generate),
+mostrando que a vazão escala com a concorrência quando nada bloqueia o event loop.
+
+Uso:
+    python benchmarks/bench_async_load.py --requests 32 --concurrency 1 4 16
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+LATENCIAS = {'/query': 0.05, '/embed': 0.03, '/generate': 0.2}
+
+RESPOSTA_LLM = {
+    "consulta_recebida": "benchmark",
+    "resposta_imediata": {"titulo": "Resposta Rápida", "conteudo": "ok"},
+    "resumo_explicativo": {"titulo": "Entenda o Essencial", "conteudo": "ok"},
+    "detalhamento_juridico": {"titulo": "Análise Técnica Detalhada", "topicos": []},
+    "implicacoes_praticas": {"titulo": "O Que Fazer com esta Informação?", "conteudo": "ok"},
+    "fontes_consultadas": {"titulo": "Principais Fontes", "lista": []},
+    "aviso_legal": "ok"
+}
+
+
+class FakeServicesHandler(BaseHTTPRequestHandler):
+    """Imita Pinecone (/query) e Gemini (/embed, /generate) com latência fixa"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        if tamanho:
+            self.rfile.read(tamanho)
+        time.sleep(LATENCIAS.get(self.path, 0))
+
+        if self.path == '/query':
+            body = {'matches': [
+                {'id': f'doc-{i}', 'score': 0.9 - i * 0.05,
+                 'metadata': {'numero_nota_tecnica': f'Nota Técnica {i}/2022', 'texto_original': 'texto ' * 50}}
+                for i in range(10)
+            ]}
+        elif self.path == '/embed':
+            body = {'embedding': [0.01] * 768}
+        else:
+            body = {'text': json.dumps(RESPOSTA_LLM, ensure_ascii=False)}
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGeminiModel:
+    """Substitui genai.GenerativeModel chamando o endpoint /generate do servidor fake"""
+
+    def __init__(self, url: str):
+        self.client = httpx.AsyncClient(base_url=url, timeout=30)
+
+    async def generate_content_async(self, prompt: str):
+        response = await self.client.post('/generate', json={'prompt': prompt[:100]})
+        return type('FakeResponse', (), {'text': response.json()['text']})()
+
+
+async def executar_carga(agent, total: int, concorrencia: int) -> float:
+    """Executa `total` consultas com no máximo `concorrencia` simultâneas; retorna req/s"""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def uma_consulta(i: int):
+        async with semaforo:
+            # Texto distinto por requisição para não acertar o cache de embeddings
+            await agent.process(f"Consulta de carga número {i} sobre licença prêmio")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma_consulta(i) for i in range(total)))
+    return total / (time.perf_counter() - inicio)
+
+
+async def main_async(args):
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), FakeServicesHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    os.environ.setdefault('GEMINI_API_KEY', 'bench')
+    os.environ.setdefault('PINECONE_API_KEY', 'bench')
+    os.environ['PINECONE_BASE_URL'] = url
+    os.environ['PINECONE_POOL_SIZE'] = str(max(args.concurrency))
+
+    import google.generativeai as genai
+    from agents.research_agent import ResearchAgent
+
+    embed_client = httpx.AsyncClient(base_url=url, timeout=30)
+
+    async def fake_embed_content_async(model, content, task_type=None, **kwargs):
+        response = await embed_client.post('/embed', json={'content': content})
+        return response.json()
+
+    genai.embed_content_async = fake_embed_content_async
+
+    agent = ResearchAgent({'model': 'gemini-2.5-flash', 'api_key': 'bench'})
+    agent.llm_client = FakeGeminiModel(url)
+    agent.search_tool.embedding_cache.persistir = False
+
+    print(f"📊 {args.requests} consultas por nível (latências: {LATENCIAS})")
+    base = None
+    for concorrencia in args.concurrency:
+        vazao = await executar_carga(agent, args.requests, concorrencia)
+        base = base or vazao
+        print(f"   concorrência={concorrencia:>3}: {vazao:7.2f} req/s  ({vazao / base:.1f}x)")
+
+    await agent.search_tool.aclose()
+    await embed_client.aclose()
+    servidor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=32, help='Consultas por nível de concorrência')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Níveis de concorrência')
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark do caminho completo /api/consulta com fixtures gravadas
+Executa as perguntas de `perguntas_teste.md` pelo app FastAPI (em processo, via
+httpx.ASGITransport) com Gemini e Pinecone servidos pelo replay de fixtures,
+com latência injetada e níveis crescentes de concorrência. Sem rede e sem
+consumir cota. A busca híbrida e a recuperação multi-query ficam desligadas
+para que os prompts (chave das gravações do Gemini) sejam reproduzíveis.
+
+Uso:
+    # 1. gravação (uma vez, com as API keys): chamadas reais gravadas no arquivo
+    python benchmarks/bench_consulta_replay.py --gravar --fixtures fixtures/consulta.jsonl.gz
+
+    # 2. replay (em qualquer máquina)
+    python benchmarks/bench_consulta_replay.py --fixtures fixtures/consulta.jsonl.gz \\
+        --latencia embed=0.03,pinecone=0.05,generate=1.5 --concurrency 1 4 16
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import httpx
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(RAIZ / 'src'))
+
+
+def carregar_perguntas(caminho: Path) -> list:
+    return re.findall(r'^\*\*Pergunta:\*\*\s*(.+?)\s*$', caminho.read_text(encoding='utf-8'), re.MULTILINE)
+
+
+async def executar(cliente: httpx.AsyncClient, perguntas: list, concorrencia: int) -> dict:
+    """Envia todas as perguntas com no máximo `concorrencia` simultâneas"""
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias, erros = [], 0
+
+    async def uma_consulta(pergunta: str):
+        nonlocal erros
+        async with semaforo:
+            inicio = time.perf_counter()
+            response = await cliente.post('/api/consulta', json={'pergunta': pergunta, 'bypass_cache': True})
+            latencias.append(time.perf_counter() - inicio)
+            if response.status_code != 200 or 'error' in response.json().get('resposta_completa', ''):
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma_consulta(p) for p in perguntas))
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        'vazao': len(perguntas) / duracao,
+        'p50': latencias[len(latencias) // 2],
+        'p95': latencias[min(len(latencias) - 1, int(0.95 * len(latencias)))],
+        'erros': erros
+    }
+
+
+async def main_async(args):
+    import web.main as web_main
+    from tools.fixture_transport import obter_store
+    from tools.stage_metrics import STAGE_METRICS
+
+    from memory.chat_journal import ChatJournal
+
+    # Histórico de chat do benchmark fora do diretório do projeto
+    web_main.chat_journal = ChatJournal(os.path.join(args.tmp, 'chat_history.jsonl'))
+
+    perguntas = carregar_perguntas(Path(args.perguntas))
+    transporte = httpx.ASGITransport(app=web_main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url='http://bench', timeout=300) as cliente:
+        if args.gravar:
+            resultado = await executar(cliente, perguntas, 1)
+            print(f"💾 {len(obter_store())} chamadas gravadas em {args.fixtures} ({resultado['erros']} erros)")
+            return
+
+        print(f"📊 {len(perguntas)} perguntas x {args.repeticoes} por nível "
+              f"({len(obter_store())} gravações, latência {args.latencia or '0'})")
+        base = None
+        for concorrencia in args.concurrency:
+            STAGE_METRICS.reset()
+            resultado = await executar(cliente, perguntas * args.repeticoes, concorrencia)
+            base = base or resultado['vazao']
+            etapas = STAGE_METRICS.snapshot()
+            print(f"   concorrência={concorrencia:>3}: {resultado['vazao']:7.2f} req/s ({resultado['vazao'] / base:.1f}x), "
+                  f"p50 {resultado['p50'] * 1000:.0f}ms, p95 {resultado['p95'] * 1000:.0f}ms, "
+                  f"contexto p50 {etapas['context_build']['p50'] * 1000:.1f}ms, erros {resultado['erros']}")
+        print(f"   Fixtures: {obter_store().stats}")
+
+    orquestrador = web_main.orchestrator
+    if orquestrador is not None:
+        await orquestrador.search_tool.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', required=True, help='arquivo de fixtures (.jsonl.gz)')
+    parser.add_argument('--gravar', action='store_true', help='grava as chamadas reais em vez de reproduzir')
+    parser.add_argument('--latencia', default='', help="latência injetada: '0.05' ou 'embed=0.03,generate=1.5'")
+    parser.add_argument('--perguntas', default=str(RAIZ / 'perguntas_teste.md'))
+    parser.add_argument('--repeticoes', type=int, default=2, help='vezes que cada pergunta é enviada por nível')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    args.tmp = tempfile.mkdtemp(prefix='bench_consulta_')
+    os.environ['FIXTURE_MODE'] = 'record' if args.gravar else 'replay'
+    os.environ['FIXTURE_PATH'] = args.fixtures
+    os.environ['FIXTURE_LATENCY'] = args.latencia
+    # Caches em diretório temporário: cada execução parte do zero
+    os.environ['EMBEDDING_CACHE_DIR'] = os.path.join(args.tmp, 'embeddings')
+    os.environ['ANSWER_CACHE_DIR'] = os.path.join(args.tmp, 'respostas')
+    os.environ.setdefault('SEARCH_LOG_LEVEL', 'WARNING')
+    # O prompt gravado precisa ser idêntico no replay, em qualquer concorrência e ordem:
+    # desliga o que depende do histórico do processo ou do relógio (fusão BM25 e o
+    # refinamento com prazo da recuperação multi-query)
+    os.environ['HYBRID_SEARCH'] = 'false'
+    os.environ['MULTI_QUERY_RETRIEVAL'] = 'false'
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark e verificação de propriedades: expandir_query
+Compara a expansão anterior (um str.replace por termo sobre a string crescente)
+com a reescrita em passada única, e verifica em queries aleatórias que:
+
+- a expansão é idempotente: expandir_query(expandir_query(q)) == expandir_query(q);
+- nada é expandido dentro de palavras ("ART" em "ARTIGO");
+- remover as expansões devolve a query original;
+- o tempo cresce linearmente com o número de termos.
+
+Uso:
+    python benchmarks/bench_expandir_query.py --casos 2000
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from glossary.technical_glossary import (
+    TECHNICAL_GLOSSARY, detectar_termos_ambiguos, expandir_termo_ambiguo, expandir_query
+)
+
+TERMOS = [variacao for info in TECHNICAL_GLOSSARY.values() for variacao in info.get("variacoes", [])]
+PALAVRAS = ["servidor", "ARTIGO", "artes", "dnitense", "cargo", "remoção", "licença", "sobre", "no",
+            "Qual", "entendimento", "custeio", "/", "(", ")", ",", "?", "8.112", "Resolução"]
+SEPARADORES = [" ", " ", " ", "/", ", ", " - "]
+
+
+def expandir_legado(query: str) -> str:
+    """Cópia da expansão anterior: str.replace por termo detectado"""
+    query_expandida = query
+    for termo in detectar_termos_ambiguos(query):
+        expansao = expandir_termo_ambiguo(termo)
+        if expansao:
+            query_expandida = query_expandida.replace(termo, f"{termo} ({expansao['expansao']})")
+    return query_expandida
+
+
+def query_aleatoria(rng: random.Random, n_tokens: int) -> str:
+    partes = []
+    for _ in range(n_tokens):
+        partes.append(rng.choice(TERMOS) if rng.random() < 0.4 else rng.choice(PALAVRAS))
+        partes.append(rng.choice(SEPARADORES))
+    return "".join(partes).strip()
+
+
+def remover_expansoes(texto: str) -> str:
+    expansoes = sorted({info["expansao"] for info in TECHNICAL_GLOSSARY.values()}, key=len, reverse=True)
+    padrao = re.compile(" \\((?:" + "|".join(re.escape(e) for e in expansoes) + ")\\)")
+    return padrao.sub("", texto)
+
+
+def verificar_propriedades(casos: int, seed: int) -> None:
+    rng = random.Random(seed)
+    falhas = 0
+    for _ in range(casos):
+        query = query_aleatoria(rng, rng.randint(1, 30))
+        expandida = expandir_query(query)
+
+        if expandir_query(expandida) != expandida:
+            falhas += 1
+            print(f"❌ Não idempotente: {query!r}")
+        if remover_expansoes(expandida) != query:
+            falhas += 1
+            print(f"❌ Texto original alterado: {query!r} -> {expandida!r}")
+        if re.search(r"\w \((?:Anotação|Registro) de Responsabilidade Técnica\)\w", expandida):
+            falhas += 1
+            print(f"❌ Expansão dentro de palavra: {expandida!r}")
+
+    print(f"{'✅' if not falhas else '❌'} Propriedades verificadas em {casos} queries aleatórias: {falhas} falhas")
+
+    exemplo = "ARTIGO 5 sobre ART/RRT no DNIT?"
+    print(f"\n📋 Legado:  {expandir_legado(exemplo)}")
+    print(f"📋 Atual:   {expandir_query(exemplo)}")
+
+
+def medir(funcao, texto: str, repeticoes: int = 5) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def benchmark(seed: int) -> None:
+    rng = random.Random(seed)
+    print(f"\n{'termos':>7} | {'chars':>7} | {'legado':>10} | {'atual':>10} | {'atual/termo':>11}")
+    print("-" * 60)
+    for n_tokens in (10, 100, 1000, 5000):
+        # Variações distintas por posição forçam o legado a um replace por termo
+        query = " ".join(f"{rng.choice(TERMOS)} item{i}" for i in range(n_tokens))
+        legado = medir(expandir_legado, query, 3)
+        atual = medir(expandir_query, query)
+        print(f"{n_tokens:>7} | {len(query):>7} | {legado * 1000:>8.2f}ms | {atual * 1000:>8.2f}ms | "
+              f"{atual / n_tokens * 1e6:>9.2f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--casos', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    verificar_propriedades(args.casos, args.seed)
+    benchmark(args.seed)
+
+
+if __name__ == "__main__":
+    main()
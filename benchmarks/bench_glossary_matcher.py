@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark: detecção de termos do glossário
+Compara a detecção anterior (split + expandir_termo_ambiguo com varredura linear
+por palavra) com o matcher Aho–Corasick compilado, em textos longos.
+
+Uso:
+    python benchmarks/bench_glossary_matcher.py --repeticoes 5
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from glossary.technical_glossary import TECHNICAL_GLOSSARY, detectar_termos_ambiguos, obter_matcher
+
+FRASE = ("O servidor em estágio probatório do DNIT consultou a AGU sobre a ART/RRT exigida pelo CREA, "
+         "nos termos da Lei 8.112/1990 e da Resolução CONFEA 1.025/2009, após decisão do TCU e do STF. ")
+
+
+def termo_legado(termo: str):
+    """Cópia de expandir_termo_ambiguo antes do matcher (busca direta + varredura linear)"""
+    if termo.upper() in TECHNICAL_GLOSSARY:
+        return TECHNICAL_GLOSSARY[termo.upper()]
+    elif termo.lower() in TECHNICAL_GLOSSARY:
+        return TECHNICAL_GLOSSARY[termo.lower()]
+    for key, value in TECHNICAL_GLOSSARY.items():
+        if termo in value.get("variacoes", []):
+            return value
+    return None
+
+
+def detectar_legado(texto: str) -> list:
+    """Cópia de detectar_termos_ambiguos antes do matcher (uma palavra por vez)"""
+    termos = []
+    for palavra in texto.split():
+        palavra_limpa = palavra.strip(".,;:!?()[]{}")
+        if termo_legado(palavra_limpa):
+            termos.append(palavra_limpa)
+    return list(set(termos))
+
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    matcher = obter_matcher()
+    print(f"🔧 Matcher compilado em {(time.perf_counter() - inicio) * 1000:.2f}ms "
+          f"({matcher.total_padroes} padrões, {matcher.total_estados} estados)")
+
+    print(f"\n{'chars':>9} | {'legado':>10} | {'matcher':>10} | {'speedup':>7} | termos (legado / matcher)")
+    print("-" * 78)
+    for repeticoes_frase in (10, 100, 1000, 5000):
+        texto = FRASE * repeticoes_frase
+        legado = medir(detectar_legado, texto, args.repeticoes)
+        novo = medir(detectar_termos_ambiguos, texto, args.repeticoes)
+        print(f"{len(texto):>9} | {legado * 1000:>8.2f}ms | {novo * 1000:>8.2f}ms | {legado / novo:>6.1f}x | "
+              f"{len(detectar_legado(texto))} / {len(detectar_termos_ambiguos(texto))}")
+
+    print(f"\n📋 Legado:  {sorted(detectar_legado(FRASE))}")
+    print(f"📋 Matcher: {sorted(detectar_termos_ambiguos(FRASE))}")
+
+
+if __name__ == "__main__":
+    main()
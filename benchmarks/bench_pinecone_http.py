@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark: conexões HTTP do PineconeSearchTool
+Reproduz N queries contra um servidor HTTP local que imita o host do Pinecone e
+compara p50/p99 entre `requests.post` avulso (antes) e a sessão com pool (depois).
+
+Uso:
+    python benchmarks/bench_pinecone_http.py --queries 500
+
+Observação: o servidor local não usa TLS, então o ganho medido aqui é apenas o
+do handshake TCP; contra o host real (TCP + TLS) a diferença é maior.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+
+class FakePineconeHandler(BaseHTTPRequestHandler):
+    """Handler que responde /query e /describe_index_stats como o Pinecone"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latencia = 0.002
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        if tamanho:
+            self.rfile.read(tamanho)
+        time.sleep(self.latencia)
+
+        if self.path == '/query':
+            body = {'matches': [
+                {'id': f'doc-{i}', 'score': 0.9 - i * 0.05,
+                 'metadata': {'numero_nota_tecnica': f'Nota Técnica {i}/2022', 'texto_original': 'texto'}}
+                for i in range(5)
+            ]}
+        else:
+            body = {'totalVectorCount': 1000, 'dimension': 768}
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor():
+    """Inicia o servidor fake em uma porta livre e retorna (servidor, url)"""
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), FakePineconeHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def percentis(amostras):
+    """Retorna p50/p99 em milissegundos"""
+    valores = np.asarray(amostras) * 1000
+    return {'p50_ms': float(np.percentile(valores, 50)), 'p99_ms': float(np.percentile(valores, 99))}
+
+
+def medir_sem_pool(url: str, n: int, vetor):
+    """Antes: uma conexão nova por query (requests.post do módulo)"""
+    amostras = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        requests.post(f"{url}/query", headers={'Api-Key': 'bench'},
+                      json={'vector': vetor, 'topK': 5, 'includeMetadata': True}, timeout=30)
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def medir_com_pool(tool, n: int, vetor):
+    """Depois: sessão persistente do PineconeSearchTool"""
+    amostras = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        tool._query_pinecone_custom(vetor, top_k=5)
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=300, help='Número de queries por cenário')
+    parser.add_argument('--latencia', type=float, default=0.002, help='Latência simulada do servidor (s)')
+    args = parser.parse_args()
+
+    FakePineconeHandler.latencia = args.latencia
+    servidor, url = iniciar_servidor()
+
+    os.environ.setdefault('GEMINI_API_KEY', 'bench')
+    os.environ.setdefault('PINECONE_API_KEY', 'bench')
+    os.environ['PINECONE_BASE_URL'] = url
+
+    from tools.pinecone_search_tool import PineconeSearchTool
+    tool = PineconeSearchTool()
+    vetor = np.random.default_rng(0).random(768).tolist()
+
+    # Aquecimento
+    medir_sem_pool(url, 5, vetor)
+    medir_com_pool(tool, 5, vetor)
+
+    antes = percentis(medir_sem_pool(url, args.queries, vetor))
+    depois = percentis(medir_com_pool(tool, args.queries, vetor))
+
+    print(f"📊 {args.queries} queries por cenário (latência do servidor: {args.latencia * 1000:.1f}ms)")
+    print(f"   Antes  (requests.post): p50={antes['p50_ms']:.2f}ms  p99={antes['p99_ms']:.2f}ms")
+    print(f"   Depois (sessão c/ pool): p50={depois['p50_ms']:.2f}ms  p99={depois['p99_ms']:.2f}ms")
+
+    tool.close()
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
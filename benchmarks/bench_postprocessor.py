@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark: pós-processamento de resultados em lote
+Compara a análise anterior (três passadas de list comprehension sobre os scores
+e `any(termo in conteudo)` por categoria) com a versão colunar (NumPy + uma
+expressão regular com todas as palavras-chave), em lotes de 1k resultados
+amostrados de um corpus de trechos (como numa avaliação offline, em que os
+mesmos documentos voltam em consultas diferentes), e confere que as duas
+produzem a mesma análise.
+
+Uso:
+    python benchmarks/bench_postprocessor.py --lotes 200 --tamanho 1000 --corpus 5000
+"""
+
+import sys
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from postprocessing.query_postprocessor import QueryPostprocessor
+
+PALAVRAS = ["servidor", "processo", "obra", "cargo", "Decisão", "engenharia", "Técnico", "LEGAL",
+            "remoção", "licença", "custeio", "anotação", "responsabilidade", "nota", "parecer",
+            "administração", "pública", "federal", "lei", "artigo", "inciso", "união", "estável"]
+
+
+def relevancia_legado(scores):
+    """Cópia das contagens anteriores (três passadas)"""
+    return (
+        len([s for s in scores if s >= 0.7]),
+        len([s for s in scores if 0.5 <= s < 0.7]),
+        len([s for s in scores if s < 0.5]),
+        sum(scores) / len(scores) if scores else 0.0
+    )
+
+
+def contextos_legado(resultados):
+    """Cópia da classificação anterior (substring por palavra e por categoria)"""
+    contextos = []
+    for resultado in resultados:
+        conteudo = resultado.get('content', '').lower()
+        if any(termo in conteudo for termo in ["jurídico", "legal", "processo", "decisão"]):
+            contextos.append("jurídico")
+        elif any(termo in conteudo for termo in ["técnico", "engenharia", "projeto", "obra"]):
+            contextos.append("técnico")
+        elif any(termo in conteudo for termo in ["administrativo", "servidor", "cargo", "funcionário"]):
+            contextos.append("administrativo")
+    return contextos
+
+
+def analise_legado(resultados):
+    scores = [resultado.get('score', 0.0) for resultado in resultados]
+    return relevancia_legado(scores), contextos_legado(resultados)
+
+
+def gerar_corpus(rng: random.Random, tamanho: int):
+    return [" ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(20, 120))) for _ in range(tamanho)]
+
+
+def gerar_lote(rng: random.Random, corpus, tamanho: int):
+    return [{"content": rng.choice(corpus), "score": rng.random()} for _ in range(tamanho)]
+
+
+def verificar(postprocessor: QueryPostprocessor, lotes, termos) -> int:
+    falhas = 0
+    for resultados in lotes:
+        (relevantes, parciais, irrelevantes, medio), contextos = analise_legado(resultados)
+        analise = postprocessor.analisar_resultados("q", "q (x)", resultados, termos)
+        relevancia = analise["relevancia_resultados"]
+        if (relevancia["resultados_relevantes"], relevancia["resultados_parcialmente_relevantes"],
+                relevancia["resultados_irrelevantes"]) != (relevantes, parciais, irrelevantes) \
+                or abs(relevancia["score_medio"] - medio) > 1e-9:
+            falhas += 1
+        contagem = {c: contextos.count(c) for c in set(contextos)}
+        encontrado = analise["homonímia_resolvida"]["contexto_correto"]
+        if contagem and contagem.get(encontrado) != max(contagem.values()):
+            falhas += 1
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lotes', type=int, default=200)
+    parser.add_argument('--tamanho', type=int, default=1000)
+    parser.add_argument('--corpus', type=int, default=5000, help='trechos distintos no corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    corpus = gerar_corpus(rng, args.corpus)
+    lotes = [gerar_lote(rng, corpus, args.tamanho) for _ in range(args.lotes)]
+    colunas = [(np.array([r["score"] for r in lote]), [r["content"] for r in lote]) for lote in lotes]
+    termos = ["ART", "DNIT"]
+    postprocessor = QueryPostprocessor()
+
+    falhas = verificar(postprocessor, lotes[:20], termos)
+    print(f"{'✅' if not falhas else '❌'} Equivalência com a análise anterior em 20 lotes: {falhas} divergências")
+
+    inicio = time.perf_counter()
+    for resultados in lotes:
+        analise_legado(resultados)
+    legado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for resultados in lotes:
+        postprocessor.analisar_resultados("q", "q (x)", resultados, termos)
+    dicts = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for scores, conteudos in colunas:
+        postprocessor.analisar_resultados_colunar("q", "q (x)", scores, conteudos, termos)
+    colunar = time.perf_counter() - inicio
+
+    total = args.lotes * args.tamanho
+    print(f"\n📊 {args.lotes} lotes x {args.tamanho} resultados (corpus de {args.corpus} trechos)")
+    print(f"   Legado (relevância + contextos): {legado * 1000:8.1f}ms ({legado / total * 1e6:.2f}µs/resultado)")
+    print(f"   analisar_resultados (dicts):     {dicts * 1000:8.1f}ms ({dicts / total * 1e6:.2f}µs/resultado)")
+    print(f"   analisar_resultados_colunar:     {colunar * 1000:8.1f}ms ({colunar / total * 1e6:.2f}µs/resultado)")
+    print(f"   Speedup colunar: {legado / colunar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
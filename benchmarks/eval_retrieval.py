@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📏 Avaliação offline da recuperação: recall@k, MRR, latência e tokens
+Executa as perguntas de `perguntas_teste.md` em PineconeSearchTool.search com
+níveis configuráveis de concorrência e grava um relatório JSON comparável entre
+execuções (qualidade, latência por nível, tempos por etapa e tokens do prompt).
+
+Fixtures gravadas (modo offline, sem rede):
+- índice: snapshot do LocalVectorIndex (--indice DIR; gravado com --gravar-indice)
+- embeddings: diretório do EmbeddingCache com os embeddings das perguntas
+  (--embeddings DIR; preenchido por uma execução online com o mesmo diretório)
+
+Rótulos (--rotulos): JSON {"<número da pergunta>": ["documento_id ou título", ...]}.
+Perguntas sem rótulo entram só nas métricas de latência e tokens.
+
+Uso:
+    # gravação (online): exporta o índice e grava os embeddings das perguntas
+    python benchmarks/eval_retrieval.py --gravar-indice fixtures/indice --embeddings fixtures/embeddings
+
+    # avaliação offline, comparando com a execução anterior
+    python benchmarks/eval_retrieval.py --offline --indice fixtures/indice --embeddings fixtures/embeddings \\
+        --rotulos fixtures/rotulos.json --concorrencia 1 4 --saida relatorio.json --comparar anterior.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ / 'src'))
+
+PERGUNTA_RE = re.compile(r'^###\s+(\d+)\.\s*(.+?)\s*\n\*\*Pergunta:\*\*\s*(.+?)\s*$', re.MULTILINE)
+
+
+def carregar_perguntas(caminho: Path) -> List[Dict[str, Any]]:
+    """Extrai número, tema e pergunta de cada bloco '### N. Tema / **Pergunta:** ...'"""
+    texto = caminho.read_text(encoding='utf-8')
+    return [
+        {'numero': int(numero), 'tema': tema, 'pergunta': pergunta}
+        for numero, tema, pergunta in PERGUNTA_RE.findall(texto)
+    ]
+
+
+def configurar_ambiente(args) -> None:
+    """Aponta a ferramenta de busca para as fixtures antes de instanciá-la"""
+    if args.indice and not args.gravar_indice:
+        os.environ['SEARCH_BACKEND'] = 'local'
+        os.environ['LOCAL_INDEX_PATH'] = args.indice
+    if args.embeddings:
+        os.environ['EMBEDDING_CACHE_DIR'] = args.embeddings
+    if args.offline:
+        if not args.indice or not args.embeddings:
+            raise SystemExit("❌ --offline requer --indice e --embeddings")
+        # O SDK só é configurado (sem chamadas); as consultas vêm das fixtures
+        os.environ.setdefault('GEMINI_API_KEY', 'offline')
+    os.environ.setdefault('SEARCH_LOG_LEVEL', 'WARNING')
+
+
+def verificar_embeddings_gravados(tool, perguntas: List[Dict[str, Any]]) -> None:
+    """No modo offline, toda pergunta precisa ter o embedding gravado (nenhuma chamada à API)"""
+    from tools.embedding_cache import gerar_chave
+
+    faltando = [
+        p['numero'] for p in perguntas
+        if tool.embedding_cache.get(gerar_chave(p['pergunta'], tool.config['embedding_model'],
+                                                tool.config['task_type'])) is None
+    ]
+    if faltando:
+        raise SystemExit(f"❌ Embeddings não gravados para as perguntas {faltando}; "
+                         f"execute uma vez online com o mesmo --embeddings")
+
+
+def relevante(resultado, rotulos: set) -> bool:
+    return resultado.documento_id in rotulos or resultado.titulo in rotulos
+
+
+def metricas_qualidade(resultados, rotulos: List[str], k: int) -> Dict[str, Optional[float]]:
+    """recall@k e reciprocal rank do primeiro resultado relevante"""
+    if not rotulos:
+        return {'recall': None, 'rr': None}
+    alvo = set(rotulos)
+    encontrados = {r.documento_id if r.documento_id in alvo else r.titulo
+                   for r in resultados[:k] if relevante(r, alvo)}
+    rank = next((i for i, r in enumerate(resultados, 1) if relevante(r, alvo)), None)
+    return {'recall': len(encontrados) / len(alvo), 'rr': 1.0 / rank if rank else 0.0}
+
+
+def percentil(valores: List[float], q: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def executar_nivel(tool, builder, template, perguntas, concorrencia: int, k: int) -> Dict[str, Any]:
+    """Roda todas as perguntas com `concorrencia` threads; retorna latências, tempos por etapa e resultados"""
+    from tools.stage_metrics import STAGE_METRICS
+    from agents.context_builder import estimar_tokens
+
+    STAGE_METRICS.reset()
+
+    def consultar(pergunta: Dict[str, Any]) -> Dict[str, Any]:
+        inicio = time.perf_counter()
+        resultados = tool.search(pergunta['pergunta'], top_k=k)
+        latencia = time.perf_counter() - inicio
+        with STAGE_METRICS.span('context_build'):
+            _, relatorio = builder.build(resultados)
+        tokens_prompt = (template.tokens_estaticos + relatorio['tokens_contexto']
+                         + estimar_tokens(pergunta['pergunta']))
+        return {'numero': pergunta['numero'], 'latencia': latencia, 'resultados': resultados,
+                'tokens_contexto': relatorio['tokens_contexto'], 'tokens_baseline': relatorio['tokens_baseline'],
+                'tokens_prompt': tokens_prompt}
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        execucoes = list(executor.map(consultar, perguntas))
+    duracao = time.perf_counter() - inicio
+
+    latencias = [e['latencia'] for e in execucoes]
+    return {
+        'concorrencia': concorrencia,
+        'duracao': round(duracao, 6),
+        'vazao_qps': round(len(execucoes) / duracao, 3) if duracao else 0.0,
+        'latencia': {
+            'media': round(statistics.fmean(latencias), 6) if latencias else 0.0,
+            'p50': round(percentil(latencias, 0.50), 6),
+            'p95': round(percentil(latencias, 0.95), 6),
+            'max': round(max(latencias, default=0.0), 6)
+        },
+        'etapas': {etapa: dados for etapa, dados in STAGE_METRICS.snapshot().items() if dados['count']},
+        'execucoes': execucoes
+    }
+
+
+def commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def montar_relatorio(args, perguntas, rotulos, niveis) -> Dict[str, Any]:
+    """Relatório: qualidade (do primeiro nível), latência por nível e detalhes por pergunta"""
+    execucoes = niveis[0]['execucoes']
+    por_pergunta = []
+    for pergunta, execucao in zip(perguntas, execucoes):
+        qualidade = metricas_qualidade(execucao['resultados'], rotulos.get(str(pergunta['numero']), []), args.k)
+        por_pergunta.append({
+            'numero': pergunta['numero'],
+            'pergunta': pergunta['pergunta'],
+            **qualidade,
+            'latencia': round(execucao['latencia'], 6),
+            'tokens_contexto': execucao['tokens_contexto'],
+            'tokens_prompt': execucao['tokens_prompt'],
+            'documentos': [r.documento_id for r in execucao['resultados']]
+        })
+
+    rotuladas = [p for p in por_pergunta if p['recall'] is not None]
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit_atual(),
+            'k': args.k,
+            'offline': args.offline,
+            'backend': os.getenv('SEARCH_BACKEND', 'pinecone'),
+            'perguntas': len(perguntas),
+            'perguntas_rotuladas': len(rotuladas)
+        },
+        'resumo': {
+            f'recall@{args.k}': round(statistics.fmean(p['recall'] for p in rotuladas), 4) if rotuladas else None,
+            'mrr': round(statistics.fmean(p['rr'] for p in rotuladas), 4) if rotuladas else None,
+            'tokens_contexto_medio': round(statistics.fmean(e['tokens_contexto'] for e in execucoes), 1),
+            'tokens_baseline_medio': round(statistics.fmean(e['tokens_baseline'] for e in execucoes), 1),
+            'tokens_prompt_medio': round(statistics.fmean(e['tokens_prompt'] for e in execucoes), 1),
+            'latencia_p50': niveis[0]['latencia']['p50'],
+            'latencia_p95': niveis[0]['latencia']['p95']
+        },
+        'niveis': [{chave: valor for chave, valor in nivel.items() if chave != 'execucoes'} for nivel in niveis],
+        'perguntas': por_pergunta
+    }
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any]) -> None:
+    """Imprime a variação das métricas do resumo em relação a um relatório anterior"""
+    print(f"\n🔁 Comparação com {anterior['meta'].get('data')} (commit {anterior['meta'].get('commit')})")
+    for chave, valor in atual['resumo'].items():
+        antes = anterior.get('resumo', {}).get(chave)
+        if isinstance(valor, (int, float)) and isinstance(antes, (int, float)):
+            variacao = f"{(valor - antes) / antes:+.1%}" if antes else "n/a"
+            print(f"   {chave:<24} {antes:>10} -> {valor:<10} ({variacao})")
+        else:
+            print(f"   {chave:<24} {antes!s:>10} -> {valor!s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perguntas', default=str(RAIZ / 'perguntas_teste.md'))
+    parser.add_argument('--rotulos', help='JSON {número: [documento_id ou título, ...]}')
+    parser.add_argument('--indice', help='snapshot do LocalVectorIndex (backend local)')
+    parser.add_argument('--embeddings', help='diretório do EmbeddingCache com os embeddings gravados')
+    parser.add_argument('--gravar-indice', help='exporta o índice do Pinecone para este diretório antes de avaliar')
+    parser.add_argument('--offline', action='store_true', help='falha se alguma chamada de rede for necessária')
+    parser.add_argument('--concorrencia', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--saida', default='relatorio_avaliacao.json')
+    parser.add_argument('--comparar', help='relatório anterior para comparação')
+    args = parser.parse_args()
+
+    configurar_ambiente(args)
+
+    from tools.pinecone_search_tool import PineconeSearchTool
+    from agents.context_builder import ContextBuilder
+    from agents.research_agent import PROMPT_TEMPLATE
+
+    perguntas = carregar_perguntas(Path(args.perguntas))
+    rotulos = json.loads(Path(args.rotulos).read_text(encoding='utf-8')) if args.rotulos else {}
+    print(f"📋 {len(perguntas)} perguntas ({sum(str(p['numero']) in rotulos for p in perguntas)} rotuladas)")
+
+    tool = PineconeSearchTool()
+    if args.gravar_indice:
+        total = tool.export_snapshot(args.gravar_indice)
+        print(f"💾 Índice gravado em {args.gravar_indice}: {total} vetores")
+    if args.offline:
+        verificar_embeddings_gravados(tool, perguntas)
+
+    builder = ContextBuilder(token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '4000')))
+    niveis = []
+    for concorrencia in args.concorrencia:
+        nivel = executar_nivel(tool, builder, PROMPT_TEMPLATE, perguntas, concorrencia, args.k)
+        niveis.append(nivel)
+        print(f"⚡ concorrência {concorrencia:>3}: {nivel['vazao_qps']:>8.2f} consultas/s, "
+              f"p50 {nivel['latencia']['p50'] * 1000:.1f}ms, p95 {nivel['latencia']['p95'] * 1000:.1f}ms")
+
+    relatorio = montar_relatorio(args, perguntas, rotulos, niveis)
+    Path(args.saida).write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    resumo = relatorio['resumo']
+    print(f"\n📊 recall@{args.k}: {resumo[f'recall@{args.k}']}, MRR: {resumo['mrr']}, "
+          f"tokens de prompt (média): {resumo['tokens_prompt_medio']}")
+    print(f"💾 Relatório: {args.saida}")
+
+    if args.comparar:
+        comparar(relatorio, json.loads(Path(args.comparar).read_text(encoding='utf-8')))
+
+
+if __name__ == "__main__":
+    main()
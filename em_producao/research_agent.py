@@ -8,12 +8,10 @@ Combina o melhor dos agentes de pesquisa anteriores com integração Pinecone
 from typing import Dict, List, Any, Union, Tuple
 import re
 import time
-import logging
 from datetime import datetime
 
 from .base_agent import BaseAgent
 from src.tools.pinecone_search_tool import PineconeSearchTool
-import asyncio
 
 
 class UnifiedResearchAgent(BaseAgent):
@@ -301,32 +299,15 @@ class UnifiedResearchAgent(BaseAgent):
 
     async def _execute_pinecone_search(self, query_analysis: Dict) -> List:
         """Executa busca no Pinecone usando as variações da consulta"""
-        all_results = []
-
-        # Busca para cada variação da consulta
-        for variant in query_analysis['query_variants']:
-            try:
-                results = self.search_tool.search(variant, top_k=5)
-                all_results.extend(results)
-
-                # Pequena pausa para não sobrecarregar
-                await asyncio.sleep(0.1)
-
-            except Exception as e:
-                self.logger.warning(f"Erro na busca para '{variant}': {e}")
-
-        # Remove duplicatas baseado no documento_id
-        seen_ids = set()
-        unique_results = []
-        for result in all_results:
-            if result.documento_id not in seen_ids:
-                unique_results.append(result)
-                seen_ids.add(result.documento_id)
-
-        # Ordena por score (melhor primeiro)
-        unique_results.sort(key=lambda x: x.score, reverse=True)
-
-        return unique_results[:15]  # Limita a 15 melhores resultados
+        try:
+            # Embeddings em lote + queries paralelas, já deduplicadas por documento_id
+            # e ordenadas por score (melhor primeiro)
+            return await self.search_tool.search_many(
+                query_analysis['query_variants'], top_k=5, max_results=15  # Limita a 15 melhores resultados
+            )
+        except Exception as e:
+            self.logger.warning(f"Erro na busca para {query_analysis['query_variants']}: {e}")
+            return []
 
     async def _categorize_results(self, search_results: List) -> Dict[str, Any]:
         """Categoriza os resultados por relevância e tipo"""
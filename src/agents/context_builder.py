@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧱 Montagem de Contexto com Orçamento de Tokens
+Seleciona e recorta trechos por relevância e novidade (MMR), remove sobreposições
+da mesma nota técnica e renderiza o prompt a partir de um template pré-compilado
+"""
+
+import re
+import os
+import sys
+import logging
+from string import Formatter
+from typing import List, Dict, Any, Tuple, FrozenSet
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from tools.lexical_index import tokenizar
+
+logger = logging.getLogger(__name__)
+
+# Gemini usa ~4 caracteres por token em português; estimativa local evita uma chamada
+# de rede (count_tokens) por requisição
+CHARS_POR_TOKEN = 4
+
+_FIM_DE_FRASE_RE = re.compile(r'[.;:!?]\s')
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa de tokens de um texto (arredondada para cima)"""
+    return -(-len(texto) // CHARS_POR_TOKEN)
+
+
+def recortar(texto: str, max_chars: int) -> str:
+    """Recorta o texto em até `max_chars`, preferindo terminar no fim de uma frase"""
+    if max_chars <= 0:
+        return ''
+    if len(texto) <= max_chars:
+        return texto
+    corte = texto[:max_chars]
+    fins = [m.end() for m in _FIM_DE_FRASE_RE.finditer(corte)]
+    if fins and fins[-1] >= max_chars // 2:
+        return corte[:fins[-1]].rstrip()
+    return corte.rstrip() + '…'
+
+
+class PromptTemplate:
+    """
+    Template de prompt compilado uma única vez.
+
+    O texto usa a sintaxe de `str.format` (`{campo}`, `{{` e `}}` para chaves
+    literais). Na construção ele é quebrado em partes literais e nomes de campo,
+    de modo que `render` é apenas um `''.join` — sem reinterpretar as ~8KB de
+    instruções estáticas a cada requisição.
+    """
+
+    def __init__(self, texto: str):
+        self._partes: List[Tuple[str, str]] = [
+            (literal, campo) for literal, campo, _, _ in Formatter().parse(texto)
+        ]
+        self.campos: FrozenSet[str] = frozenset(campo for _, campo in self._partes if campo)
+        self.tokens_estaticos = estimar_tokens(''.join(literal for literal, _ in self._partes))
+
+    def render(self, **valores: str) -> str:
+        partes = []
+        for literal, campo in self._partes:
+            partes.append(literal)
+            if campo:
+                partes.append(valores[campo])
+        return ''.join(partes)
+
+
+class ContextBuilder:
+    """
+    Monta o contexto do prompt dentro de um orçamento de tokens.
+
+    1. Descarta trechos da mesma `numero_nota_tecnica` que se sobrepõem a um
+       trecho já escolhido (similaridade de Jaccard entre conjuntos de tokens).
+    2. Escolhe os trechos por MMR: `lambda * relevância - (1 - lambda) * redundância`,
+       com a redundância medida contra os trechos já selecionados.
+    3. Recorta cada trecho em `max_chars_trecho` e o último ao que resta do orçamento.
+    """
+
+    def __init__(self, token_budget: int = 4000, mmr_lambda: float = 0.7,
+                 dedupe_threshold: float = 0.6, max_chars_trecho: int = 3000,
+                 min_tokens_trecho: int = 80):
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.dedupe_threshold = dedupe_threshold
+        self.max_chars_trecho = max_chars_trecho
+        self.min_tokens_trecho = min_tokens_trecho
+
+    @staticmethod
+    def _formatar(result: Any, conteudo: str) -> str:
+        return f"""
+{result.titulo}:
+Relevância: {result.score:.1%}
+Conteúdo: {conteudo}
+"""
+
+    @staticmethod
+    def _nota(result: Any) -> str:
+        return str((result.metadata or {}).get('numero_nota_tecnica') or result.titulo)
+
+    @staticmethod
+    def _similaridade(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def baseline(self, results: List[Any]) -> str:
+        """Contexto sem orçamento (todos os trechos com até `max_chars_trecho`)"""
+        return ''.join(self._formatar(r, r.conteudo[:self.max_chars_trecho]) for r in results)
+
+    def build(self, results: List[Any]) -> Tuple[str, Dict[str, Any]]:
+        """Retorna (texto do contexto, relatório com tokens usados e economizados)"""
+        tokens_baseline = estimar_tokens(self.baseline(results))
+        termos = [frozenset(tokenizar(r.conteudo[:self.max_chars_trecho])) for r in results]
+
+        # 1. Deduplicação de trechos sobrepostos da mesma nota técnica
+        candidatos: List[int] = []
+        duplicados = 0
+        for i, result in enumerate(results):
+            nota = self._nota(result)
+            if any(self._nota(results[j]) == nota and
+                   self._similaridade(termos[i], termos[j]) >= self.dedupe_threshold
+                   for j in candidatos):
+                duplicados += 1
+                continue
+            candidatos.append(i)
+
+        # 2 e 3. Seleção MMR dentro do orçamento
+        max_score = max((results[i].score for i in candidatos), default=0.0) or 1.0
+        selecionados: List[int] = []
+        partes: List[str] = []
+        restante = self.token_budget
+
+        while candidatos and restante >= self.min_tokens_trecho:
+            melhor = max(candidatos, key=lambda i: (
+                self.mmr_lambda * results[i].score / max_score
+                - (1 - self.mmr_lambda) * max((self._similaridade(termos[i], termos[j])
+                                               for j in selecionados), default=0.0)
+            ))
+            candidatos.remove(melhor)
+
+            result = results[melhor]
+            disponivel = restante - estimar_tokens(self._formatar(result, ''))
+            if disponivel <= 0:
+                # Nem o cabeçalho (título longo) cabe no que resta do orçamento
+                continue
+            conteudo = recortar(result.conteudo[:self.max_chars_trecho], disponivel * CHARS_POR_TOKEN)
+            if estimar_tokens(conteudo) < self.min_tokens_trecho and len(conteudo) < len(result.conteudo):
+                continue
+
+            trecho = self._formatar(result, conteudo)
+            if estimar_tokens(trecho) > restante:
+                continue
+            restante -= estimar_tokens(trecho)
+            selecionados.append(melhor)
+            partes.append(trecho)
+
+        context_text = ''.join(partes)
+        tokens_contexto = estimar_tokens(context_text)
+        report = {
+            'tokens_contexto': tokens_contexto,
+            'tokens_baseline': tokens_baseline,
+            'tokens_economizados': max(tokens_baseline - tokens_contexto, 0),
+            'token_budget': self.token_budget,
+            'trechos_usados': len(selecionados),
+            'trechos_descartados': len(results) - len(selecionados),
+            'duplicados': duplicados
+        }
+        return context_text, report
+
+
+# ==========================================
+# TESTES DO MÓDULO
+# ==========================================
+
+if __name__ == "__main__":
+    from tools.pinecone_search_tool import SearchResult
+
+    print("🧪 TESTANDO MONTAGEM DE CONTEXTO")
+    print("=" * 50)
+
+    paragrafo = ("A licença para capacitação é concedida a cada quinquênio de efetivo exercício. "
+                 "O servidor poderá afastar-se por até três meses, com a respectiva remuneração. ")
+    resultados = [
+        SearchResult('nt-1#0', 'NT 1/2020', paragrafo * 30, 0.91, 'Pinecone', {'numero_nota_tecnica': 'NT 1/2020'}),
+        SearchResult('nt-1#1', 'NT 1/2020', paragrafo * 28, 0.89, 'Pinecone', {'numero_nota_tecnica': 'NT 1/2020'}),
+        SearchResult('nt-7#0', 'NT 7/2021', "Pensão por morte e acumulação de benefícios. " * 60, 0.82,
+                     'Pinecone', {'numero_nota_tecnica': 'NT 7/2021'}),
+        SearchResult('nt-9#0', 'NT 9/2019', "Remoção para acompanhar cônjuge. " * 80, 0.78,
+                     'Pinecone', {'numero_nota_tecnica': 'NT 9/2019'})
+    ]
+
+    builder = ContextBuilder(token_budget=1200)
+    contexto, relatorio = builder.build(resultados)
+    print(f"📊 Relatório: {relatorio}")
+    print(f"📄 Trechos: {[linha for linha in contexto.splitlines() if linha.endswith(':')]}")
+
+    template = PromptTemplate("PERGUNTA: \"{query}\"\n{context_text}\n{{\"json\": true}}")
+    print(f"🧩 Campos do template: {sorted(template.campos)} ({template.tokens_estaticos} tokens estáticos)")
+    print(template.render(query="licença capacitação", context_text="..."))
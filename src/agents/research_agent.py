@@ -7,83 +7,29 @@ SEM memória, SEM contexto, SEM complicações
 """
 
 import asyncio
+import json
 import logging
+import re
 import sys
 import os
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 
 # Adiciona o diretório src ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from tools.pinecone_search_tool import PineconeSearchTool
+from tools.embedding_cache import diretorio_cache
+from memory.semantic_cache import SemanticAnswerCache
+from agents.context_builder import ContextBuilder, PromptTemplate
+from tools.stage_metrics import STAGE_METRICS
+from tools.fixture_transport import modo_fixture, envolver_modelo
+from integration.glossary_integration import obter_integracao
+from glossary.technical_glossary import expandir_termo_ambiguo
 
-
-class ResearchAgent:
-    """Agente de pesquisa jurídica especializado em Direito Administrativo"""
-
-    def __init__(self, llm_config: Dict[str, Any]):
-        self.logger = logging.getLogger(f"Agent.{self.__class__.__name__}")
-        self.llm_config = llm_config
-        self.llm_client = self._create_llm_instance()
-        self.search_tool = PineconeSearchTool()
-
-        self.logger.info("Agente ultra simplificado inicializado")
-
-    def _create_llm_instance(self):
-        """Cria uma instância do LLM, usando Gemini 2.5"""
-        try:
-            import google.generativeai as genai
-            import os
-            from dotenv import load_dotenv
-
-            load_dotenv()
-
-            # Tenta API key do config primeiro, depois do ambiente
-            api_key = self.llm_config.get('api_key') or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-
-            if not api_key:
-                self.logger.error("API key do Gemini não encontrada no config nem no ambiente")
-                return None
-
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel(self.llm_config.get('model', 'gemini-2.5-flash'))
-            self.logger.info(f"Instância do LLM Gemini criada: {self.llm_config.get('model', 'gemini-2.5-flash')}")
-            return model
-
-        except ImportError:
-            self.logger.error("google-generativeai não está instalado")
-            return None
-        except Exception as e:
-            self.logger.error(f"Erro ao criar instância Gemini: {e}")
-            return None
-
-    async def process(self, query: str) -> Dict[str, Any]:
-        """Processa consulta jurídica com prompt especializado em Direito Administrativo"""
-        start_time = datetime.now()
-
-        try:
-            self.logger.info(f"Iniciando pesquisa jurídica: {query[:50]}...")
-
-            # 1. Busca direta no Pinecone
-            self.logger.info("1. Buscando no Pinecone...")
-            pinecone_results = self.search_tool.search(query, top_k=10)
-            self.logger.info(f"   Pinecone retornou {len(pinecone_results)} resultados")
-
-            # 2. Prepara contexto como no agente em produção
-            self.logger.info("2. Preparando contexto...")
-            context_text = ""
-            for i, result in enumerate(pinecone_results, 1):
-                content_preview = result.conteudo[:3000]
-                context_text += f"""
-{result.titulo}:
-Relevância: {result.score:.1%}
-Conteúdo: {content_preview}
-"""
-
-            # 3. Prompt especializado em Direito Administrativo
-            self.logger.info("3. Criando prompt...")
-            prompt = f"""# Persona e Objetivo
+# Instruções estáticas do prompt, compiladas uma única vez na importação
+PROMPT_TEMPLATE = PromptTemplate("""# Persona e Objetivo
 
 Você é um Assistente Jurídico Especialista em Direito Administrativo, com foco no regime de servidores públicos federais. Sua principal habilidade é comunicar informações jurídicas complexas de forma clara, precisa e acessível para dois públicos distintos: profissionais do direito (advogados, juízes, servidores) e cidadãos leigos que buscam entender seus direitos.
 
@@ -171,62 +117,325 @@ Sempre finalize a resposta com o seguinte texto:
   "aviso_legal": "Atenção: Esta é uma análise baseada nas informações fornecidas e na legislação vigente. Não constitui aconselhamento jurídico formal. Para casos concretos, é fundamental consultar um advogado ou o setor de recursos humanos do seu órgão."
 }}
 
-RESPOSTA JSON:"""
+RESPOSTA JSON:""")
+
+
+class ResearchAgent:
+    """Agente de pesquisa jurídica especializado em Direito Administrativo"""
+
+    def __init__(self, llm_config: Dict[str, Any]):
+        self.logger = logging.getLogger(f"Agent.{self.__class__.__name__}")
+        self.llm_config = llm_config
+        self.llm_client = self._create_llm_instance()
+        self.search_tool = PineconeSearchTool()
+
+        # Cache semântico de respostas (consultas parafraseadas reaproveitam a síntese)
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=int(os.getenv('ANSWER_CACHE_SIZE', '512')),
+            ttl=float(os.getenv('ANSWER_CACHE_TTL', str(24 * 3600))),
+            threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95')),
+            cache_dir=os.getenv('ANSWER_CACHE_DIR', diretorio_cache('respostas')),
+            save_interval=float(os.getenv('ANSWER_CACHE_SAVE_INTERVAL', '30'))
+        )
+
+        # Montagem do contexto com orçamento de tokens (MMR + deduplicação por nota técnica)
+        self.context_builder = ContextBuilder(
+            token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '4000')),
+            mmr_lambda=float(os.getenv('CONTEXT_MMR_LAMBDA', '0.7'))
+        )
+
+        # Busca multi-query com os termos do glossário (opt-in)
+        self.multi_query = os.getenv('MULTI_QUERY_RETRIEVAL', 'false').lower() == 'true'
+        self.multi_query_max = int(os.getenv('MULTI_QUERY_MAX_QUERIES', '4'))
+        self.multi_query_deadline = float(os.getenv('MULTI_QUERY_DEADLINE', '2.5'))
+
+        self.logger.info("Agente ultra simplificado inicializado")
+
+    def _create_llm_instance(self):
+        """Cria uma instância do LLM, usando Gemini 2.5"""
+        try:
+            import google.generativeai as genai
+            import os
+            from dotenv import load_dotenv
+
+            load_dotenv()
+
+            model_name = self.llm_config.get('model', 'gemini-2.5-flash')
+
+            # Replay de fixtures: respostas gravadas, sem API key nem rede
+            if modo_fixture() == 'replay':
+                self.logger.info(f"LLM em modo replay de fixtures: {model_name}")
+                return envolver_modelo(None, model_name)
+
+            # Tenta API key do config primeiro, depois do ambiente
+            api_key = self.llm_config.get('api_key') or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+
+            if not api_key:
+                self.logger.error("API key do Gemini não encontrada no config nem no ambiente")
+                return None
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            self.logger.info(f"Instância do LLM Gemini criada: {model_name}")
+            return envolver_modelo(model, model_name)
+
+        except ImportError:
+            self.logger.error("google-generativeai não está instalado")
+            return None
+        except Exception as e:
+            self.logger.error(f"Erro ao criar instância Gemini: {e}")
+            return None
+
+    async def _retrieve(self, query: str, top_k: int = 10) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+        """Busca os documentos da consulta; retorna (resultados, relatório da busca multi-query ou None)"""
+        if not self.multi_query:
+            return await self.search_tool.asearch(query, top_k=top_k), None
+
+        try:
+            return await self._retrieve_multi_query(query, top_k)
+        except Exception as e:
+            self.logger.error(f"Erro na busca multi-query, usando busca simples: {e}")
+            return await self.search_tool.asearch(query, top_k=top_k), None
+
+    async def _retrieve_multi_query(self, query: str, top_k: int) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Busca multi-query guiada pelo glossário.
+
+        1ª rodada: a consulta original e os `termos_busca_otimizados` do
+        pré-processamento, com embeddings em lote e queries em paralelo.
+        Se o pós-processamento indicar resultados fracos ou homonímia não
+        resolvida, uma única rodada de refinamento (também paralela) é feita,
+        desde que caiba no prazo MULTI_QUERY_DEADLINE contado do início da busca;
+        se o prazo estourar, ficam os resultados da 1ª rodada.
+        """
+        inicio = time.perf_counter()
+        integracao = obter_integracao()
+        preprocessamento = integracao.preprocessor.preprocessar_query(query)
+
+        candidatas = list(dict.fromkeys([query, *preprocessamento["termos_busca_otimizados"]]))
+        primeira_rodada = candidatas[:self.multi_query_max]
+        resultados = await self.search_tool.search_many(primeira_rodada, top_k=top_k, max_results=top_k)
+        tempo_rodada = time.perf_counter() - inicio
+
+        relatorio = {
+            'queries': primeira_rodada,
+            'refinamento': False,
+            'queries_refinamento': [],
+            'tempo_primeira_rodada': tempo_rodada
+        }
+
+        analise = integracao.postprocessor.analisar_resultados(
+            preprocessamento["query_original"],
+            preprocessamento["query_expandida"],
+            [{'content': r.conteudo, 'score': r.score} for r in resultados],
+            list(preprocessamento["termos_ambiguos_detectados"])
+        )
+        relatorio['relevancia'] = analise["relevancia_resultados"]["relevancia_geral"]
+
+        homonimia = analise["homonímia_resolvida"]
+        precisa_refinar = relatorio['relevancia'] == "baixa" or bool(homonimia["termos_problematicos"])
+        refinamento = self._queries_refinamento(candidatas[self.multi_query_max:], homonimia["termos_problematicos"])
+        restante = self.multi_query_deadline - tempo_rodada
+
+        # No máximo uma rodada extra, e só se ela couber no prazo restante
+        if precisa_refinar and refinamento and restante >= tempo_rodada:
+            relatorio['queries_refinamento'] = refinamento
+            try:
+                extras = await asyncio.wait_for(
+                    self.search_tool.search_many(refinamento, top_k=top_k, max_results=top_k), timeout=restante
+                )
+                resultados = self._fundir_resultados(resultados, extras, top_k)
+                relatorio['refinamento'] = True
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Refinamento multi-query excedeu o prazo ({restante:.2f}s); "
+                                    f"mantendo a 1ª rodada")
+
+        relatorio['tempo_total'] = time.perf_counter() - inicio
+        self.logger.info(
+            f"   Multi-query: {len(primeira_rodada)} queries, relevância {relatorio['relevancia']}, "
+            f"refinamento {'sim' if relatorio['refinamento'] else 'não'} ({relatorio['tempo_total']:.2f}s)"
+        )
+        return resultados, relatorio
+
+    def _queries_refinamento(self, restantes: List[str], termos_problematicos: List[Dict[str, Any]]) -> List[str]:
+        """Queries da rodada de refinamento: termos ainda não buscados e termos com contexto explícito"""
+        queries = []
+        for problema in termos_problematicos:
+            info = expandir_termo_ambiguo(problema["termo"])
+            if info:
+                queries.append(f"{info['expansao']} ({problema['contexto_esperado']})")
+        queries.extend(restantes)
+        # Variações que diferem só na caixa ("ART", "art") geram o mesmo embedding na prática
+        vistas, unicas = set(), []
+        for q in queries:
+            if q.casefold() not in vistas:
+                vistas.add(q.casefold())
+                unicas.append(q)
+        return unicas[:self.multi_query_max]
+
+    @staticmethod
+    def _fundir_resultados(resultados: List[Any], extras: List[Any], top_k: int) -> List[Any]:
+        """Une duas listas de resultados mantendo, por documento, o maior score"""
+        melhores: Dict[str, Any] = {}
+        for resultado in [*resultados, *extras]:
+            atual = melhores.get(resultado.documento_id)
+            if atual is None or resultado.score > atual.score:
+                melhores[resultado.documento_id] = resultado
+        return sorted(melhores.values(), key=lambda r: r.score, reverse=True)[:top_k]
+
+    def _build_context(self, pinecone_results: List[Any]) -> Tuple[str, Dict[str, Any]]:
+        """Prepara o texto de contexto com os documentos recuperados, dentro do orçamento de tokens"""
+        with STAGE_METRICS.span('context_build'):
+            context_text, report = self.context_builder.build(pinecone_results)
+        self.logger.info(
+            f"   Contexto: {report['tokens_contexto']} tokens "
+            f"({report['trechos_usados']} trechos, {report['tokens_economizados']} tokens economizados)"
+        )
+        return context_text, report
+
+    def _build_prompt(self, query: str, context_text: str) -> str:
+        """Prompt especializado em Direito Administrativo (template pré-compilado)"""
+        return PROMPT_TEMPLATE.render(query=query, context_text=context_text)
+
+    @staticmethod
+    def _principais_fontes(pinecone_results: List[Any]) -> List[str]:
+        """Resumo das três fontes mais relevantes"""
+        return [f"{r.titulo} (Relevância: {r.score:.1%})" for r in pinecone_results[:3]]
+
+    def _parse_llm_response(self, raw_text: str, pinecone_results: List[Any],
+                            start_time: datetime) -> Tuple[str, bool]:
+        """Extrai o JSON da resposta do Gemini; retorna (synthesis, sucesso)"""
+        response_text = raw_text
+
+        try:
+            self.logger.info(f"Resposta bruta do Gemini: {response_text[:200]}...")
+
+            # Remove marcadores ```json se existirem
+            if "```json" in response_text:
+                # Extrai apenas o conteúdo JSON entre os marcadores
+                json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+                if json_match:
+                    response_text = json_match.group(1).strip()
+                    self.logger.info(f"JSON extraído: {response_text[:200]}...")
+
+            # Tenta fazer parse do JSON
+            json_response = json.loads(response_text)
+
+            # Adiciona informações de processamento
+            json_response['processing_time'] = (datetime.now() - start_time).total_seconds()
+            json_response['total_documents'] = len(pinecone_results)
+            json_response['principais_fontes'] = self._principais_fontes(pinecone_results)
+
+            self.logger.info("6. JSON processado com sucesso!")
+
+            # Mantém compatibilidade com o backend atual
+            return json.dumps(json_response, ensure_ascii=False, indent=2), True
+
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Erro ao processar JSON: {e}")
+            # Fallback para resposta de erro
+            return json.dumps({
+                "error": "Erro ao processar resposta JSON",
+                "raw_response": raw_text or "Sem resposta",
+                "processing_time": (datetime.now() - start_time).total_seconds(),
+                "total_documents": len(pinecone_results),
+                "principais_fontes": self._principais_fontes(pinecone_results)
+            }, ensure_ascii=False, indent=2), False
+
+    def _build_result(self, query: str, synthesis: str, pinecone_results: List[Any], start_time: datetime,
+                      context_report: Optional[Dict[str, Any]] = None,
+                      retrieval_report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Monta o dicionário de resultado retornado ao backend"""
+        result = {
+            'query': query,
+            'synthesis': synthesis,
+            'processing_time': (datetime.now() - start_time).total_seconds(),
+            'total_documents': len(pinecone_results),
+            'principais_fontes': self._principais_fontes(pinecone_results)
+        }
+        if context_report:
+            result['context_stats'] = context_report
+        if retrieval_report:
+            result['retrieval_stats'] = retrieval_report
+        return result
+
+    async def _lookup_answer_cache(self, query: str, pinecone_results: List[Any], bypass_cache: bool,
+                                   com_contexto: bool = False) -> Tuple[List[float], Optional[Dict[str, Any]]]:
+        """
+        Consulta o cache semântico; retorna (embedding da query, entrada em cache ou None).
+        Com contexto da conversa no prompt a síntese depende da conversa: o cache não é usado.
+        """
+        if com_contexto:
+            return [], None
+        if bypass_cache:
+            self.answer_cache.record_bypass()
+            return [], None
+
+        query_embedding = await self.search_tool.aget_embedding(query)
+        cached = self.answer_cache.lookup(query_embedding, [r.documento_id for r in pinecone_results])
+        if cached:
+            self.logger.info(f"Cache semântico: hit (similaridade {cached['similarity']:.3f})")
+        return query_embedding, cached
+
+    def _store_answer(self, query_embedding: List[float], pinecone_results: List[Any], query: str,
+                      synthesis: str, generation_time: float) -> None:
+        """Armazena a síntese no cache semântico (a gravação em disco é agrupada pela thread do cache)"""
+        if not query_embedding:
+            return
+        self.answer_cache.put(query_embedding, [r.documento_id for r in pinecone_results], query,
+                              synthesis, generation_time)
+
+    async def process(self, query: str, bypass_cache: bool = False,
+                      search_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Processa consulta jurídica com prompt especializado em Direito Administrativo.
+
+        `search_query` é o texto usado na busca quando difere do texto do prompt
+        (pergunta sem o contexto da conversa, cujo embedding já está em cache).
+        """
+        start_time = datetime.now()
+        com_contexto = search_query is not None and search_query != query
+
+        try:
+            self.logger.info(f"Iniciando pesquisa jurídica: {query[:50]}...")
+
+            # 1. Busca direta no Pinecone
+            self.logger.info("1. Buscando no Pinecone...")
+            pinecone_results, retrieval_report = await self._retrieve(search_query or query, top_k=10)
+            self.logger.info(f"   Pinecone retornou {len(pinecone_results)} resultados")
+
+            # Cache semântico: mesma pergunta (parafraseada) com os mesmos documentos
+            query_embedding, cached = await self._lookup_answer_cache(query, pinecone_results, bypass_cache,
+                                                                      com_contexto)
+            if cached:
+                return {**self._build_result(query, cached['synthesis'], pinecone_results, start_time),
+                        'cache_hit': True}
+
+            # 2. Prepara contexto como no agente em produção
+            self.logger.info("2. Preparando contexto...")
+            context_text, context_report = self._build_context(pinecone_results)
+
+            # 3. Prompt especializado em Direito Administrativo
+            self.logger.info("3. Criando prompt...")
+            prompt = self._build_prompt(query, context_text)
 
             # 4. Chama Gemini
             self.logger.info("4. Chamando Gemini...")
-            response = self.llm_client.generate_content(prompt)
+            generation_start = datetime.now()
+            with STAGE_METRICS.span('llm_call'):
+                response = await self.llm_client.generate_content_async(prompt)
             self.logger.info("5. Gemini respondeu!")
 
             # 5. Processa resposta JSON
-            try:
-                import json
-                import re
-                response_text = response.text if response else "Erro na resposta"
-
-                self.logger.info(f"Resposta bruta do Gemini: {response_text[:200]}...")
-
-                # Remove marcadores ```json se existirem
-                if "```json" in response_text:
-                    # Extrai apenas o conteúdo JSON entre os marcadores
-                    json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-                    if json_match:
-                        response_text = json_match.group(1).strip()
-                        self.logger.info(f"JSON extraído: {response_text[:200]}...")
-
-                # Tenta fazer parse do JSON
-                json_response = json.loads(response_text)
-
-                # Adiciona informações de processamento
-                json_response['processing_time'] = (datetime.now() - start_time).total_seconds()
-                json_response['total_documents'] = len(pinecone_results)
-                json_response['principais_fontes'] = [f"{r.titulo} (Relevância: {r.score:.1%})" for r in pinecone_results[:3]]
-
-                # Mantém compatibilidade com o backend atual
-                synthesis = json.dumps(json_response, ensure_ascii=False, indent=2)
-
-                self.logger.info("6. JSON processado com sucesso!")
-
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Erro ao processar JSON: {e}")
-                # Fallback para resposta de erro
-                synthesis = json.dumps({
-                    "error": "Erro ao processar resposta JSON",
-                    "raw_response": response.text if response else "Sem resposta",
-                    "processing_time": (datetime.now() - start_time).total_seconds(),
-                    "total_documents": len(pinecone_results),
-                    "principais_fontes": [f"{r.titulo} (Relevância: {r.score:.1%})" for r in pinecone_results[:3]]
-                }, ensure_ascii=False, indent=2)
-
-            processing_time = (datetime.now() - start_time).total_seconds()
+            with STAGE_METRICS.span('json_parse'):
+                synthesis, parsed = self._parse_llm_response(response.text if response else "Erro na resposta",
+                                                             pinecone_results, start_time)
+            if parsed:
+                self._store_answer(query_embedding, pinecone_results, query, synthesis,
+                                   (datetime.now() - generation_start).total_seconds())
 
-            return {
-                'query': query,
-                'synthesis': synthesis,
-                'processing_time': processing_time,
-                'total_documents': len(pinecone_results),
-                'principais_fontes': [f"{r.titulo} (Relevância: {r.score:.1%})" for r in pinecone_results[:3]]
-            }
+            return self._build_result(query, synthesis, pinecone_results, start_time, context_report,
+                                      retrieval_report)
 
         except Exception as e:
             self.logger.error(f"Erro no processamento: {e}")
@@ -234,3 +443,70 @@ RESPOSTA JSON:"""
                 'error': f"Erro: {str(e)}",
                 'processing_time': (datetime.now() - start_time).total_seconds()
             }
+
+    async def process_stream(self, query: str, bypass_cache: bool = False,
+                             search_query: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão em streaming de process().
+
+        Emite eventos na ordem:
+        - {'tipo': 'resultados', 'dados': {...}} logo após a busca no Pinecone
+        - {'tipo': 'token', 'dados': str} para cada fragmento gerado pelo Gemini
+        - {'tipo': 'final', 'dados': {...}} com o mesmo resultado de process()
+        """
+        start_time = datetime.now()
+        com_contexto = search_query is not None and search_query != query
+
+        try:
+            self.logger.info(f"Iniciando pesquisa jurídica (stream): {query[:50]}...")
+
+            pinecone_results, retrieval_report = await self._retrieve(search_query or query, top_k=10)
+            yield {
+                'tipo': 'resultados',
+                'dados': {
+                    'total_documents': len(pinecone_results),
+                    'principais_fontes': self._principais_fontes(pinecone_results),
+                    'processing_time': (datetime.now() - start_time).total_seconds()
+                }
+            }
+
+            query_embedding, cached = await self._lookup_answer_cache(query, pinecone_results, bypass_cache,
+                                                                      com_contexto)
+            if cached:
+                yield {'tipo': 'final', 'dados': {
+                    **self._build_result(query, cached['synthesis'], pinecone_results, start_time),
+                    'cache_hit': True
+                }}
+                return
+
+            context_text, context_report = self._build_context(pinecone_results)
+            prompt = self._build_prompt(query, context_text)
+
+            generation_start = datetime.now()
+            chunks = []
+            response = await self.llm_client.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield {'tipo': 'token', 'dados': text}
+            STAGE_METRICS.observe('llm_call', (datetime.now() - generation_start).total_seconds())
+
+            with STAGE_METRICS.span('json_parse'):
+                synthesis, parsed = self._parse_llm_response("".join(chunks), pinecone_results, start_time)
+            if parsed:
+                self._store_answer(query_embedding, pinecone_results, query, synthesis,
+                                   (datetime.now() - generation_start).total_seconds())
+            yield {'tipo': 'final',
+                   'dados': self._build_result(query, synthesis, pinecone_results, start_time, context_report,
+                                               retrieval_report)}
+
+        except Exception as e:
+            self.logger.error(f"Erro no processamento (stream): {e}")
+            yield {
+                'tipo': 'final',
+                'dados': {
+                    'error': f"Erro: {str(e)}",
+                    'processing_time': (datetime.now() - start_time).total_seconds()
+                }
+            }
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Matcher Aho–Corasick do Glossário Técnico-Jurídico
+==================================================
+
+Autômato compilado sobre todas as chaves e variações do glossário, com caixa e
+acentos dobrados. Encontra todos os termos — inclusive os de várias palavras,
+como "estágio probatório" ou "Lei 8.112/1990" — em uma única passada O(n) sobre
+o texto, respeitando limites de palavra ("ART" não casa dentro de "ARTIGO").
+"""
+
+import unicodedata
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Iterable, Mapping, NamedTuple, Optional
+
+# =============================================================================
+# DOBRA DE CAIXA E ACENTOS
+# =============================================================================
+
+def dobrar_caractere(c: str) -> str:
+    """Dobra um caractere: remove acentos, converte para minúscula e espaços para ' '"""
+    if c.isspace():
+        return ' '
+    decomposto = unicodedata.normalize('NFKD', c)
+    return ''.join(d for d in decomposto if not unicodedata.combining(d)).lower()
+
+
+class _TabelaDobra(dict):
+    """
+    Tabela para `str.translate` preenchida sob demanda (um cálculo por caractere distinto).
+
+    Caracteres cuja dobra não tem exatamente um caractere ("ß" -> "ss", marcas
+    combinantes soltas -> "") ficam em `irregulares`: só textos que os contêm
+    precisam do mapeamento de posições caractere a caractere.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.irregulares = set()
+
+    def __missing__(self, codigo: int) -> str:
+        dobrado = dobrar_caractere(chr(codigo))
+        if len(dobrado) != 1:
+            self.irregulares.add(chr(codigo))
+        self[codigo] = dobrado
+        return dobrado
+
+
+_TABELA_DOBRA = _TabelaDobra()
+
+
+def dobrar_texto(texto: str) -> str:
+    """Dobra caixa e acentos de um texto ("Estágio Probatório" -> "estagio probatorio")"""
+    return texto.translate(_TABELA_DOBRA)
+
+
+def _dobrar_com_posicoes(texto: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Texto dobrado e, para cada caractere dobrado, a posição de origem no texto original.
+
+    No caso comum (dobra de um caractere para um) as posições coincidem e o
+    mapeamento retornado é None.
+    """
+    dobrado = texto.translate(_TABELA_DOBRA)
+    if not _TABELA_DOBRA.irregulares or _TABELA_DOBRA.irregulares.isdisjoint(texto):
+        return dobrado, None
+
+    origem = []
+    for i, c in enumerate(texto):
+        origem.extend([i] * len(_TABELA_DOBRA[ord(c)]))
+    return dobrado, origem
+
+
+# =============================================================================
+# ÍNDICE REVERSO
+# =============================================================================
+
+def construir_indice_reverso(glossario: Dict[str, Dict]) -> Mapping[str, str]:
+    """
+    Índice imutável de variação dobrada -> chave canônica do glossário.
+
+    As chaves têm prioridade; entre variações iguais de entradas diferentes,
+    prevalece a primeira entrada do glossário.
+    """
+    indice: Dict[str, str] = {}
+    for chave in glossario:
+        indice.setdefault(dobrar_texto(chave).strip(), chave)
+    for chave, info in glossario.items():
+        for variacao in info.get("variacoes", []):
+            indice.setdefault(dobrar_texto(variacao).strip(), chave)
+    return MappingProxyType(indice)
+
+
+# =============================================================================
+# AUTÔMATO
+# =============================================================================
+
+class Ocorrencia(NamedTuple):
+    """Termo encontrado: posições [inicio, fim) no texto original e chave canônica"""
+    inicio: int
+    fim: int
+    chave: str
+    termo: str
+
+
+class GlossaryMatcher:
+    """
+    Autômato de Aho–Corasick sobre os padrões (dobrados) do glossário.
+
+    Cada padrão aponta para a chave canônica do glossário. Na compilação os links
+    de falha são resolvidos em uma tabela de transições completa (DFA), de modo
+    que a busca faz uma consulta de dicionário por caractere do texto dobrado.
+    As ocorrências só são aceitas quando delimitadas por caracteres não
+    alfanuméricos (ou início/fim do texto).
+    """
+
+    def __init__(self, padroes: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            padroes: pares (padrão, chave canônica)
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[Tuple[int, str]]] = [[]]
+        self.total_padroes = 0
+
+        for padrao, chave in padroes:
+            self._adicionar(dobrar_texto(padrao).strip(), chave)
+        self._construir_falhas()
+        self._delta = self._construir_dfa()
+        self._saidas_dfa: List[Optional[Tuple[Tuple[int, str], ...]]] = [
+            tuple(saidas) if saidas else None for saidas in self._saidas
+        ]
+
+    @classmethod
+    def from_glossary(cls, glossario: Dict[str, Dict]) -> "GlossaryMatcher":
+        """Compila o matcher a partir das chaves e `variacoes` de um glossário"""
+        return cls(
+            (padrao, chave)
+            for chave, info in glossario.items()
+            for padrao in [chave, *info.get("variacoes", [])]
+        )
+
+    def _adicionar(self, padrao: str, chave: str) -> None:
+        if not padrao:
+            return
+        estado = 0
+        for c in padrao:
+            proximo = self._goto[estado].get(c)
+            if proximo is None:
+                proximo = len(self._goto)
+                self._goto[estado][c] = proximo
+                self._goto.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            estado = proximo
+        if all(chave_existente != chave or comprimento != len(padrao)
+               for comprimento, chave_existente in self._saidas[estado]):
+            self._saidas[estado].append((len(padrao), chave))
+            self.total_padroes += 1
+
+    def _construir_falhas(self) -> None:
+        """BFS sobre a trie definindo os links de falha e herdando as saídas"""
+        fila = list(self._goto[0].values())
+        for estado in fila:
+            for c, proximo in self._goto[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and c not in self._goto[falha]:
+                    falha = self._falha[falha]
+                destino = self._goto[falha].get(c, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falha[proximo]]
+
+    def _construir_dfa(self) -> List[Dict[str, int]]:
+        """Transições completas: delta[s] = delta[falha[s]] sobrescrito por goto[s] (em ordem BFS)"""
+        delta: List[Dict[str, int]] = [dict() for _ in self._goto]
+        delta[0] = dict(self._goto[0])
+        fila = list(self._goto[0].values())
+        for estado in fila:
+            delta[estado] = {**delta[self._falha[estado]], **self._goto[estado]}
+            fila.extend(self._goto[estado].values())
+        return delta
+
+    @staticmethod
+    def _limite(texto: str, posicao: int) -> bool:
+        return posicao < 0 or posicao >= len(texto) or not texto[posicao].isalnum()
+
+    def encontrar_todos(self, texto: str) -> List[Ocorrencia]:
+        """Todas as ocorrências (inclusive sobrepostas), em ordem de término"""
+        dobrado, origem = _dobrar_com_posicoes(texto)
+        delta, saidas = self._delta, self._saidas_dfa
+
+        ocorrencias = []
+        estado = 0
+        for i, c in enumerate(dobrado):
+            estado = delta[estado].get(c, 0)
+            if saidas[estado] is None:
+                continue
+            for comprimento, chave in saidas[estado]:
+                inicio = i - comprimento + 1
+                if self._limite(dobrado, inicio - 1) and self._limite(dobrado, i + 1):
+                    ini, fim = (inicio, i + 1) if origem is None else (origem[inicio], origem[i] + 1)
+                    ocorrencias.append(Ocorrencia(ini, fim, chave, texto[ini:fim]))
+        return ocorrencias
+
+    def encontrar(self, texto: str) -> List[Ocorrencia]:
+        """Ocorrências sem sobreposição, escolhendo a mais à esquerda e, nela, a mais longa"""
+        selecionadas = []
+        fim_anterior = -1
+        for ocorrencia in sorted(self.encontrar_todos(texto), key=lambda o: (o.inicio, -o.fim)):
+            if ocorrencia.inicio >= fim_anterior:
+                selecionadas.append(ocorrencia)
+                fim_anterior = ocorrencia.fim
+        return selecionadas
+
+    @property
+    def total_estados(self) -> int:
+        return len(self._goto)
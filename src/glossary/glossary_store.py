@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento do Glossário com Snapshots Compilados e Recarga a Quente
+======================================================================
+
+O glossário é lido de um arquivo de dados (JSON, ou YAML se o PyYAML estiver
+instalado) e compilado em um snapshot imutável com índice reverso e matcher.
+Uma thread de fundo verifica o arquivo periodicamente; quando ele muda, uma
+nova versão é compilada nessa thread e publicada com uma única atribuição:
+requisições em andamento continuam usando o snapshot que já tinham em mãos, e
+nenhuma leitura (nem o event loop do servidor) espera pela compilação.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from glossary.glossary_matcher import GlossaryMatcher, construir_indice_reverso
+
+# =============================================================================
+# CONFIGURAÇÃO DE LOGGING
+# =============================================================================
+
+logger = logging.getLogger(__name__)
+
+# Arquivo padrão distribuído junto com o código
+GLOSSARIO_PADRAO = Path(__file__).parent / "glossario.json"
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+class GlossarySnapshot(NamedTuple):
+    """Versão compilada e imutável do glossário"""
+    versao: int
+    hash_conteudo: str
+    origem: str
+    glossario: Mapping[str, Mapping[str, Any]]
+    indice: Mapping[str, str]
+    matcher: GlossaryMatcher
+    compilado_em: float
+    tempo_compilacao: float
+
+    def info(self) -> Dict[str, Any]:
+        """Metadados da versão (para estatísticas e diagnóstico)"""
+        return {
+            "versao": self.versao,
+            "hash": self.hash_conteudo[:12],
+            "origem": self.origem,
+            "compilado_em": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.compilado_em)),
+            "tempo_compilacao_ms": round(self.tempo_compilacao * 1000, 3),
+            "total_padroes": self.matcher.total_padroes
+        }
+
+
+def _congelar(valor: Any) -> Any:
+    """Converte dicts em MappingProxyType e listas em tuplas (recursivamente)"""
+    if isinstance(valor, dict):
+        return MappingProxyType({chave: _congelar(item) for chave, item in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(item) for item in valor)
+    return valor
+
+
+def descongelar(valor: Any) -> Any:
+    """Inverso de _congelar: cópia mutável com dicts e listas (serializável em JSON)"""
+    if isinstance(valor, (dict, MappingProxyType)):
+        return {chave: descongelar(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [descongelar(item) for item in valor]
+    return valor
+
+
+def compilar_snapshot(glossario: Dict[str, Dict], versao: int, origem: str,
+                      hash_conteudo: Optional[str] = None) -> GlossarySnapshot:
+    """
+    Compila um glossário em um snapshot imutável.
+
+    Args:
+        glossario (dict): Entradas do glossário (chave -> informações)
+        versao (int): Número da versão
+        origem (str): Arquivo (ou descrição) de onde o glossário veio
+
+    Returns:
+        GlossarySnapshot: Snapshot com índice reverso e matcher compilados
+    """
+    inicio = time.perf_counter()
+    if hash_conteudo is None:
+        hash_conteudo = hashlib.sha1(
+            json.dumps(glossario, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    return GlossarySnapshot(
+        versao=versao,
+        hash_conteudo=hash_conteudo,
+        origem=origem,
+        glossario=_congelar(glossario),
+        indice=construir_indice_reverso(glossario),
+        matcher=GlossaryMatcher.from_glossary(glossario),
+        compilado_em=time.time(),
+        tempo_compilacao=time.perf_counter() - inicio
+    )
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class GlossaryStore:
+    """
+    Mantém o snapshot atual do glossário e o recarrega quando o arquivo muda.
+
+    `snapshot()` só devolve a referência atual; a única leitura síncrona do
+    arquivo é a primeira carga. Depois dela, uma thread de fundo (daemon)
+    verifica a assinatura do arquivo (um `os.stat`) a cada
+    `intervalo_verificacao` segundos e recompila fora das requisições. Apenas
+    uma thread recompila por vez. Se o arquivo novo for inválido, a versão
+    anterior continua publicada.
+    """
+
+    def __init__(self, caminho: Optional[str] = None, intervalo_verificacao: float = 2.0,
+                 vigiar: bool = True):
+        self.caminho = Path(caminho or os.getenv("GLOSSARY_PATH") or GLOSSARIO_PADRAO)
+        self.intervalo_verificacao = intervalo_verificacao
+        self.vigiar = vigiar
+        self._lock_recarga = threading.Lock()
+        self._versao = 0
+        self._assinatura: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[GlossarySnapshot] = None
+        self._parar = threading.Event()
+        self._vigia: Optional[threading.Thread] = None
+
+    def snapshot(self) -> GlossarySnapshot:
+        """Snapshot atual (a recarga acontece na thread de fundo, nunca aqui)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.recarregar()
+            self._iniciar_vigia()
+        return snapshot
+
+    def parar(self) -> None:
+        """Encerra a thread que vigia o arquivo"""
+        self._parar.set()
+        vigia = self._vigia
+        if vigia is not None and vigia is not threading.current_thread():
+            vigia.join(timeout=self.intervalo_verificacao + 1)
+
+    def _iniciar_vigia(self) -> None:
+        if not self.vigiar or self._vigia is not None:
+            return
+        with self._lock_recarga:
+            if self._vigia is None:
+                self._vigia = threading.Thread(target=self._vigiar_arquivo, name="glossary-watcher", daemon=True)
+                self._vigia.start()
+
+    def _vigiar_arquivo(self) -> None:
+        while not self._parar.wait(self.intervalo_verificacao):
+            try:
+                if self._assinatura_arquivo() != self._assinatura:
+                    self.recarregar(bloquear=False)
+            except Exception as e:
+                logger.error(f"Erro ao verificar glossário em {self.caminho}: {e}")
+
+    def recarregar(self, forcar: bool = False, bloquear: bool = True) -> GlossarySnapshot:
+        """
+        Lê e compila o arquivo, publicando uma nova versão se o conteúdo mudou.
+
+        Args:
+            forcar (bool): Recompila mesmo que o conteúdo seja o mesmo
+            bloquear (bool): Se False e outra thread já estiver recarregando,
+                retorna imediatamente o snapshot atual
+        """
+        if not self._lock_recarga.acquire(blocking=bloquear or self._snapshot is None):
+            return self._snapshot
+
+        try:
+            assinatura = self._assinatura_arquivo()
+            try:
+                conteudo = self.caminho.read_bytes()
+                hash_conteudo = hashlib.sha1(conteudo).hexdigest()
+                if not forcar and self._snapshot is not None and hash_conteudo == self._snapshot.hash_conteudo:
+                    self._assinatura = assinatura
+                    return self._snapshot
+
+                glossario = self._interpretar(conteudo)
+                snapshot = compilar_snapshot(glossario, self._versao + 1, str(self.caminho), hash_conteudo)
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                logger.error(f"Erro ao recarregar glossário de {self.caminho}: {e} "
+                             f"(mantendo versão {self._snapshot.versao})")
+                self._assinatura = assinatura
+                return self._snapshot
+
+            self._publicar(snapshot, assinatura)
+            return snapshot
+        finally:
+            self._lock_recarga.release()
+
+    def publicar(self, glossario: Dict[str, Dict], origem: str = "memória") -> GlossarySnapshot:
+        """Publica um glossário fornecido diretamente (sem arquivo) como nova versão"""
+        with self._lock_recarga:
+            snapshot = compilar_snapshot(glossario, self._versao + 1, origem)
+            self._publicar(snapshot, self._assinatura_arquivo())
+            return snapshot
+
+    def _publicar(self, snapshot: GlossarySnapshot, assinatura: Optional[Tuple[int, int]]) -> None:
+        self._versao = snapshot.versao
+        self._assinatura = assinatura
+        self._snapshot = snapshot  # troca atômica: leitores pegam a versão antiga ou a nova inteira
+        logger.info(f"Glossário v{snapshot.versao} publicado: {len(snapshot.glossario)} termos "
+                    f"compilados em {snapshot.tempo_compilacao * 1000:.1f}ms ({snapshot.origem})")
+
+    def _assinatura_arquivo(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.caminho.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _interpretar(self, conteudo: bytes) -> Dict[str, Dict]:
+        """Interpreta o arquivo conforme a extensão (.json, .yaml/.yml)"""
+        if self.caminho.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML não está instalado; use um glossário em JSON")
+            glossario = yaml.safe_load(conteudo)
+        else:
+            glossario = json.loads(conteudo.decode("utf-8"))
+
+        if not isinstance(glossario, dict) or not all(isinstance(info, dict) for info in glossario.values()):
+            raise ValueError("O glossário deve ser um objeto {termo: {expansao, contexto, variacoes, ...}}")
+        return glossario
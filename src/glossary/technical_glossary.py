@@ -3,215 +3,82 @@
 Glossário Técnico-Jurídico para Expansão de Termos Ambíguos
 ============================================================
 
-Este módulo contém um glossário estruturado de termos técnicos e jurídicos
-encontrados nos documentos da pasta origem, organizado para facilitar a
-expansão de termos ambíguos antes das consultas ao banco de dados.
+Este módulo dá acesso ao glossário estruturado de termos técnicos e jurídicos
+encontrados nos documentos da pasta origem (mantido em glossario.json),
+organizado para facilitar a expansão de termos ambíguos antes das consultas
+ao banco de dados.
 """
 
+import sys
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+# Adiciona o diretório src ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from glossary.glossary_matcher import GlossaryMatcher, dobrar_texto
+from glossary.glossary_store import GlossaryStore, GlossarySnapshot, descongelar
+
 # =============================================================================
 # GLOSSÁRIO TÉCNICO-JURÍDICO
 # =============================================================================
 
-TECHNICAL_GLOSSARY = {
-    # ========================================================================
-    # TERMOS DE RESPONSABILIDADE TÉCNICA
-    # ========================================================================
-    "ART": {
-        "expansao": "Anotação de Responsabilidade Técnica",
-        "contexto": "jurídico-técnico",
-        "descricao": "Documento que registra a responsabilidade técnica de profissionais habilitados em obras e serviços de engenharia",
-        "legislacao": ["Lei 6.496/1977", "Resolução CONFEA 1.025/2009"],
-        "variacoes": ["ART", "art", "Anotação de Responsabilidade Técnica"]
-    },
-
-    "RRT": {
-        "expansao": "Registro de Responsabilidade Técnica",
-        "contexto": "jurídico-técnico",
-        "descricao": "Registro que documenta a responsabilidade técnica de profissionais habilitados",
-        "legislacao": ["Lei 6.496/1977", "Resolução CONFEA 1.025/2009"],
-        "variacoes": ["RRT", "rrt", "Registro de Responsabilidade Técnica"]
-    },
-
-    # ========================================================================
-    # ÓRGÃOS E INSTITUIÇÕES
-    # ========================================================================
-    "DNIT": {
-        "expansao": "Departamento Nacional de Infraestrutura de Transportes",
-        "contexto": "administrativo",
-        "descricao": "Órgão responsável pela infraestrutura de transportes no Brasil",
-        "variacoes": ["DNIT", "dnit", "Departamento Nacional de Infraestrutura de Transportes"]
-    },
-
-    "CREA": {
-        "expansao": "Conselho Regional de Engenharia e Agronomia",
-        "contexto": "jurídico-técnico",
-        "descricao": "Conselho responsável pela fiscalização do exercício profissional",
-        "legislacao": ["Lei 5.194/1966"],
-        "variacoes": ["CREA", "crea", "Conselho Regional de Engenharia e Agronomia"]
-    },
-
-    "CAU": {
-        "expansao": "Conselho de Arquitetura e Urbanismo",
-        "contexto": "jurídico-técnico",
-        "descricao": "Conselho responsável pela fiscalização da arquitetura e urbanismo",
-        "variacoes": ["CAU", "cau", "Conselho de Arquitetura e Urbanismo"]
-    },
-
-    "CONFEA": {
-        "expansao": "Conselho Federal de Engenharia e Agronomia",
-        "contexto": "jurídico-técnico",
-        "descricao": "Conselho federal responsável pela regulamentação da profissão",
-        "legislacao": ["Lei 5.194/1966"],
-        "variacoes": ["CONFEA", "confea", "Conselho Federal de Engenharia e Agronomia"]
-    },
-
-    "AGU": {
-        "expansao": "Advocacia-Geral da União",
-        "contexto": "jurídico",
-        "descricao": "Órgão responsável pela representação judicial da União",
-        "variacoes": ["AGU", "agu", "Advocacia-Geral da União"]
-    },
-
-    # ========================================================================
-    # TRIBUNALES E INSTÂNCIAS JUDICIAIS
-    # ========================================================================
-    "STF": {
-        "expansao": "Supremo Tribunal Federal",
-        "contexto": "jurídico",
-        "descricao": "Corte constitucional máxima do Brasil",
-        "variacoes": ["STF", "stf", "Supremo Tribunal Federal"]
-    },
-
-    "TCU": {
-        "expansao": "Tribunal de Contas da União",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Tribunal responsável pelo controle externo da administração pública",
-        "variacoes": ["TCU", "tcu", "Tribunal de Contas da União"]
-    },
-
-    "TRF": {
-        "expansao": "Tribunal Regional Federal",
-        "contexto": "jurídico",
-        "descricao": "Tribunal federal de segunda instância",
-        "variacoes": ["TRF", "trf", "Tribunal Regional Federal"]
-    },
-
-    # ========================================================================
-    # CARGOS E FUNÇÕES PÚBLICAS
-    # ========================================================================
-    "DAS": {
-        "expansao": "Cargo em Comissão de Direção e Assessoramento Superior",
-        "contexto": "administrativo",
-        "descricao": "Cargo de direção e assessoramento superior na administração pública",
-        "legislacao": ["Lei 8.112/1990"],
-        "variacoes": ["DAS", "das", "Cargo em Comissão de Direção e Assessoramento Superior"]
-    },
-
-    # ========================================================================
-    # TERMOS JURÍDICOS ESPECÍFICOS
-    # ========================================================================
-    "vacância": {
-        "expansao": "vacância de cargo público",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Situação de cargo público que está sem ocupante",
-        "legislacao": ["Lei 8.112/1990"],
-        "variacoes": ["vacância", "vacancia", "vacância de cargo público"]
-    },
-
-    "inacumulável": {
-        "expansao": "incompatibilidade de cargos públicos",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Situação em que não é permitida a acumulação de cargos públicos",
-        "legislacao": ["Constituição Federal", "Lei 8.112/1990"],
-        "variacoes": ["inacumulável", "inacumulavel", "incompatibilidade de cargos públicos"]
-    },
-
-    "estágio probatório": {
-        "expansao": "período de estágio probatório",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Período de avaliação para servidores públicos",
-        "legislacao": ["Lei 8.112/1990"],
-        "variacoes": ["estágio probatório", "estagio probatorio", "período de estágio probatório"]
-    },
-
-    "recondução": {
-        "expansao": "recondução a cargo público",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Renovação de nomeação para cargo público",
-        "legislacao": ["Lei 8.112/1990"],
-        "variacoes": ["recondução", "reconducao", "recondução a cargo público"]
-    },
-
-    "substituição": {
-        "expansao": "substituição de servidor público",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Processo de substituição de servidor público",
-        "legislacao": ["Lei 8.112/1990"],
-        "variacoes": ["substituição", "substituicao", "substituição de servidor público"]
-    },
-
-    # ========================================================================
-    # LEGISLAÇÃO ESPECÍFICA
-    # ========================================================================
-    "Lei 8112": {
-        "expansao": "Lei 8.112/1990 - Estatuto dos Servidores Públicos",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Lei que regula o regime jurídico dos servidores públicos",
-        "variacoes": ["Lei 8112", "Lei 8.112", "Lei 8.112/1990", "Estatuto dos Servidores Públicos"]
-    },
-
-    "Lei 6496": {
-        "expansao": "Lei 6.496/1977 - Lei da ART",
-        "contexto": "jurídico-técnico",
-        "descricao": "Lei que regulamenta a Anotação de Responsabilidade Técnica",
-        "variacoes": ["Lei 6496", "Lei 6.496", "Lei 6.496/1977", "Lei da ART"]
-    },
-
-    "Lei 5194": {
-        "expansao": "Lei 5.194/1966 - Lei do Engenheiro",
-        "contexto": "jurídico-técnico",
-        "descricao": "Lei que regulamenta o exercício da profissão de engenheiro",
-        "variacoes": ["Lei 5194", "Lei 5.194", "Lei 5.194/1966", "Lei do Engenheiro"]
-    },
-
-    "Lei 14133": {
-        "expansao": "Lei 14.133/2021 - Nova Lei de Licitações",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Lei que regulamenta licitações e contratos administrativos",
-        "variacoes": ["Lei 14133", "Lei 14.133", "Lei 14.133/2021", "Nova Lei de Licitações"]
-    },
-
-    "Lei 8666": {
-        "expansao": "Lei 8.666/1993 - Lei de Licitações",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Lei que regulamenta licitações e contratos administrativos",
-        "variacoes": ["Lei 8666", "Lei 8.666", "Lei 8.666/1993", "Lei de Licitações"]
-    },
-
-    "Decreto 9507": {
-        "expansao": "Decreto 9.507/2018 - Terceirização",
-        "contexto": "jurídico-administrativo",
-        "descricao": "Decreto que regulamenta a terceirização na administração pública",
-        "variacoes": ["Decreto 9507", "Decreto 9.507", "Decreto 9.507/2018", "Terceirização"]
-    },
-
-    # ========================================================================
-    # RESOLUÇÕES E NORMATIVOS
-    # ========================================================================
-    "Resolução 1025": {
-        "expansao": "Resolução CONFEA 1.025/2009",
-        "contexto": "jurídico-técnico",
-        "descricao": "Resolução que regulamenta a ART e RRT",
-        "variacoes": ["Resolução 1025", "Resolução 1.025", "Resolução CONFEA 1.025/2009"]
-    },
-
-    "Resolução 218": {
-        "expansao": "Resolução CONFEA 218/1973",
-        "contexto": "jurídico-técnico",
-        "descricao": "Resolução que regulamenta atividades técnicas",
-        "variacoes": ["Resolução 218", "Resolução 218/73", "Resolução CONFEA 218/1973"]
-    }
-}
+# O glossário é lido de um arquivo de dados (glossario.json por padrão, ou o
+# caminho em GLOSSARY_PATH) e recarregado automaticamente quando o arquivo muda.
+# As funções abaixo pegam o snapshot atual uma vez por chamada, de modo que uma
+# troca de versão nunca é observada pela metade.
+_STORE = GlossaryStore()
+
+def obter_snapshot() -> GlossarySnapshot:
+    """
+    Retorna o snapshot compilado atual do glossário.
+
+    Returns:
+        GlossarySnapshot: Versão, glossário imutável, índice reverso e matcher
+    """
+    return _STORE.snapshot()
+
+def obter_matcher() -> GlossaryMatcher:
+    """
+    Retorna o matcher Aho–Corasick do glossário atual.
+
+    Returns:
+        GlossaryMatcher: Autômato sobre todas as chaves e variações
+    """
+    return _STORE.snapshot().matcher
+
+def obter_indice_reverso() -> Mapping[str, str]:
+    """
+    Retorna o índice reverso (imutável) de variação dobrada para chave canônica.
+
+    Returns:
+        Mapping[str, str]: Índice de variações
+    """
+    return _STORE.snapshot().indice
+
+def recarregar_glossario(glossario: Optional[Dict[str, Dict]] = None) -> GlossarySnapshot:
+    """
+    Publica uma nova versão do glossário.
+
+    Args:
+        glossario (dict, opcional): Novo glossário; se omitido, relê e recompila
+            o arquivo de dados
+
+    Returns:
+        GlossarySnapshot: Snapshot publicado
+    """
+    if glossario is not None:
+        return _STORE.publicar(glossario)
+    return _STORE.recarregar(forcar=True)
+
+def __getattr__(nome: str):
+    # Compatibilidade: `technical_glossary.TECHNICAL_GLOSSARY` devolve o glossário da versão
+    # atual a cada acesso. Atenção: `from glossary.technical_glossary import TECHNICAL_GLOSSARY`
+    # liga o nome ao snapshot do momento do import, que não acompanha recargas; código que
+    # precisa da versão atual deve usar obter_snapshot().glossario.
+    if nome == "TECHNICAL_GLOSSARY":
+        return _STORE.snapshot().glossario
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 # =============================================================================
 # FUNÇÕES DE EXPANSÃO
@@ -226,49 +93,45 @@ def expandir_termo_ambiguo(termo: str) -> dict:
 
     Returns:
         dict: Dicionário com informações do termo expandido ou None se não encontrado
+            (cópia mutável; o snapshot compartilhado não é exposto)
     """
-    termo_upper = termo.upper()
-    termo_lower = termo.lower()
-
-    # Busca direta no glossário
-    if termo_upper in TECHNICAL_GLOSSARY:
-        return TECHNICAL_GLOSSARY[termo_upper]
-    elif termo_lower in TECHNICAL_GLOSSARY:
-        return TECHNICAL_GLOSSARY[termo_lower]
+    entrada = _consultar_termo(termo)
+    return descongelar(entrada) if entrada is not None else None
 
-    # Busca por variações
-    for key, value in TECHNICAL_GLOSSARY.items():
-        if termo in value.get("variacoes", []):
-            return value
+def _consultar_termo(termo: str) -> Optional[Mapping]:
+    """Entrada imutável do snapshot atual para o termo (uso interno, sem cópia)"""
+    snapshot = obter_snapshot()
 
-    return None
+    # Consulta única no índice reverso (chaves e variações, sem caixa e acentos)
+    chave = snapshot.indice.get(dobrar_texto(termo).strip())
+    if chave is None:
+        return None
+    return snapshot.glossario[chave]
 
 def detectar_termos_ambiguos(texto: str) -> list:
     """
     Detecta termos ambíguos em um texto.
 
+    Usa o matcher compilado: uma única passada sobre o texto, sem diferenciar
+    caixa e acentos, encontrando também termos de várias palavras. Quando termos
+    se sobrepõem, prevalece o mais longo ("Lei 8.112/1990" em vez de "Lei 8.112").
+
     Args:
         texto (str): Texto para análise
 
     Returns:
-        list: Lista de termos ambíguos encontrados
+        list: Lista de termos ambíguos encontrados (como aparecem no texto, sem repetição)
     """
-    termos_encontrados = []
-    palavras = texto.split()
-
-    for palavra in palavras:
-        # Remove pontuação
-        palavra_limpa = palavra.strip(".,;:!?()[]{}")
-
-        # Verifica se é um termo ambíguo
-        if expandir_termo_ambiguo(palavra_limpa):
-            termos_encontrados.append(palavra_limpa)
-
-    return list(set(termos_encontrados))
+    return list(dict.fromkeys(ocorrencia.termo for ocorrencia in obter_matcher().encontrar(texto)))
 
 def expandir_query(query: str) -> str:
     """
-    Expande uma query substituindo termos ambíguos por suas versões completas.
+    Expande uma query acrescentando a versão completa após cada termo ambíguo.
+
+    Reescrita em uma única passada a partir das posições encontradas pelo
+    matcher (respeitando limites de palavra: "ART" dentro de "ARTIGO" não é
+    expandido) e montada com um único join. É idempotente: termos já seguidos
+    da própria expansão, ou escritos por extenso, não são expandidos de novo.
 
     Args:
         query (str): Query original
@@ -276,22 +139,30 @@ def expandir_query(query: str) -> str:
     Returns:
         str: Query expandida
     """
-    query_expandida = query
-
-    # Detecta termos ambíguos
-    termos_ambiguos = detectar_termos_ambiguos(query)
-
-    # Expande cada termo encontrado
-    for termo in termos_ambiguos:
-        expansao = expandir_termo_ambiguo(termo)
-        if expansao:
-            # Substitui o termo pela expansão
-            query_expandida = query_expandida.replace(
-                termo,
-                f"{termo} ({expansao['expansao']})"
-            )
-
-    return query_expandida
+    snapshot = obter_snapshot()
+    partes = []
+    cursor = 0
+
+    for ocorrencia in snapshot.matcher.encontrar(query):
+        if ocorrencia.inicio < cursor:
+            # Dentro de uma expansão já presente no texto
+            continue
+
+        expansao = snapshot.glossario[ocorrencia.chave].get("expansao")
+        partes.append(query[cursor:ocorrencia.fim])
+        cursor = ocorrencia.fim
+        if not expansao:
+            continue
+
+        sufixo = f" ({expansao})"
+        if query.startswith(sufixo, cursor):
+            partes.append(sufixo)
+            cursor += len(sufixo)
+        elif dobrar_texto(ocorrencia.termo) != dobrar_texto(expansao):
+            partes.append(sufixo)
+
+    partes.append(query[cursor:])
+    return "".join(partes)
 
 def obter_contexto_termo(termo: str) -> str:
     """
@@ -303,7 +174,7 @@ def obter_contexto_termo(termo: str) -> str:
     Returns:
         str: Contexto do termo (jurídico, técnico, administrativo, etc.)
     """
-    expansao = expandir_termo_ambiguo(termo)
+    expansao = _consultar_termo(termo)
     if expansao:
         return expansao.get("contexto", "geral")
     return "geral"
@@ -9,6 +9,7 @@ de queries para melhorar a precisão das buscas.
 """
 
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import sys
@@ -16,9 +17,9 @@ import sys
 # Adiciona o diretório src ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from preprocessing.query_preprocessor import QueryPreprocessor
+from preprocessing.query_preprocessor import obter_preprocessor
 from postprocessing.query_postprocessor import QueryPostprocessor
-from glossary.technical_glossary import expandir_termo_ambiguo, detectar_termos_ambiguos
+from glossary.technical_glossary import detectar_termos_ambiguos, obter_snapshot
 
 # =============================================================================
 # CONFIGURAÇÃO DE LOGGING
@@ -39,7 +40,7 @@ class GlossaryIntegration:
     def __init__(self):
         """Inicializa a integração do glossário."""
         self.logger = logging.getLogger(f"{__name__}.GlossaryIntegration")
-        self.preprocessor = QueryPreprocessor()
+        self.preprocessor = obter_preprocessor()
         self.postprocessor = QueryPostprocessor()
         self.logger.info("Inicializando GlossaryIntegration")
 
@@ -205,15 +206,17 @@ class GlossaryIntegration:
         Obtém estatísticas sobre o uso do glossário.
 
         Returns:
-            Dict[str, Any]: Estatísticas do glossário
+            Dict[str, Any]: Estatísticas do glossário (inclui versão e horário
+            de compilação do snapshot em uso)
         """
-        from glossary.technical_glossary import TECHNICAL_GLOSSARY
+        snapshot = obter_snapshot()
+        glossario = snapshot.glossario
 
-        total_termos = len(TECHNICAL_GLOSSARY)
+        total_termos = len(glossario)
 
         # Categoriza termos por contexto
         contextos = {}
-        for termo, info in TECHNICAL_GLOSSARY.items():
+        for termo, info in glossario.items():
             contexto = info.get("contexto", "geral")
             if contexto not in contextos:
                 contextos[contexto] = 0
@@ -222,13 +225,32 @@ class GlossaryIntegration:
         return {
             "total_termos": total_termos,
             "distribuicao_contextos": contextos,
-            "categorias_disponiveis": list(contextos.keys())
+            "categorias_disponiveis": list(contextos.keys()),
+            "snapshot": snapshot.info(),
+            "cache_preprocessamento": self.preprocessor.obter_estatisticas_cache()
         }
 
 # =============================================================================
-# FUNÇÕES DE CONVENIÊNCIA
+# INSTÂNCIA COMPARTILHADA E FUNÇÕES DE CONVENIÊNCIA
 # =============================================================================
 
+_INTEGRACAO: Optional[GlossaryIntegration] = None
+_INTEGRACAO_LOCK = threading.Lock()
+
+def obter_integracao() -> GlossaryIntegration:
+    """
+    Retorna a integração do glossário compartilhada pelo processo.
+
+    Returns:
+        GlossaryIntegration: Instância única
+    """
+    global _INTEGRACAO
+    if _INTEGRACAO is None:
+        with _INTEGRACAO_LOCK:
+            if _INTEGRACAO is None:
+                _INTEGRACAO = GlossaryIntegration()
+    return _INTEGRACAO
+
 def processar_query_simples(query: str) -> Dict[str, Any]:
     """
     Função de conveniência para processar uma query.
@@ -239,8 +261,7 @@ def processar_query_simples(query: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Resultado do processamento
     """
-    integration = GlossaryIntegration()
-    return integration.processar_query_completa(query)
+    return obter_integracao().processar_query_completa(query)
 
 def obter_query_agente_simples(query: str, tipo_agente: str) -> Dict[str, Any]:
     """
@@ -253,8 +274,7 @@ def obter_query_agente_simples(query: str, tipo_agente: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Query processada para o agente
     """
-    integration = GlossaryIntegration()
-    return integration.obter_query_para_agente(query, tipo_agente)
+    return obter_integracao().obter_query_para_agente(query, tipo_agente)
 
 # =============================================================================
 # TESTES DO MÓDULO
@@ -294,5 +314,7 @@ if __name__ == "__main__":
 
     print(f"   Total termos: {estatisticas['total_termos']}")
     print(f"   Distribuição contextos: {estatisticas['distribuicao_contextos']}")
+    print(f"   Versão do glossário: {estatisticas['snapshot']['versao']} "
+          f"(compilado em {estatisticas['snapshot']['compilado_em']})")
 
     print("\n=== FIM DOS TESTES ===")
@@ -6,5 +6,8 @@ Sistema modular para gerenciamento de contexto
 """
 
 from .context_manager import ContextManager
+from .semantic_cache import SemanticAnswerCache
+from .chat_journal import ChatJournal
+from .session_store import SessionBackend, SessionStore, criar_session_store
 
-__all__ = ['ContextManager']
+__all__ = ['ContextManager', 'SemanticAnswerCache', 'ChatJournal', 'SessionBackend', 'SessionStore', 'criar_session_store']
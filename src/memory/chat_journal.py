@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diário do Histórico de Chat
+Append-only em JSONL, com escrita em thread de fundo, compactação por política
+de retenção e leitura paginada (das entradas mais recentes para as mais antigas)
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos (um único worker)
+    fcntl = None
+
+
+class ChatJournal:
+    """
+    Histórico de chat em um arquivo JSONL (uma entrada por linha).
+
+    `append` só enfileira a entrada (O(1), sem I/O na thread que chama); uma
+    thread de fundo grava as entradas em lote no fim do arquivo e, quando a
+    política de retenção é excedida, compacta o arquivo (reescrita atômica com
+    `os.replace`) mantendo as `max_entradas` mais recentes com até `max_dias`.
+
+    Dentro do processo só a thread de fundo escreve. Entre processos (vários
+    workers do uvicorn sobre o mesmo arquivo), gravação e compactação seguram
+    um `fcntl.flock` exclusivo em `<caminho>.lock`: a compactação relê o
+    arquivo com o lock em mãos, então as linhas que outros workers acabaram de
+    acrescentar entram na reescrita em vez de se perderem no `os.replace`.
+    """
+
+    BLOCO_LEITURA = 64 * 1024
+
+    def __init__(self, caminho: str, max_entradas: int = 1000, max_dias: Optional[float] = 30,
+                 intervalo_compactacao: float = 3600.0, caminho_legado: Optional[str] = None):
+        self.caminho = Path(caminho)
+        self.max_entradas = max_entradas
+        self.max_dias = max_dias
+        self.intervalo_compactacao = intervalo_compactacao
+        self.logger = logging.getLogger(f"Memory.{self.__class__.__name__}")
+
+        self._caminho_lock = self.caminho.with_suffix(self.caminho.suffix + '.lock')
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        if caminho_legado and not self.caminho.exists():
+            with self._lock_arquivo():
+                if not self.caminho.exists():
+                    self._migrar_legado(Path(caminho_legado))
+
+        self._linhas = self._contar_linhas()
+        self._tamanho = self._tamanho_arquivo()
+        self._pendentes = 0
+        self._ultima_compactacao = 0.0
+        self._lock = threading.Lock()
+        self._fila: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._escritor, name="chat-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def append(self, entrada: Dict[str, Any]) -> None:
+        """Enfileira uma entrada para gravação (não bloqueia)"""
+        with self._lock:
+            self._pendentes += 1
+        self._fila.put(entrada)
+
+    def total(self) -> int:
+        """Número de entradas (gravadas e pendentes), limitado pela retenção"""
+        with self._lock:
+            return min(self._linhas + self._pendentes, self.max_entradas)
+
+    def ler(self, offset: int = 0, limite: int = 10) -> List[Dict[str, Any]]:
+        """
+        Página do histórico: pula as `offset` entradas mais recentes e retorna
+        as `limite` seguintes, em ordem cronológica. Lê o arquivo de trás para
+        frente, só até completar a página.
+        """
+        pagina = []
+        for indice, entrada in enumerate(self.iterar_recentes()):
+            if indice >= offset + limite or indice >= self.max_entradas:
+                break
+            if indice >= offset:
+                pagina.append(entrada)
+        pagina.reverse()
+        return pagina
+
+    def iterar_recentes(self) -> Iterator[Dict[str, Any]]:
+        """Entradas gravadas, da mais recente para a mais antiga (streaming, em blocos)"""
+        try:
+            f = open(self.caminho, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(0, os.SEEK_END)
+            posicao = f.tell()
+            resto = b''
+            while posicao > 0:
+                tamanho = min(self.BLOCO_LEITURA, posicao)
+                posicao -= tamanho
+                f.seek(posicao)
+                linhas = (f.read(tamanho) + resto).split(b'\n')
+                resto = linhas.pop(0)
+                for linha in reversed(linhas):
+                    entrada = self._decodificar(linha)
+                    if entrada is not None:
+                        yield entrada
+            entrada = self._decodificar(resto)
+            if entrada is not None:
+                yield entrada
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a gravação das entradas enfileiradas; retorna False se o timeout expirar"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._pendentes == 0:
+                    return True
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.005)
+
+    def compactar(self) -> None:
+        """Solicita uma compactação imediata (executada pela thread de fundo)"""
+        self._fila.put({'__compactar__': True})
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e encerra a thread de fundo"""
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    # Thread de fundo
+    # ------------------------------------------------------------------
+
+    def _escritor(self) -> None:
+        while True:
+            lote = [self._fila.get()]
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            encerrar = None in lote
+            forcar = any(entrada and '__compactar__' in entrada for entrada in lote)
+            entradas = [entrada for entrada in lote if entrada and '__compactar__' not in entrada]
+
+            try:
+                if entradas:
+                    self._gravar(entradas)
+                if forcar or self._precisa_compactar():
+                    self._compactar()
+            except Exception as e:
+                self.logger.error(f"Erro ao gravar histórico de chat: {e}")
+            finally:
+                with self._lock:
+                    self._pendentes -= len(entradas)
+
+            if encerrar:
+                return
+
+    @contextmanager
+    def _lock_arquivo(self):
+        """Lock exclusivo entre processos (no arquivo .lock, que o os.replace não troca)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._caminho_lock, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _gravar(self, entradas: List[Dict[str, Any]]) -> None:
+        dados = ''.join(json.dumps(entrada, ensure_ascii=False) + '\n' for entrada in entradas).encode('utf-8')
+        with self._lock_arquivo():
+            # Outro worker gravou ou compactou desde a nossa última escrita: recontar
+            linhas = self._contar_linhas() if self._tamanho_arquivo() != self._tamanho else self._linhas
+            with open(self.caminho, 'ab') as f:
+                f.write(dados)
+                self._tamanho = f.tell()
+        with self._lock:
+            self._linhas = linhas + len(entradas)
+
+    def _precisa_compactar(self) -> bool:
+        # Folga para não reescrever o arquivo a cada entrada depois de atingir o limite
+        if self._linhas > self.max_entradas + max(50, self.max_entradas // 4):
+            return True
+        return bool(self.max_dias) and time.monotonic() - self._ultima_compactacao > self.intervalo_compactacao
+
+    def _compactar(self) -> None:
+        inicio = time.perf_counter()
+        corte = (datetime.now() - timedelta(days=self.max_dias)).isoformat() if self.max_dias else ''
+        mantidas: deque = deque(maxlen=self.max_entradas)
+        total = 0
+
+        with self._lock_arquivo():
+            if self.caminho.exists():
+                with open(self.caminho, 'rb') as f:
+                    for linha in f:
+                        total += 1
+                        entrada = self._decodificar(linha)
+                        if entrada is not None and entrada.get('timestamp', '') >= corte:
+                            mantidas.append(linha.rstrip(b'\n') + b'\n')
+
+            temporario = self.caminho.with_suffix(self.caminho.suffix + '.tmp')
+            with open(temporario, 'wb') as f:
+                f.writelines(mantidas)
+                self._tamanho = f.tell()
+            os.replace(temporario, self.caminho)
+
+        with self._lock:
+            self._linhas = len(mantidas)
+        self._ultima_compactacao = time.monotonic()
+        if total != len(mantidas):
+            self.logger.info(f"Histórico compactado: {total} -> {len(mantidas)} entradas "
+                             f"em {(time.perf_counter() - inicio) * 1000:.1f}ms")
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _decodificar(linha: bytes) -> Optional[Dict[str, Any]]:
+        linha = linha.strip()
+        if not linha:
+            return None
+        try:
+            return json.loads(linha)
+        except ValueError:
+            return None  # linha truncada (ex.: queda durante a escrita)
+
+    def _contar_linhas(self) -> int:
+        if not self.caminho.exists():
+            return 0
+        with open(self.caminho, 'rb') as f:
+            return sum(1 for linha in f if linha.strip())
+
+    def _tamanho_arquivo(self) -> int:
+        try:
+            return self.caminho.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _migrar_legado(self, legado: Path) -> None:
+        """Importa o chat_history.json antigo (lista JSON) para o diário, uma única vez"""
+        try:
+            if not legado.exists():
+                return
+            with open(legado, 'r', encoding='utf-8') as f:
+                entradas = json.load(f)
+            if not isinstance(entradas, list):
+                return
+            with open(self.caminho, 'w', encoding='utf-8') as f:
+                for entrada in entradas:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+            self.logger.info(f"Histórico legado migrado: {len(entradas)} entradas de {legado}")
+        except Exception as e:
+            self.logger.warning(f"Erro ao migrar histórico legado {legado}: {e}")
+
+
+# =============================================================================
+# TESTES DO MÓDULO
+# =============================================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO)
+    print("=== TESTES DO DIÁRIO DE CHAT ===")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        journal = ChatJournal(os.path.join(diretorio, "chat.jsonl"), max_entradas=100)
+
+        inicio = time.perf_counter()
+        for i in range(1000):
+            journal.append({"user": f"pergunta {i}", "assistant": "resposta " * 50,
+                            "timestamp": datetime.now().isoformat()})
+        tempo_append = (time.perf_counter() - inicio) / 1000
+        journal.flush()
+        journal.compactar()
+        journal.flush()
+        time.sleep(0.1)
+
+        pagina = journal.ler(offset=0, limite=3)
+        print(f"✅ append: {tempo_append * 1e6:.1f}µs por entrada")
+        print(f"📊 Total retido: {journal.total()} (máx. {journal.max_entradas})")
+        print(f"📄 Página mais recente: {[e['user'] for e in pagina]}")
+        print(f"📄 Segunda página: {[e['user'] for e in journal.ler(offset=3, limite=3)]}")
+        journal.close()
+
+        # Vários processos (como workers do uvicorn) gravando e compactando o mesmo arquivo
+        import multiprocessing
+
+        def worker(caminho: str, numero: int) -> None:
+            diario = ChatJournal(caminho, max_entradas=10000)
+            for i in range(500):
+                diario.append({"user": f"w{numero}-{i}", "timestamp": datetime.now().isoformat()})
+                if i % 50 == 0:
+                    diario.compactar()
+            diario.close()
+
+        caminho = os.path.join(diretorio, "compartilhado.jsonl")
+        processos = [multiprocessing.Process(target=worker, args=(caminho, n)) for n in range(4)]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join()
+        gravadas = ChatJournal(caminho, max_entradas=10000)
+        total = gravadas.total()
+        gravadas.close()
+        print(f"{'✅' if total == 2000 else '❌'} 4 processos x 500 entradas com compactações: {total} no arquivo")
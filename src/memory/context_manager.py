@@ -7,6 +7,7 @@ Gerencia contexto de conversas de forma independente
 
 import json
 import os
+import time
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -15,13 +16,29 @@ import logging
 
 
 class ContextManager:
-    """Gerenciador de contexto modular e independente"""
+    """
+    Gerenciador de contexto modular e independente.
 
-    def __init__(self, max_interactions: int = 10, memory_file: str = ".cursor/memory/chat_history.json"):
+    A persistência é write-behind: `add_interaction` só altera a memória e
+    marca o estado como sujo; um único flush agendado grava, após
+    `flush_interval` segundos, todas as alterações acumuladas no período.
+    A gravação é atômica (arquivo temporário + `os.replace`) e roda em uma
+    thread de trabalho, fora do event loop. Chame `aclose()` no encerramento
+    para gravar o que estiver pendente.
+    """
+
+    def __init__(self, max_interactions: int = 10, memory_file: str = ".cursor/memory/chat_history.json",
+                 flush_interval: float = 1.0):
         self.max_interactions = max_interactions
         self.memory_file = memory_file
+        self.flush_interval = flush_interval
         self.logger = logging.getLogger(f"Memory.{self.__class__.__name__}")
-        self._lock = asyncio.Lock()
+        self._lock = asyncio.Lock()          # protege _interactions
+        self._write_lock = asyncio.Lock()    # serializa as gravações em disco
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._fechando = asyncio.Event()     # aclose(): antecipa o flush agendado
+        self._stats = {'flushes': 0, 'alteracoes': 0, 'erros': 0, 'tempo_gravacao': 0.0}
 
         # Cria diretório se não existir
         os.makedirs(os.path.dirname(memory_file), exist_ok=True)
@@ -48,22 +65,73 @@ class ContextManager:
         except Exception as e:
             self.logger.warning(f"Erro ao carregar memória: {e}")
 
-    async def _save_memory(self):
-        """Salva memória no arquivo"""
-        try:
+    def _mark_dirty(self):
+        """Marca a memória como alterada e agenda um flush (chamar com _lock adquirido)"""
+        self._dirty = True
+        self._stats['alteracoes'] += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        """
+        Aguarda o intervalo para agrupar alterações em rajada e grava uma única vez.
+        Repete enquanto houver alterações pendentes: o que chegar durante uma
+        gravação (a tarefa ainda não terminou, então `_mark_dirty` não agenda
+        outra) ou uma gravação que falhou é gravado na volta seguinte.
+        """
+        while self._dirty:
+            try:
+                await asyncio.wait_for(self._fechando.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+            if self._fechando.is_set():
+                break
+
+    async def flush(self):
+        """Grava a memória no arquivo se houver alterações pendentes"""
+        async with self._write_lock:
             async with self._lock:
+                if not self._dirty:
+                    return
                 data = {
                     'interactions': list(self._interactions),
                     'last_updated': datetime.now().isoformat(),
                     'max_interactions': self.max_interactions
                 }
+                self._dirty = False
 
-                with open(self.memory_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+            inicio = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write_atomic, data)
+                self._stats['flushes'] += 1
+                self._stats['tempo_gravacao'] += time.perf_counter() - inicio
+                self.logger.debug(f"Memória salva: {len(data['interactions'])} interações")
+            except Exception as e:
+                # Mantém o estado sujo para nova tentativa no próximo flush
+                async with self._lock:
+                    self._dirty = True
+                self._stats['erros'] += 1
+                self.logger.error(f"Erro ao salvar memória: {e}")
 
-                self.logger.debug(f"Memória salva: {len(self._interactions)} interações")
-        except Exception as e:
-            self.logger.error(f"Erro ao salvar memória: {e}")
+    def _write_atomic(self, data: Dict[str, Any]):
+        """Escreve em arquivo temporário e substitui o original (executa em thread)"""
+        tmp_file = f"{self.memory_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.memory_file)
+
+    async def aclose(self):
+        """
+        Grava as alterações pendentes e espera a gravação terminar. O flush
+        agendado não é cancelado (a thread de `asyncio.to_thread` continuaria
+        escrevendo depois do retorno): ele é antecipado e aguardado.
+        """
+        self._fechando.set()
+        task = self._flush_task
+        if task is not None and not task.done():
+            await task
+        await self.flush()
 
     async def add_interaction(self, query: str, response: str, metadata: Optional[Dict] = None):
         """Adiciona nova interação ao contexto"""
@@ -77,7 +145,7 @@ class ContextManager:
                 }
 
                 self._interactions.append(interaction)
-                await self._save_memory()
+                self._mark_dirty()
 
                 self.logger.info(f"Interação adicionada: {query[:50]}...")
         except Exception as e:
@@ -146,7 +214,7 @@ class ContextManager:
         try:
             async with self._lock:
                 self._interactions.clear()
-                await self._save_memory()
+                self._mark_dirty()
                 self.logger.info("Memória limpa")
         except Exception as e:
             self.logger.error(f"Erro ao limpar memória: {e}")
@@ -157,5 +225,107 @@ class ContextManager:
             'total_interactions': len(self._interactions),
             'max_interactions': self.max_interactions,
             'memory_file': self.memory_file,
-            'last_interaction': self._interactions[-1]['timestamp'] if self._interactions else None
+            'last_interaction': self._interactions[-1]['timestamp'] if self._interactions else None,
+            'pending_changes': self._dirty,
+            'persistence': dict(self._stats)
         }
+
+
+# =============================================================================
+# TESTES DO MÓDULO
+# =============================================================================
+
+if __name__ == "__main__":
+    import tempfile
+    import threading
+
+    async def teste_concorrencia():
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = os.path.join(diretorio, "memoria.json")
+            manager = ContextManager(max_interactions=50, memory_file=arquivo, flush_interval=0.05)
+
+            # Rajada de chamadas concorrentes: antes travava no primeiro add_interaction
+            total = 500
+            inicio = time.perf_counter()
+            await asyncio.wait_for(
+                asyncio.gather(*(manager.add_interaction(f"pergunta {i}", "resposta " * 100) for i in range(total))),
+                timeout=5
+            )
+            duracao = time.perf_counter() - inicio
+            print(f"✅ {total} add_interaction concorrentes em {duracao * 1000:.1f}ms "
+                  f"({duracao / total * 1e6:.1f}µs cada)")
+
+            # Segunda rajada intercalada com flushes periódicos
+            for rodada in range(5):
+                await asyncio.gather(*(manager.add_interaction(f"rodada {rodada} #{i}", "r") for i in range(20)))
+                await asyncio.sleep(0.02)
+
+            await manager.aclose()
+            stats = manager.get_memory_stats()
+            print(f"💾 {stats['persistence']['alteracoes']} alterações -> {stats['persistence']['flushes']} gravações "
+                  f"({stats['persistence']['tempo_gravacao'] * 1000:.1f}ms no total)")
+
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            assert len(data['interactions']) == 50
+            assert data['interactions'][-1]['query'] == "rodada 4 #19"
+            assert not os.path.exists(arquivo + ".tmp")
+            print(f"📄 Arquivo consistente: {len(data['interactions'])} interações, última '{data['interactions'][-1]['query']}'")
+
+            recarregado = ContextManager(max_interactions=50, memory_file=arquivo)
+            assert [i['query'] for i in recarregado._interactions] == [i['query'] for i in data['interactions']]
+            print("🔄 Recarga após reinício: OK")
+
+    class ContextManagerLento(ContextManager):
+        """Gravação lenta para abrir a janela entre o snapshot e o fim da escrita"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.gravando = threading.Event()
+
+        def _write_atomic(self, data):
+            self.gravando.set()
+            time.sleep(0.2)
+            super()._write_atomic(data)
+
+    async def teste_alteracao_durante_gravacao():
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = os.path.join(diretorio, "memoria.json")
+            manager = ContextManagerLento(max_interactions=10, memory_file=arquivo, flush_interval=0.05)
+
+            await manager.add_interaction("a", "r")
+            await asyncio.to_thread(manager.gravando.wait, 2)
+            # O flush de "a" está escrevendo: "b" chega com a tarefa de flush ainda viva
+            await manager.add_interaction("b", "r")
+
+            # Sem aclose(): o próprio flush agendado precisa gravar "b"
+            await asyncio.sleep(0.6)
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            assert [i['query'] for i in data['interactions']] == ["a", "b"], data['interactions']
+            assert not manager._dirty
+            print(f"✅ Alteração durante a gravação persistida ({manager._stats['flushes']} gravações)")
+            await manager.aclose()
+
+    async def teste_aclose_durante_gravacao():
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = os.path.join(diretorio, "memoria.json")
+            manager = ContextManagerLento(max_interactions=10, memory_file=arquivo, flush_interval=0.05)
+
+            await manager.add_interaction("a", "r")
+            await asyncio.to_thread(manager.gravando.wait, 2)
+            await manager.add_interaction("b", "r")
+
+            # Encerramento no meio da gravação: aclose() só retorna com tudo no disco
+            inicio = time.perf_counter()
+            await manager.aclose()
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            assert [i['query'] for i in data['interactions']] == ["a", "b"], data['interactions']
+            assert not os.path.exists(arquivo + ".tmp")
+            print(f"✅ aclose() aguardou a gravação em andamento ({(time.perf_counter() - inicio) * 1000:.0f}ms)")
+
+    print("=== TESTES DO CONTEXT MANAGER ===")
+    asyncio.run(teste_concorrencia())
+    asyncio.run(teste_alteracao_durante_gravacao())
+    asyncio.run(teste_aclose_durante_gravacao())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relevância do Contexto da Conversa
+Escolhe quais interações anteriores da sessão entram no prompt pela similaridade
+de cosseno entre embeddings de query, com limiar e orçamento de tokens
+"""
+
+import os
+import sys
+import base64
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from agents.context_builder import estimar_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def codificar_embedding(vetor: Sequence[float]) -> Optional[str]:
+    """
+    Embedding normalizado em float16 e base64: cabe em JSON (memória em processo
+    ou SQLite) com ~2KB para 768 dimensões, sem perda relevante para o cosseno.
+    """
+    if vetor is None or len(vetor) == 0:
+        return None
+    array = np.asarray(vetor, dtype=np.float32)
+    norma = float(np.linalg.norm(array))
+    if norma == 0.0:
+        return None
+    return base64.b64encode((array / norma).astype(np.float16).tobytes()).decode('ascii')
+
+
+def decodificar_embedding(codigo: Optional[str]) -> Optional[np.ndarray]:
+    """Inverso de codificar_embedding (vetor float16 normalizado)"""
+    if not codigo:
+        return None
+    try:
+        return np.frombuffer(base64.b64decode(codigo), dtype=np.float16)
+    except (ValueError, TypeError):
+        return None
+
+
+class ConversationContextFilter:
+    """
+    Seleciona as interações anteriores relevantes para a pergunta atual.
+
+    Cada interação guarda o embedding da sua pergunta (o mesmo já calculado para
+    a busca) e uma estimativa de tokens do trecho que entra no prompt. A seleção
+    é um único produto matriz-vetor: `score = cosseno + bônus de recência`, em
+    que o bônus cresce linearmente até `bonus_recencia` na interação mais
+    recente (follow-ups curtos como "e o prazo?" tendem a se referir à última
+    pergunta). Entram as interações com score >= `threshold`, das mais
+    relevantes para as menos, até `max_interacoes` ou até esgotar
+    `token_budget`; o resultado volta em ordem cronológica. Se nenhuma atinge o
+    limiar (ou a pergunta não tem embedding), entram as `fallback_recentes`
+    interações mais recentes que couberem no orçamento, como no comportamento
+    anterior de manter os últimos turnos.
+
+    Os vetores decodificados ficam em um LRU indexado pelo próprio código
+    base64 (o hash da string é calculado uma vez por objeto), então cada
+    interação é decodificada uma única vez enquanto estiver na sessão.
+    """
+
+    def __init__(self, threshold: float = 0.8, token_budget: int = 300, max_interacoes: int = 3,
+                 bonus_recencia: float = 0.1, max_cache: int = 4096, fallback_recentes: int = 1):
+        self.threshold = threshold
+        self.token_budget = token_budget
+        self.max_interacoes = max_interacoes
+        self.bonus_recencia = bonus_recencia
+        self.max_cache = max_cache
+        self.fallback_recentes = fallback_recentes
+        self._vetores: "OrderedDict[str, Optional[np.ndarray]]" = OrderedDict()
+        self._rampas: Dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def tokens_interacao(pergunta: str, resposta_texto: str) -> int:
+        """Tokens estimados do trecho da interação no prompt"""
+        return estimar_tokens(pergunta) + estimar_tokens(resposta_texto) + 8
+
+    def pontuar(self, query_embedding: Sequence[float], interacoes: List[Dict[str, Any]]) -> np.ndarray:
+        """Scores (cosseno + recência) de cada interação; -inf para as que não têm embedding"""
+        scores = np.full(len(interacoes), -np.inf, dtype=np.float32)
+        if query_embedding is None or len(query_embedding) == 0 or not interacoes:
+            return scores
+        consulta = np.asarray(query_embedding, dtype=np.float32)
+        norma = float(np.sqrt(consulta @ consulta))
+        if norma == 0.0:
+            return scores
+
+        vetores = [self._vetor(interacao.get('embedding')) for interacao in interacoes]
+        validos = [i for i, vetor in enumerate(vetores) if vetor is not None and vetor.shape == consulta.shape]
+        if not validos:
+            return scores
+
+        similaridades = np.stack([vetores[i] for i in validos]) @ consulta / norma
+        scores[validos] = similaridades + self._rampa(len(interacoes))[validos]
+        return scores
+
+    def _vetor(self, codigo: Optional[str]) -> Optional[np.ndarray]:
+        if not codigo:
+            return None
+        vetor = self._vetores.get(codigo)
+        if vetor is not None:
+            self._vetores.move_to_end(codigo)
+        else:
+            vetor = decodificar_embedding(codigo)
+            if vetor is None:
+                return None
+            vetor = vetor.astype(np.float32)
+            self._vetores[codigo] = vetor
+            if len(self._vetores) > self.max_cache:
+                self._vetores.popitem(last=False)
+        return vetor
+
+    def _rampa(self, n: int) -> np.ndarray:
+        """Bônus de recência: 0 na interação mais antiga até bonus_recencia na mais recente"""
+        rampa = self._rampas.get(n)
+        if rampa is None:
+            rampa = self._rampas[n] = np.linspace(0.0, self.bonus_recencia, n, dtype=np.float32)
+        return rampa
+
+    def selecionar(self, query_embedding: Sequence[float],
+                   interacoes: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Retorna (interações selecionadas em ordem cronológica, relatório)"""
+        scores = self.pontuar(query_embedding, interacoes)
+        candidatos = np.flatnonzero(scores >= self.threshold)
+        candidatos = candidatos[np.argsort(-scores[candidatos], kind='stable')]
+
+        escolhidos, restante = self._preencher(interacoes, candidatos, self.max_interacoes)
+        fallback = not escolhidos and self.fallback_recentes > 0
+        if fallback:
+            # Nada relevante o bastante: mantém a(s) interação(ões) mais recente(s)
+            escolhidos, restante = self._preencher(interacoes, range(len(interacoes) - 1, -1, -1),
+                                                   self.fallback_recentes)
+
+        escolhidos.sort()
+        relatorio = {
+            'interacoes': len(interacoes),
+            'candidatas': int(len(candidatos)),
+            'selecionadas': len(escolhidos),
+            'tokens': self.token_budget - restante,
+            'scores': [round(float(scores[i]), 3) for i in escolhidos],
+            'fallback': fallback
+        }
+        return [interacoes[i] for i in escolhidos], relatorio
+
+    def _preencher(self, interacoes: List[Dict[str, Any]], ordem: Sequence[int],
+                   limite: int) -> Tuple[List[int], int]:
+        """Percorre `ordem` escolhendo as interações que cabem no orçamento; retorna (índices, tokens restantes)"""
+        escolhidos: List[int] = []
+        restante = self.token_budget
+        for i in ordem:
+            if len(escolhidos) >= limite:
+                break
+            tokens = interacoes[i].get('tokens') or self.tokens_interacao(interacoes[i].get('pergunta', ''), '')
+            if tokens > restante:
+                continue
+            escolhidos.append(int(i))
+            restante -= tokens
+        return escolhidos, restante
+
+
+# =============================================================================
+# TESTES DO MÓDULO
+# =============================================================================
+
+if __name__ == "__main__":
+    import time
+
+    print("=== TESTES DO FILTRO DE RELEVÂNCIA DO CONTEXTO ===")
+
+    rng = np.random.default_rng(42)
+    dimensao = 768
+    temas = rng.normal(size=(3, dimensao))
+
+    def embedding(tema: int, ruido: float = 0.3) -> List[float]:
+        return (temas[tema] + ruido * rng.normal(size=dimensao)).tolist()
+
+    filtro = ConversationContextFilter()
+    interacoes = []
+    for i, tema in enumerate([0, 1, 2, 1, 0, 2, 2, 1, 0, 2]):
+        pergunta = f"pergunta {i} (tema {tema})"
+        interacoes.append({
+            'pergunta': pergunta,
+            'resposta': "resposta " * 20,
+            'embedding': codificar_embedding(embedding(tema)),
+            'tokens': filtro.tokens_interacao(pergunta, ("resposta " * 20)[:100])
+        })
+
+    selecionadas, relatorio = filtro.selecionar(embedding(1), interacoes)
+    print(f"📄 Tema 1: {[i['pergunta'] for i in selecionadas]} {relatorio['scores']}")
+    assert all("tema 1" in i['pergunta'] for i in selecionadas) and len(selecionadas) == 3
+
+    selecionadas, relatorio = filtro.selecionar(rng.normal(size=dimensao).tolist(), interacoes)
+    print(f"📄 Pergunta sem relação: {[i['pergunta'] for i in selecionadas]} (fallback: {relatorio['fallback']})")
+    assert selecionadas == interacoes[-1:] and relatorio['fallback']
+
+    # Sem embedding da pergunta (falha na API): também mantém a interação mais recente
+    selecionadas, relatorio = filtro.selecionar([], interacoes)
+    assert selecionadas == interacoes[-1:] and relatorio['fallback']
+    print("📄 Pergunta sem embedding: interação mais recente mantida")
+
+    filtro_curto = ConversationContextFilter(token_budget=interacoes[0]['tokens'] * 2)
+    selecionadas, relatorio = filtro_curto.selecionar(embedding(2), interacoes)
+    print(f"📄 Orçamento de {filtro_curto.token_budget} tokens: {relatorio['selecionadas']} interações, "
+          f"{relatorio['tokens']} tokens")
+    assert relatorio['tokens'] <= filtro_curto.token_budget
+
+    # Interações antigas (sem embedding) são ignoradas
+    selecionadas, _ = filtro.selecionar(embedding(0), [{'pergunta': "legado", 'resposta': "r"}] + interacoes)
+    assert all(i['pergunta'] != "legado" for i in selecionadas)
+
+    repeticoes = 10000
+    consulta = embedding(0)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        filtro.selecionar(consulta, interacoes)
+    print(f"⚡ Seleção com {len(interacoes)} interações de {dimensao} dimensões: "
+          f"{(time.perf_counter() - inicio) / repeticoes * 1e6:.1f}µs por requisição")
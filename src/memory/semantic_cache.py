@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache Semântico de Respostas
+Reaproveita sínteses de consultas parafraseadas (similaridade de embedding + mesmos documentos)
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas indexado pelo embedding da consulta.
+
+    Uma consulta é considerada equivalente a uma entrada do cache quando a
+    similaridade de cosseno entre os embeddings é >= `threshold` e os IDs dos
+    `top_docs` primeiros documentos recuperados são os mesmos. Os embeddings
+    normalizados ficam em uma matriz float32 pré-alocada, de modo que a busca
+    é um único produto matriz-vetor. A remoção é por LRU (capacidade) e TTL.
+
+    Com `cache_dir`, `put` só marca o cache como alterado: uma thread de fundo
+    grava a cada `save_interval` segundos se houver alterações, e `close()`
+    (também registrado no atexit) grava o que estiver pendente no encerramento.
+    Vetores e entradas vão juntos em um único `answers.npz`, escrito em um
+    arquivo temporário exclusivo e publicado com `os.replace`.
+    """
+
+    ARQUIVO = 'answers.npz'
+
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 3600, threshold: float = 0.95,
+                 top_docs: int = 3, cache_dir: Optional[str] = None, save_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.top_docs = top_docs
+        self.cache_dir = cache_dir
+        self.save_interval = save_interval
+        self.logger = logging.getLogger(f"Memory.{self.__class__.__name__}")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # serializa as gravações em disco
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), linhas normalizadas
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._last_access = np.zeros(max_entries, dtype=np.float64)
+        self._dirty = False
+
+        self._stats = {
+            'consultas': 0,
+            'hits': 0,
+            'misses': 0,
+            'bypass': 0,
+            'remocoes': 0,
+            'latencia_economizada': 0.0
+        }
+
+        if cache_dir:
+            self._load()
+            self._thread = threading.Thread(target=self._gravador, name="answer-cache-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def lookup(self, embedding: Sequence[float], doc_ids: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """Retorna a entrada equivalente (synthesis + metadados) ou None"""
+        vector = self._normalize(embedding)
+        key_docs = list(doc_ids[:self.top_docs])
+
+        with self._lock:
+            self._stats['consultas'] += 1
+            if vector is None or self._matrix is None or vector.shape[0] != self._matrix.shape[1]:
+                self._stats['misses'] += 1
+                return None
+
+            now = time.time()
+            similarities = self._matrix @ vector
+            candidates = np.flatnonzero(similarities >= self.threshold)
+
+            for row in candidates[np.argsort(-similarities[candidates])]:
+                entry = self._entries[row]
+                if entry is None:
+                    continue
+                if now - entry['created_at'] > self.ttl:
+                    self._remove(row)
+                    continue
+                if entry['doc_ids'] != key_docs:
+                    continue
+
+                self._last_access[row] = now
+                self._stats['hits'] += 1
+                self._stats['latencia_economizada'] += entry['generation_time']
+                return {**entry, 'similarity': float(similarities[row])}
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, embedding: Sequence[float], doc_ids: Sequence[str], query: str, synthesis: str,
+            generation_time: float) -> None:
+        """Armazena a síntese gerada para a consulta"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._matrix.shape[1]:
+                return
+
+            row = self._free_row()
+            self._matrix[row] = vector
+            self._entries[row] = {
+                'query': query,
+                'doc_ids': list(doc_ids[:self.top_docs]),
+                'synthesis': synthesis,
+                'generation_time': generation_time,
+                'created_at': time.time()
+            }
+            self._last_access[row] = time.time()
+            self._dirty = True
+
+    def record_bypass(self) -> None:
+        """Contabiliza uma consulta que ignorou o cache por solicitação"""
+        with self._lock:
+            self._stats['bypass'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna taxa de acerto, latência economizada e ocupação"""
+        with self._lock:
+            consultas = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / consultas if consultas else 0.0,
+                'latencia_economizada': round(self._stats['latencia_economizada'], 3),
+                'entradas': sum(1 for entry in self._entries if entry is not None),
+                'max_entradas': self.max_entries,
+                'threshold': self.threshold
+            }
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._last_access[:] = 0
+            if self._matrix is not None:
+                self._matrix[:] = 0
+            self._dirty = True
+
+    def save(self) -> None:
+        """
+        Persiste o cache em disco se houver alterações. Vetores e entradas vão
+        no mesmo arquivo, escrito em um temporário exclusivo e publicado com
+        `os.replace`; gravações concorrentes são serializadas.
+        """
+        if not self.cache_dir:
+            return
+
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                rows = [i for i, entry in enumerate(self._entries) if entry is not None]
+                matrix = self._matrix[rows].copy() if self._matrix is not None and rows else None
+                entries = [self._entries[i] for i in rows]
+                self._dirty = False
+
+            tmp_path = None
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=f'.{self.ARQUIVO}.', suffix='.tmp', dir=self.cache_dir)
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(
+                        f,
+                        vectors=matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32),
+                        entries=np.frombuffer(json.dumps(entries, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+                    )
+                os.replace(tmp_path, os.path.join(self.cache_dir, self.ARQUIVO))
+                tmp_path = None
+                self.logger.debug(f"Cache semântico salvo: {len(entries)} entradas")
+            except Exception as e:
+                # Mantém o estado sujo para nova tentativa na próxima gravação
+                with self._lock:
+                    self._dirty = True
+                self.logger.error(f"Erro ao salvar cache semântico: {e}")
+            finally:
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def close(self) -> None:
+        """Encerra a thread de gravação e grava as alterações pendentes"""
+        self._parar.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.save()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _gravador(self) -> None:
+        """Thread de fundo: agrupa as alterações e grava no máximo uma vez por intervalo"""
+        while not self._parar.wait(self.save_interval):
+            self.save()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        if embedding is None or len(embedding) == 0:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _free_row(self) -> int:
+        """Primeira linha livre; se cheio, remove a entrada menos recentemente usada"""
+        for row, entry in enumerate(self._entries):
+            if entry is None:
+                return row
+        row = int(np.argmin(self._last_access))
+        self._remove(row)
+        return row
+
+    def _remove(self, row: int) -> None:
+        self._entries[row] = None
+        self._last_access[row] = 0
+        self._matrix[row] = 0
+        self._stats['remocoes'] += 1
+        self._dirty = True
+
+    def _load(self) -> None:
+        """Carrega o cache persistido, descartando entradas expiradas"""
+        path = os.path.join(self.cache_dir, self.ARQUIVO)
+
+        try:
+            if not os.path.exists(path):
+                return
+
+            with np.load(path, allow_pickle=False) as arquivo:
+                matrix = arquivo['vectors']
+                entries = json.loads(arquivo['entries'].tobytes().decode('utf-8'))
+            if not entries:
+                return
+
+            now = time.time()
+            self._matrix = np.zeros((self.max_entries, matrix.shape[1]), dtype=np.float32)
+            row = 0
+            for vector, entry in zip(matrix, entries):
+                if row >= self.max_entries or now - entry['created_at'] > self.ttl:
+                    continue
+                self._matrix[row] = vector
+                self._entries[row] = entry
+                self._last_access[row] = entry['created_at']
+                row += 1
+
+            self.logger.info(f"Cache semântico carregado: {row} entradas")
+        except Exception as e:
+            self.logger.warning(f"Erro ao carregar cache semântico: {e}")
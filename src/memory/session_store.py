@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de Sessões
+Memória de conversa por sessão com limite de sessões (LRU), expiração por
+inatividade (TTL) e contabilidade de memória por sessão.
+
+`SessionBackend` define a interface; `SessionStore` é a implementação em
+processo e `SQLiteSessionStore` (memory.sqlite_session_store) a compartilhada
+entre processos. `criar_session_store()` escolhe pela variável SESSION_BACKEND.
+"""
+
+import os
+import json
+import asyncio
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+
+class _Sessao:
+    """Estado de uma sessão: interações recentes e contabilidade"""
+
+    __slots__ = ('interacoes', 'tamanhos', 'bytes', 'ultimo_acesso', 'ultimo_contexto')
+
+    def __init__(self, max_interacoes: int, agora: float):
+        self.interacoes: deque = deque(maxlen=max_interacoes)
+        self.tamanhos: deque = deque(maxlen=max_interacoes)
+        self.bytes = 0
+        self.ultimo_acesso = agora
+        self.ultimo_contexto = 0.0
+
+
+class SessionBackend:
+    """Interface da memória de conversa por sessão"""
+
+    max_interacoes: int
+
+    # Backends com I/O ou locks entre processos (SQLite) não podem rodar no event loop
+    bloqueante = False
+
+    async def executar(self, metodo: str, *args) -> Any:
+        """
+        Chama uma operação a partir do event loop: em thread de trabalho
+        (asyncio.to_thread) se o backend bloqueia, diretamente se não.
+        """
+        funcao = getattr(self, metodo)
+        if self.bloqueante:
+            return await asyncio.to_thread(funcao, *args)
+        return funcao(*args)
+
+    def adicionar(self, session_id: str, interacao: Dict[str, Any]) -> int:
+        """Adiciona uma interação à sessão (criando-a se preciso); retorna o total de interações"""
+        raise NotImplementedError
+
+    def obter(self, session_id: str) -> List[Dict[str, Any]]:
+        """Interações da sessão em ordem cronológica ([] se não existir ou tiver expirado)"""
+        raise NotImplementedError
+
+    def tamanho(self, session_id: str) -> int:
+        """Número de interações da sessão (0 se não existir)"""
+        raise NotImplementedError
+
+    def ultimo_contexto(self, session_id: str) -> float:
+        """Momento (time.time) da última injeção de contexto na sessão; 0.0 se nunca"""
+        raise NotImplementedError
+
+    def marcar_contexto(self, session_id: str, momento: float) -> None:
+        """Registra a injeção de contexto (ignorado se a sessão não existir)"""
+        raise NotImplementedError
+
+    def limpar(self, session_id: Optional[str] = None) -> int:
+        """Remove uma sessão (ou todas); retorna quantas sessões foram removidas"""
+        raise NotImplementedError
+
+    def resumo(self, limite: int = 10) -> List[Dict[str, Any]]:
+        """Sessões mais recentes com contagem de interações, bytes e tempo ocioso"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do armazenamento e contadores de remoção"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera recursos (conexões, arquivos)"""
+
+    @staticmethod
+    def _estimar_bytes(interacao: Dict[str, Any]) -> int:
+        """Tamanho aproximado da interação (JSON em UTF-8)"""
+        try:
+            return len(json.dumps(interacao, ensure_ascii=False, default=str).encode('utf-8'))
+        except Exception:
+            return len(str(interacao).encode('utf-8'))
+
+
+class SessionStore(SessionBackend):
+    """
+    Memória de conversa por sessão, limitada, no próprio processo.
+
+    As sessões ficam em um OrderedDict ordenado pelo último acesso, de modo que
+    a mais antiga está sempre no início: a expiração por TTL remove do início
+    enquanto as sessões estiverem vencidas e a remoção por capacidade (número
+    de sessões ou bytes totais) remove a menos recentemente usada. Consultas
+    (`obter`, `tamanho`, `ultimo_contexto`) nunca criam sessões; só
+    `adicionar` cria.
+    """
+
+    def __init__(self, max_sessoes: int = 10000, max_interacoes: int = 10, ttl: float = 2 * 3600,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024):
+        self.max_sessoes = max_sessoes
+        self.max_interacoes = max_interacoes
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(f"Memory.{self.__class__.__name__}")
+        self._lock = threading.Lock()
+
+        self._sessoes: "OrderedDict[str, _Sessao]" = OrderedDict()
+        self._bytes_total = 0
+        self._stats = {
+            'criadas': 0,
+            'remocoes_lru': 0,
+            'remocoes_ttl': 0,
+            'remocoes_bytes': 0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def adicionar(self, session_id: str, interacao: Dict[str, Any]) -> int:
+        """Adiciona uma interação à sessão (criando-a se preciso); retorna o total de interações"""
+        tamanho = self._estimar_bytes(interacao)
+        agora = time.monotonic()
+
+        with self._lock:
+            self._expirar(agora)
+            sessao = self._sessoes.get(session_id)
+            if sessao is None:
+                sessao = _Sessao(self.max_interacoes, agora)
+                self._sessoes[session_id] = sessao
+                self._stats['criadas'] += 1
+            else:
+                self._sessoes.move_to_end(session_id)
+                sessao.ultimo_acesso = agora
+
+            if len(sessao.interacoes) == sessao.interacoes.maxlen:
+                removido = sessao.tamanhos[0]
+                sessao.bytes -= removido
+                self._bytes_total -= removido
+            sessao.interacoes.append(interacao)
+            sessao.tamanhos.append(tamanho)
+            sessao.bytes += tamanho
+            self._bytes_total += tamanho
+
+            self._aplicar_limites(session_id)
+            return len(sessao.interacoes)
+
+    def obter(self, session_id: str) -> List[Dict[str, Any]]:
+        """Interações da sessão em ordem cronológica ([] se não existir ou tiver expirado)"""
+        with self._lock:
+            sessao = self._acessar(session_id)
+            return list(sessao.interacoes) if sessao else []
+
+    def tamanho(self, session_id: str) -> int:
+        """Número de interações da sessão (0 se não existir)"""
+        with self._lock:
+            sessao = self._acessar(session_id, tocar=False)
+            return len(sessao.interacoes) if sessao else 0
+
+    def ultimo_contexto(self, session_id: str) -> float:
+        """Momento (time.time) da última injeção de contexto na sessão; 0.0 se nunca"""
+        with self._lock:
+            sessao = self._acessar(session_id, tocar=False)
+            return sessao.ultimo_contexto if sessao else 0.0
+
+    def marcar_contexto(self, session_id: str, momento: float) -> None:
+        """Registra a injeção de contexto (ignorado se a sessão não existir)"""
+        with self._lock:
+            sessao = self._acessar(session_id, tocar=False)
+            if sessao is not None:
+                sessao.ultimo_contexto = momento
+
+    def limpar(self, session_id: Optional[str] = None) -> int:
+        """Remove uma sessão (ou todas); retorna quantas sessões foram removidas"""
+        with self._lock:
+            if session_id is None:
+                removidas = len(self._sessoes)
+                self._sessoes.clear()
+                self._bytes_total = 0
+                return removidas
+            sessao = self._sessoes.pop(session_id, None)
+            if sessao is None:
+                return 0
+            self._bytes_total -= sessao.bytes
+            return 1
+
+    def resumo(self, limite: int = 10) -> List[Dict[str, Any]]:
+        """Sessões mais recentes com contagem de interações, bytes e tempo ocioso"""
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            recentes = list(reversed(self._sessoes.items()))[:limite]
+            return [
+                {
+                    'session_id': session_id,
+                    'interacoes': len(sessao.interacoes),
+                    'memoria_cheia': len(sessao.interacoes) >= self.max_interacoes,
+                    'bytes': sessao.bytes,
+                    'ocioso': round(agora - sessao.ultimo_acesso, 1)
+                }
+                for session_id, sessao in recentes
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do armazenamento e contadores de remoção"""
+        with self._lock:
+            self._expirar(time.monotonic())
+            return {
+                'sessoes': len(self._sessoes),
+                'interacoes': sum(len(sessao.interacoes) for sessao in self._sessoes.values()),
+                'bytes': self._bytes_total,
+                'max_sessoes': self.max_sessoes,
+                'max_interacoes': self.max_interacoes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'backend': 'memory',
+                **self._stats
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessoes)
+
+    # ------------------------------------------------------------------
+    # Auxiliares (chamar com _lock adquirido)
+    # ------------------------------------------------------------------
+
+    def _acessar(self, session_id: str, tocar: bool = True) -> Optional[_Sessao]:
+        sessao = self._sessoes.get(session_id)
+        if sessao is None:
+            return None
+        agora = time.monotonic()
+        if agora - sessao.ultimo_acesso > self.ttl:
+            self._remover(session_id, 'remocoes_ttl')
+            return None
+        if tocar:
+            self._sessoes.move_to_end(session_id)
+            sessao.ultimo_acesso = agora
+        return sessao
+
+    def _expirar(self, agora: float) -> None:
+        # Ordem de último acesso: as sessões vencidas estão todas no início
+        while self._sessoes:
+            session_id, sessao = next(iter(self._sessoes.items()))
+            if agora - sessao.ultimo_acesso <= self.ttl:
+                break
+            self._remover(session_id, 'remocoes_ttl')
+
+    def _aplicar_limites(self, preservar: str) -> None:
+        while len(self._sessoes) > self.max_sessoes:
+            self._remover(next(iter(self._sessoes)), 'remocoes_lru')
+        if self.max_bytes:
+            while self._bytes_total > self.max_bytes and len(self._sessoes) > 1:
+                session_id = next(iter(self._sessoes))
+                if session_id == preservar:
+                    break
+                self._remover(session_id, 'remocoes_bytes')
+
+    def _remover(self, session_id: str, motivo: str) -> None:
+        sessao = self._sessoes.pop(session_id)
+        self._bytes_total -= sessao.bytes
+        self._stats[motivo] += 1
+
+
+def criar_session_store(backend: Optional[str] = None, **kwargs) -> SessionBackend:
+    """
+    Cria o armazenamento de sessões.
+
+    SESSION_BACKEND=memory (padrão): por processo, mais rápido.
+    SESSION_BACKEND=sqlite: arquivo SQLite em modo WAL (SESSION_DB_PATH),
+    compartilhado entre os workers do uvicorn (`--workers N`).
+    """
+    backend = (backend or os.getenv('SESSION_BACKEND', 'memory')).lower()
+    caminho = kwargs.pop('caminho', None) or os.getenv('SESSION_DB_PATH', '.cursor/memory/sessions.db')
+    if backend == 'sqlite':
+        from memory.sqlite_session_store import SQLiteSessionStore
+        return SQLiteSessionStore(caminho, **kwargs)
+    if backend != 'memory':
+        logging.getLogger("Memory.SessionStore").warning(
+            f"SESSION_BACKEND '{backend}' desconhecido; usando armazenamento em memória")
+    return SessionStore(**kwargs)
+
+
+# =============================================================================
+# TESTES DO MÓDULO
+# =============================================================================
+
+if __name__ == "__main__":
+    import uuid
+    import tracemalloc
+
+    print("=== TESTES DO ARMAZENAMENTO DE SESSÕES ===")
+
+    store = SessionStore(max_sessoes=1000, max_interacoes=10, ttl=0.2, max_bytes=4 * 1024 * 1024)
+
+    # Consultas não criam sessões
+    for _ in range(10000):
+        store.obter(str(uuid.uuid4()))
+    assert len(store) == 0
+    print("✅ 10000 consultas com session_id aleatório: 0 sessões criadas")
+
+    # Sessões novas a cada requisição: o armazenamento permanece limitado
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    for i in range(50000):
+        store.adicionar(str(uuid.uuid4()), {'pergunta': f"pergunta {i}", 'resposta': "resposta " * 40,
+                                            'timestamp': time.time()})
+    duracao = time.perf_counter() - inicio
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = store.get_stats()
+    print(f"✅ 50000 sessões novas em {duracao:.2f}s ({duracao / 50000 * 1e6:.1f}µs cada)")
+    print(f"📊 Sessões retidas: {stats['sessoes']} (máx. {stats['max_sessoes']}), "
+          f"{stats['bytes'] / 1024:.0f} KiB contabilizados, {atual / 1024 / 1024:.1f} MiB alocados")
+    print(f"🗑️ Remoções: LRU {stats['remocoes_lru']}, TTL {stats['remocoes_ttl']}, bytes {stats['remocoes_bytes']}")
+    assert stats['sessoes'] <= 1000
+
+    # Janela de interações e contabilidade por sessão
+    for i in range(25):
+        store.adicionar("sessao-fixa", {'pergunta': f"p{i}", 'resposta': "r"})
+    assert store.tamanho("sessao-fixa") == 10
+    assert store.obter("sessao-fixa")[0]['pergunta'] == "p15"
+    print(f"📄 Sessão fixa: {store.resumo(1)[0]}")
+
+    # Expiração por inatividade
+    time.sleep(0.25)
+    assert store.obter("sessao-fixa") == []
+    stats = store.get_stats()
+    assert stats['sessoes'] == 0 and stats['bytes'] == 0
+    print(f"⏱️ Após o TTL: {stats['sessoes']} sessões, {stats['remocoes_ttl']} expiradas")
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de Sessões em SQLite
+Memória de conversa compartilhada entre processos (workers do uvicorn) em um
+arquivo SQLite em modo WAL, com cache de leitura por processo
+"""
+
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Adiciona o diretório src ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from memory.session_store import SessionBackend
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    session_id      TEXT PRIMARY KEY,
+    ultimo_acesso   REAL NOT NULL,
+    ultimo_contexto REAL NOT NULL DEFAULT 0,
+    bytes           INTEGER NOT NULL DEFAULT 0,
+    interacoes      INTEGER NOT NULL DEFAULT 0,
+    versao          INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessoes_acesso ON sessoes (ultimo_acesso);
+CREATE TABLE IF NOT EXISTS interacoes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessoes (session_id) ON DELETE CASCADE,
+    dados      BLOB NOT NULL,
+    bytes      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interacoes_sessao ON interacoes (session_id, id);
+CREATE TABLE IF NOT EXISTS contadores (
+    nome  TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    Memória de conversa por sessão em um arquivo SQLite compartilhado.
+
+    O modo WAL permite leituras concorrentes com um escritor, então vários
+    processos (`uvicorn --workers N`) usam o mesmo arquivo e enxergam a mesma
+    conversa. As interações são gravadas em JSON compacto, comprimido com zlib
+    acima de `LIMITE_COMPRESSAO` bytes. A versão da sessão é o id (AUTOINCREMENT,
+    nunca reutilizado) da última interação gravada: `obter` lê só a linha da
+    sessão e reaproveita as interações do cache local quando a versão não mudou
+    (read-through), mesmo que a sessão tenha sido removida e recriada.
+
+    Os limites são os mesmos do SessionStore (TTL de inatividade, número
+    máximo de sessões por LRU e orçamento de bytes), aplicados por qualquer
+    processo a cada `intervalo_limpeza` segundos. Como vários processos
+    compartilham o arquivo, os tempos usam o relógio de parede (time.time).
+    Leituras não renovam o TTL; só `adicionar` renova.
+    """
+
+    LIMITE_COMPRESSAO = 512
+    bloqueante = True   # BEGIN IMMEDIATE espera até `timeout` pelo lock de escrita de outro processo
+
+    def __init__(self, caminho: str, max_sessoes: int = 10000, max_interacoes: int = 10,
+                 ttl: float = 2 * 3600, max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 max_cache: int = 1024, intervalo_limpeza: float = 1.0):
+        self.caminho = str(caminho)
+        self.max_sessoes = max_sessoes
+        self.max_interacoes = max_interacoes
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_cache = max_cache
+        self.intervalo_limpeza = intervalo_limpeza
+        self.logger = logging.getLogger(f"Memory.{self.__class__.__name__}")
+
+        self._local = threading.local()
+        self._conexoes: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._ultima_limpeza = 0.0
+        self._stats_cache = {'cache_hits': 0, 'cache_misses': 0}
+
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        with self._conexao() as conexao:
+            conexao.executescript(_ESQUEMA)
+        self.logger.info(f"SQLiteSessionStore em {self.caminho} (WAL)")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def adicionar(self, session_id: str, interacao: Dict[str, Any]) -> int:
+        """Adiciona uma interação à sessão (criando-a se preciso); retorna o total de interações"""
+        dados = self._serializar(interacao)
+        tamanho = self._estimar_bytes(interacao)
+        agora = time.time()
+        conexao = self._conexao()
+
+        with self._transacao(conexao):
+            linha = conexao.execute(
+                "SELECT ultimo_acesso FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+            if linha is None or agora - linha[0] > self.ttl:
+                if linha is not None:
+                    conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+                    self._incrementar(conexao, 'remocoes_ttl')
+                conexao.execute("INSERT INTO sessoes (session_id, ultimo_acesso) VALUES (?, ?)",
+                                (session_id, agora))
+                self._incrementar(conexao, 'criadas')
+
+            versao = conexao.execute("INSERT INTO interacoes (session_id, dados, bytes) VALUES (?, ?, ?)",
+                                     (session_id, dados, tamanho)).lastrowid
+            # Janela deslizante: mantém só as max_interacoes mais recentes
+            conexao.execute(
+                "DELETE FROM interacoes WHERE session_id = ? AND id <= "
+                "(SELECT id FROM interacoes WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.max_interacoes))
+            conexao.execute(
+                "UPDATE sessoes SET ultimo_acesso = ?, versao = ?, "
+                "bytes = (SELECT COALESCE(SUM(bytes), 0) FROM interacoes WHERE session_id = ?), "
+                "interacoes = (SELECT COUNT(*) FROM interacoes WHERE session_id = ?) "
+                "WHERE session_id = ?",
+                (agora, versao, session_id, session_id, session_id))
+            total = conexao.execute(
+                "SELECT interacoes FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+            if agora - self._ultima_limpeza >= self.intervalo_limpeza:
+                self._ultima_limpeza = agora
+                self._aplicar_limites(conexao, agora, session_id)
+        return total
+
+    def obter(self, session_id: str) -> List[Dict[str, Any]]:
+        """Interações da sessão em ordem cronológica ([] se não existir ou tiver expirado)"""
+        conexao = self._conexao()
+        linha = conexao.execute(
+            "SELECT versao, ultimo_acesso FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+        if linha is None or time.time() - linha[1] > self.ttl:
+            return []
+
+        versao = linha[0]
+        with self._lock:
+            em_cache = self._cache.get(session_id)
+            if em_cache is not None and em_cache[0] == versao:
+                self._cache.move_to_end(session_id)
+                self._stats_cache['cache_hits'] += 1
+                return list(em_cache[1])
+            self._stats_cache['cache_misses'] += 1
+
+        # Lê a versão e as interações no mesmo snapshot do WAL
+        with self._transacao(conexao, imediata=False):
+            linha = conexao.execute(
+                "SELECT versao FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+            if linha is None:
+                return []
+            versao = linha[0]
+            interacoes = [self._desserializar(dados) for (dados,) in conexao.execute(
+                "SELECT dados FROM interacoes WHERE session_id = ? ORDER BY id", (session_id,))]
+
+        with self._lock:
+            self._cache[session_id] = (versao, interacoes)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return list(interacoes)
+
+    def tamanho(self, session_id: str) -> int:
+        """Número de interações da sessão (0 se não existir)"""
+        linha = self._conexao().execute(
+            "SELECT interacoes, ultimo_acesso FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+        if linha is None or time.time() - linha[1] > self.ttl:
+            return 0
+        return linha[0]
+
+    def ultimo_contexto(self, session_id: str) -> float:
+        """Momento (time.time) da última injeção de contexto na sessão; 0.0 se nunca"""
+        linha = self._conexao().execute(
+            "SELECT ultimo_contexto FROM sessoes WHERE session_id = ?", (session_id,)).fetchone()
+        return linha[0] if linha else 0.0
+
+    def marcar_contexto(self, session_id: str, momento: float) -> None:
+        """Registra a injeção de contexto (ignorado se a sessão não existir)"""
+        conexao = self._conexao()
+        with self._transacao(conexao):
+            conexao.execute("UPDATE sessoes SET ultimo_contexto = ? WHERE session_id = ?", (momento, session_id))
+
+    def limpar(self, session_id: Optional[str] = None) -> int:
+        """Remove uma sessão (ou todas); retorna quantas sessões foram removidas"""
+        conexao = self._conexao()
+        with self._transacao(conexao):
+            if session_id is None:
+                removidas = conexao.execute("DELETE FROM sessoes").rowcount
+            else:
+                removidas = conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,)).rowcount
+        with self._lock:
+            if session_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(session_id, None)
+        return removidas
+
+    def resumo(self, limite: int = 10) -> List[Dict[str, Any]]:
+        """Sessões mais recentes com contagem de interações, bytes e tempo ocioso"""
+        agora = time.time()
+        linhas = self._conexao().execute(
+            "SELECT session_id, interacoes, bytes, ultimo_acesso FROM sessoes "
+            "WHERE ultimo_acesso >= ? ORDER BY ultimo_acesso DESC LIMIT ?",
+            (agora - self.ttl, limite)).fetchall()
+        return [
+            {
+                'session_id': session_id,
+                'interacoes': interacoes,
+                'memoria_cheia': interacoes >= self.max_interacoes,
+                'bytes': tamanho,
+                'ocioso': round(agora - ultimo_acesso, 1)
+            }
+            for session_id, interacoes, tamanho, ultimo_acesso in linhas
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do armazenamento e contadores de remoção (compartilhados entre processos)"""
+        conexao = self._conexao()
+        corte = time.time() - self.ttl
+        sessoes, interacoes, tamanho = conexao.execute(
+            "SELECT COUNT(*), COALESCE(SUM(interacoes), 0), COALESCE(SUM(bytes), 0) "
+            "FROM sessoes WHERE ultimo_acesso >= ?", (corte,)).fetchone()
+        contadores = dict(conexao.execute("SELECT nome, valor FROM contadores").fetchall())
+        with self._lock:
+            cache = dict(self._stats_cache, cache_sessoes=len(self._cache))
+        return {
+            'sessoes': sessoes,
+            'interacoes': interacoes,
+            'bytes': tamanho,
+            'max_sessoes': self.max_sessoes,
+            'max_interacoes': self.max_interacoes,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'backend': 'sqlite',
+            'caminho': self.caminho,
+            'criadas': contadores.get('criadas', 0),
+            'remocoes_lru': contadores.get('remocoes_lru', 0),
+            'remocoes_ttl': contadores.get('remocoes_ttl', 0),
+            'remocoes_bytes': contadores.get('remocoes_bytes', 0),
+            **cache
+        }
+
+    def __len__(self) -> int:
+        return self._conexao().execute(
+            "SELECT COUNT(*) FROM sessoes WHERE ultimo_acesso >= ?", (time.time() - self.ttl,)).fetchone()[0]
+
+    def close(self) -> None:
+        """Fecha as conexões abertas por este processo"""
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conexao in conexoes:
+            try:
+                conexao.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def _conexao(self) -> sqlite3.Connection:
+        """
+        Conexão da thread atual (sqlite3 não compartilha conexões entre threads).
+        check_same_thread=False só para que close() possa fechar as conexões das
+        threads de trabalho (asyncio.to_thread); cada conexão é usada por uma thread.
+        """
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute("PRAGMA foreign_keys=ON")
+            self._local.conexao = conexao
+            with self._lock:
+                self._conexoes.append(conexao)
+        return conexao
+
+    class _transacao:
+        """BEGIN IMMEDIATE (escrita) ou BEGIN (leitura consistente) ... COMMIT/ROLLBACK"""
+
+        def __init__(self, conexao: sqlite3.Connection, imediata: bool = True):
+            self.conexao = conexao
+            self.imediata = imediata
+
+        def __enter__(self):
+            self.conexao.execute("BEGIN IMMEDIATE" if self.imediata else "BEGIN")
+            return self.conexao
+
+        def __exit__(self, tipo, valor, traceback):
+            self.conexao.execute("ROLLBACK" if tipo else "COMMIT")
+            return False
+
+    def _aplicar_limites(self, conexao: sqlite3.Connection, agora: float, preservar: str) -> None:
+        """TTL, número máximo de sessões (LRU) e orçamento de bytes (dentro da transação)"""
+        expiradas = conexao.execute("DELETE FROM sessoes WHERE ultimo_acesso < ?", (agora - self.ttl,)).rowcount
+        self._incrementar(conexao, 'remocoes_ttl', expiradas)
+
+        excedentes = conexao.execute("SELECT COUNT(*) FROM sessoes").fetchone()[0] - self.max_sessoes
+        if excedentes > 0:
+            removidas = conexao.execute(
+                "DELETE FROM sessoes WHERE session_id IN "
+                "(SELECT session_id FROM sessoes WHERE session_id != ? ORDER BY ultimo_acesso LIMIT ?)",
+                (preservar, excedentes)).rowcount
+            self._incrementar(conexao, 'remocoes_lru', removidas)
+
+        if self.max_bytes:
+            total = conexao.execute("SELECT COALESCE(SUM(bytes), 0) FROM sessoes").fetchone()[0]
+            removidas = 0
+            if total > self.max_bytes:
+                for session_id, tamanho in conexao.execute(
+                        "SELECT session_id, bytes FROM sessoes WHERE session_id != ? ORDER BY ultimo_acesso",
+                        (preservar,)).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+                    total -= tamanho
+                    removidas += 1
+            self._incrementar(conexao, 'remocoes_bytes', removidas)
+
+    @staticmethod
+    def _incrementar(conexao: sqlite3.Connection, nome: str, valor: int = 1) -> None:
+        if valor:
+            conexao.execute(
+                "INSERT INTO contadores (nome, valor) VALUES (?, ?) "
+                "ON CONFLICT (nome) DO UPDATE SET valor = valor + excluded.valor", (nome, valor))
+
+    def _serializar(self, interacao: Dict[str, Any]) -> bytes:
+        dados = json.dumps(interacao, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        if len(dados) > self.LIMITE_COMPRESSAO:
+            return b'z' + zlib.compress(dados, 1)
+        return b'j' + dados
+
+    @staticmethod
+    def _desserializar(dados: bytes) -> Dict[str, Any]:
+        if dados[:1] == b'z':
+            return json.loads(zlib.decompress(dados[1:]))
+        return json.loads(dados[1:])
+
+
+# =============================================================================
+# TESTES DO MÓDULO
+# =============================================================================
+
+def _worker_teste(caminho: str, indice: int, total: int) -> None:
+    """Processo de teste: alterna escritas na sessão compartilhada e leituras"""
+    store = SQLiteSessionStore(caminho, max_interacoes=1000)
+    for i in range(total):
+        store.adicionar("compartilhada", {'pergunta': f"worker {indice} #{i}", 'resposta': "r" * 2000})
+        store.obter("compartilhada")
+    store.close()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import multiprocessing
+
+    print("=== TESTES DO ARMAZENAMENTO DE SESSÕES EM SQLITE ===")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "sessoes.db")
+
+        # Vários processos escrevendo a mesma sessão: nenhuma interação se perde
+        processos, por_processo = 4, 50
+        inicio = time.perf_counter()
+        workers = [multiprocessing.Process(target=_worker_teste, args=(caminho, i, por_processo))
+                   for i in range(processos)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duracao = time.perf_counter() - inicio
+
+        store = SQLiteSessionStore(caminho, max_interacoes=1000)
+        interacoes = store.obter("compartilhada")
+        assert len(interacoes) == processos * por_processo, len(interacoes)
+        print(f"✅ {processos} processos x {por_processo} interações: {len(interacoes)} visíveis "
+              f"em todos ({duracao:.2f}s, {os.path.getsize(caminho) / 1024:.0f} KiB em disco)")
+
+        # Leitura com cache: só a linha da sessão é consultada quando a versão não mudou
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            store.obter("compartilhada")
+        print(f"⚡ obter com cache: {(time.perf_counter() - inicio) * 1000:.3f}µs por leitura "
+              f"({store.get_stats()['cache_hits']} hits)")
+
+        # Sessão removida e recriada não reaproveita o cache antigo
+        store.limpar("compartilhada")
+        store.adicionar("compartilhada", {'pergunta': "recriada", 'resposta': "r"})
+        assert [i['pergunta'] for i in store.obter("compartilhada")] == ["recriada"]
+
+        # Limites: janela, LRU e TTL
+        store = SQLiteSessionStore(caminho, max_sessoes=50, max_interacoes=10, ttl=0.5, intervalo_limpeza=0)
+        for i in range(25):
+            store.adicionar("janela", {'pergunta': f"p{i}", 'resposta': "r"})
+        assert store.tamanho("janela") == 10 and store.obter("janela")[0]['pergunta'] == "p15"
+        assert store.obter("inexistente") == [] and store.tamanho("inexistente") == 0
+
+        for i in range(200):
+            store.adicionar(f"sessao-{i}", {'pergunta': "p", 'resposta': "r"})
+        stats = store.get_stats()
+        assert stats['sessoes'] <= 50
+        print(f"📊 Sessões: {stats['sessoes']} (máx. {stats['max_sessoes']}), "
+              f"remoções LRU {stats['remocoes_lru']}, TTL {stats['remocoes_ttl']}")
+
+        time.sleep(0.6)
+        store.adicionar("nova", {'pergunta': "p", 'resposta': "r"})
+        stats = store.get_stats()
+        assert stats['sessoes'] == 1
+        print(f"⏱️ Após o TTL: {stats['sessoes']} sessão, {stats['remocoes_ttl']} expiradas")
+        store.close()
@@ -8,15 +8,18 @@ expansão de termos resolveu problemas de homonímia e se os resultados
 são relevantes.
 """
 
+import re
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Sequence
 from pathlib import Path
 import sys
 
+import numpy as np
+
 # Adiciona o diretório src ao path para importar o glossário
 sys.path.append(str(Path(__file__).parent.parent))
 
-from glossary.technical_glossary import expandir_termo_ambiguo, obter_contexto_termo
+from glossary.technical_glossary import obter_contexto_termo
 
 # =============================================================================
 # CONFIGURAÇÃO DE LOGGING
@@ -24,6 +27,50 @@ from glossary.technical_glossary import expandir_termo_ambiguo, obter_contexto_t
 
 logger = logging.getLogger(__name__)
 
+# =============================================================================
+# CATEGORIAS E FAIXAS DE RELEVÂNCIA
+# =============================================================================
+
+# Palavras-chave por contexto, em ordem de prioridade (a primeira categoria
+# presente no conteúdo define o contexto do resultado)
+PALAVRAS_CONTEXTO: Dict[str, Tuple[str, ...]] = {
+    "jurídico": ("jurídico", "legal", "processo", "decisão"),
+    "técnico": ("técnico", "engenharia", "projeto", "obra"),
+    "administrativo": ("administrativo", "servidor", "cargo", "funcionário"),
+}
+CONTEXTOS = tuple(PALAVRAS_CONTEXTO)
+
+# Limites das faixas de score: [0, 0.5) irrelevante, [0.5, 0.7) parcial, [0.7, ...) relevante
+FAIXAS_RELEVANCIA = np.array([0.5, 0.7])
+
+
+class _MatcherContexto:
+    """
+    Classificador de contexto: todas as palavras-chave compiladas em uma única
+    expressão regular ancorada, com uma alternativa `(?=.*?(palavras))` por
+    categoria, na ordem de prioridade.
+
+    Mantém a semântica da verificação anterior (`palavra in conteudo.lower()`,
+    sem limite de palavra, a primeira categoria presente vence): o motor de
+    expressões regulares tenta as alternativas em ordem, então um único
+    `match` resolve a prioridade, e o grupo capturado indica a categoria.
+    """
+
+    def __init__(self, palavras: Dict[str, Tuple[str, ...]]):
+        alternativas = (
+            "(?=.*?(" + "|".join(re.escape(p.lower()) for p in sorted(termos, key=len, reverse=True)) + "))"
+            for termos in palavras.values()
+        )
+        self._padrao = re.compile("(?s)" + "|".join(alternativas))
+
+    def categoria(self, conteudo: str) -> int:
+        """Índice da categoria de maior prioridade presente no conteúdo (-1 se nenhuma)"""
+        ocorrencia = self._padrao.match(conteudo.lower())
+        return -1 if ocorrencia is None else ocorrencia.lastindex - 1
+
+
+_MATCHER_CONTEXTO = _MatcherContexto(PALAVRAS_CONTEXTO)
+
 # =============================================================================
 # CLASSE PRINCIPAL DO PÓS-PROCESSAMENTO
 # =============================================================================
@@ -53,36 +100,67 @@ class QueryPostprocessor:
             resultados_busca (List[Dict[str, Any]]): Resultados da busca no banco
             termos_ambiguos_detectados (List[str]): Termos ambíguos detectados
 
+        Returns:
+            Dict[str, Any]: Análise dos resultados
+        """
+        scores = np.fromiter((resultado.get('score', 0.0) for resultado in resultados_busca),
+                             dtype=np.float64, count=len(resultados_busca))
+        conteudos = [resultado.get('content', '') for resultado in resultados_busca]
+        return self.analisar_resultados_colunar(
+            query_original, query_expandida, scores, conteudos, termos_ambiguos_detectados
+        )
+
+    def analisar_resultados_colunar(self,
+                                    query_original: str,
+                                    query_expandida: str,
+                                    scores: np.ndarray,
+                                    conteudos: Sequence[str],
+                                    termos_ambiguos_detectados: List[str]) -> Dict[str, Any]:
+        """
+        Mesma análise de `analisar_resultados`, com os resultados em colunas.
+
+        As faixas de relevância saem de um único `np.digitize` + `np.bincount`
+        sobre os scores, e o contexto de cada conteúdo de uma varredura com o
+        classificador pré-compilado. Indicado para lotes grandes
+        (avaliações offline).
+
+        Args:
+            query_original (str): Query original do usuário
+            query_expandida (str): Query expandida pelo pré-processamento
+            scores (np.ndarray): Score de cada resultado
+            conteudos (Sequence[str]): Conteúdo de cada resultado (mesma ordem)
+            termos_ambiguos_detectados (List[str]): Termos ambíguos detectados
+
         Returns:
             Dict[str, Any]: Análise dos resultados
         """
         self.logger.info(f"Analisando resultados para query: {query_original}")
+        scores = np.asarray(scores, dtype=np.float64)
+        total_resultados = len(scores)
 
         # Analisa relevância dos resultados
-        relevancia = self._analisar_relevancia_resultados(
-            query_original, query_expandida, resultados_busca
-        )
+        relevancia = self._analisar_relevancia_resultados(scores)
 
         # Detecta se problemas de homonímia foram resolvidos
         homonímia_resolvida = self._verificar_homonímia_resolvida(
-            query_original, query_expandida, resultados_busca, termos_ambiguos_detectados
+            query_original, query_expandida, conteudos, termos_ambiguos_detectados
         )
 
         # Sugere refinamentos se necessário
         sugestoes_refinamento = self._sugerir_refinamentos(
-            query_original, resultados_busca, relevancia, homonímia_resolvida
+            query_original, total_resultados, relevancia, homonímia_resolvida
         )
 
         # Calcula métricas de qualidade
         metricas_qualidade = self._calcular_metricas_qualidade(
-            resultados_busca, relevancia, homonímia_resolvida
+            total_resultados, relevancia, homonímia_resolvida
         )
 
         resultado = {
             "query_original": query_original,
             "query_expandida": query_expandida,
             "termos_ambiguos_detectados": termos_ambiguos_detectados,
-            "total_resultados": len(resultados_busca),
+            "total_resultados": total_resultados,
             "relevancia_resultados": relevancia,
             "homonímia_resolvida": homonímia_resolvida,
             "sugestoes_refinamento": sugestoes_refinamento,
@@ -90,25 +168,20 @@ class QueryPostprocessor:
             "posprocessamento_realizado": True
         }
 
-        self.logger.info(f"Pós-processamento concluído: {len(resultados_busca)} resultados analisados")
+        self.logger.info(f"Pós-processamento concluído: {total_resultados} resultados analisados")
         return resultado
 
-    def _analisar_relevancia_resultados(self,
-                                      query_original: str,
-                                      query_expandida: str,
-                                      resultados_busca: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analisar_relevancia_resultados(self, scores: np.ndarray) -> Dict[str, Any]:
         """
         Analisa a relevância dos resultados encontrados.
 
         Args:
-            query_original (str): Query original
-            query_expandida (str): Query expandida
-            resultados_busca (List[Dict[str, Any]]): Resultados da busca
+            scores (np.ndarray): Scores dos resultados
 
         Returns:
             Dict[str, Any]: Análise de relevância
         """
-        if not resultados_busca:
+        if not len(scores):
             return {
                 "relevancia_geral": "baixa",
                 "resultados_relevantes": 0,
@@ -117,19 +190,16 @@ class QueryPostprocessor:
                 "score_medio": 0.0
             }
 
-        # Analisa scores dos resultados
-        scores = [resultado.get('score', 0.0) for resultado in resultados_busca]
-        score_medio = sum(scores) / len(scores) if scores else 0.0
-
-        # Classifica relevância baseado em scores
-        resultados_relevantes = len([s for s in scores if s >= 0.7])
-        resultados_parcialmente_relevantes = len([s for s in scores if 0.5 <= s < 0.7])
-        resultados_irrelevantes = len([s for s in scores if s < 0.5])
+        # Classifica relevância baseado em scores (uma passada: faixa de cada score e contagem por faixa)
+        score_medio = float(scores.mean())
+        resultados_irrelevantes, resultados_parcialmente_relevantes, resultados_relevantes = (
+            int(contagem) for contagem in np.bincount(np.digitize(scores, FAIXAS_RELEVANCIA), minlength=3)
+        )
 
         # Determina relevância geral
-        if resultados_relevantes > len(resultados_busca) * 0.6:
+        if resultados_relevantes > len(scores) * 0.6:
             relevancia_geral = "alta"
-        elif resultados_relevantes > len(resultados_busca) * 0.3:
+        elif resultados_relevantes > len(scores) * 0.3:
             relevancia_geral = "média"
         else:
             relevancia_geral = "baixa"
@@ -145,7 +215,7 @@ class QueryPostprocessor:
     def _verificar_homonímia_resolvida(self,
                                       query_original: str,
                                       query_expandida: str,
-                                      resultados_busca: List[Dict[str, Any]],
+                                      conteudos: Sequence[str],
                                       termos_ambiguos_detectados: List[str]) -> Dict[str, Any]:
         """
         Verifica se problemas de homonímia foram resolvidos.
@@ -153,7 +223,7 @@ class QueryPostprocessor:
         Args:
             query_original (str): Query original
             query_expandida (str): Query expandida
-            resultados_busca (List[Dict[str, Any]]): Resultados da busca
+            conteudos (Sequence[str]): Conteúdo dos resultados da busca
             termos_ambiguos_detectados (List[str]): Termos ambíguos detectados
 
         Returns:
@@ -170,22 +240,14 @@ class QueryPostprocessor:
         # Verifica se a query foi expandida
         query_foi_expandida = query_original != query_expandida
 
-        # Analisa contexto dos resultados
-        contextos_resultados = []
-        for resultado in resultados_busca:
-            conteudo = resultado.get('content', '').lower()
-
-            # Identifica contexto baseado no conteúdo
-            if any(termo in conteudo for termo in ["jurídico", "legal", "processo", "decisão"]):
-                contextos_resultados.append("jurídico")
-            elif any(termo in conteudo for termo in ["técnico", "engenharia", "projeto", "obra"]):
-                contextos_resultados.append("técnico")
-            elif any(termo in conteudo for termo in ["administrativo", "servidor", "cargo", "funcionário"]):
-                contextos_resultados.append("administrativo")
-
-        # Determina contexto predominante
-        if contextos_resultados:
-            contexto_predominante = max(set(contextos_resultados), key=contextos_resultados.count)
+        # Analisa contexto dos resultados (uma varredura por conteúdo com o matcher pré-compilado)
+        categorias = np.fromiter((_MATCHER_CONTEXTO.categoria(conteudo or '') for conteudo in conteudos),
+                                 dtype=np.int64, count=len(conteudos))
+        contagens = np.bincount(categorias[categorias >= 0], minlength=len(CONTEXTOS))
+
+        # Determina contexto predominante (empates resolvidos pela ordem de prioridade)
+        if contagens.any():
+            contexto_predominante = CONTEXTOS[int(contagens.argmax())]
         else:
             contexto_predominante = "geral"
 
@@ -212,7 +274,7 @@ class QueryPostprocessor:
 
     def _sugerir_refinamentos(self,
                               query_original: str,
-                              resultados_busca: List[Dict[str, Any]],
+                              total_resultados: int,
                               relevancia: Dict[str, Any],
                               homonímia: Dict[str, Any]) -> List[str]:
         """
@@ -220,7 +282,7 @@ class QueryPostprocessor:
 
         Args:
             query_original (str): Query original
-            resultados_busca (List[Dict[str, Any]]): Resultados da busca
+            total_resultados (int): Número de resultados da busca
             relevancia (Dict[str, Any]): Análise de relevância
             homonímia (Dict[str, Any]): Análise de homonímia
 
@@ -234,7 +296,7 @@ class QueryPostprocessor:
             sugestoes.append("Considerar expandir a query com termos mais específicos")
             sugestoes.append("Verificar se os termos de busca estão corretos")
 
-        if relevancia["resultados_irrelevantes"] > len(resultados_busca) * 0.5:
+        if relevancia["resultados_irrelevantes"] > total_resultados * 0.5:
             sugestoes.append("Refinar os critérios de busca para melhorar a precisão")
 
         # Sugestões baseadas na homonímia
@@ -247,31 +309,29 @@ class QueryPostprocessor:
                 sugestoes.append(f"Especificar contexto para '{problema['termo']}' ({problema['contexto_esperado']})")
 
         # Sugestões baseadas no número de resultados
-        if len(resultados_busca) == 0:
+        if total_resultados == 0:
             sugestoes.append("Ampliar os critérios de busca")
             sugestoes.append("Verificar se os termos estão corretos")
-        elif len(resultados_busca) > 50:
+        elif total_resultados > 50:
             sugestoes.append("Refinar a busca para obter resultados mais específicos")
 
         return sugestoes
 
     def _calcular_metricas_qualidade(self,
-                                    resultados_busca: List[Dict[str, Any]],
+                                    total_resultados: int,
                                     relevancia: Dict[str, Any],
                                     homonímia: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calcula métricas de qualidade dos resultados.
 
         Args:
-            resultados_busca (List[Dict[str, Any]]): Resultados da busca
+            total_resultados (int): Número de resultados da busca
             relevancia (Dict[str, Any]): Análise de relevância
             homonímia (Dict[str, Any]): Análise de homonímia
 
         Returns:
             Dict[str, Any]: Métricas de qualidade
         """
-        total_resultados = len(resultados_busca)
-
         # Calcula taxa de relevância
         taxa_relevancia = 0.0
         if total_resultados > 0:
@@ -8,8 +8,13 @@ técnico-jurídico para expandir termos ambíguos antes das consultas ao banco
 de dados.
 """
 
+import os
 import logging
-from typing import Dict, List, Tuple, Optional
+import threading
+import unicodedata
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple, Optional
 from pathlib import Path
 import sys
 
@@ -20,8 +25,10 @@ from glossary.technical_glossary import (
     expandir_termo_ambiguo,
     detectar_termos_ambiguos,
     expandir_query,
-    obter_contexto_termo
+    obter_contexto_termo,
+    obter_snapshot
 )
+from glossary.glossary_store import descongelar
 
 # =============================================================================
 # CONFIGURAÇÃO DE LOGGING
@@ -39,21 +46,92 @@ class QueryPreprocessor:
     técnico-jurídico para expandir termos ambíguos.
     """
 
-    def __init__(self):
-        """Inicializa o pré-processador de queries."""
+    def __init__(self, max_cache: int = 1024):
+        """
+        Inicializa o pré-processador de queries.
+
+        Args:
+            max_cache (int): Número máximo de resultados mantidos no cache LRU
+        """
         self.logger = logging.getLogger(f"{__name__}.QueryPreprocessor")
+        self.max_cache = max_cache
+        self._cache: "OrderedDict[Tuple[str, int], Mapping[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_stats = {"hits": 0, "misses": 0, "remocoes": 0}
         self.logger.info("Inicializando QueryPreprocessor")
 
-    def preprocessar_query(self, query_original: str) -> Dict[str, any]:
+    @staticmethod
+    def _normalizar_query(query: str) -> str:
+        """Chave do cache: unicode NFC e espaços colapsados (a caixa é preservada na expansão)"""
+        return " ".join(unicodedata.normalize("NFC", query or "").split())
+
+    def preprocessar_query(self, query_original: str) -> Dict[str, Any]:
         """
         Pré-processa uma query expandindo termos ambíguos.
 
+        Resultados são memoizados por query normalizada e versão do glossário.
+        O cache guarda um snapshot imutável (compartilhado entre requisições);
+        cada chamada recebe uma cópia própria em dict com listas.
+
         Args:
             query_original (str): Query original do usuário
 
         Returns:
-            Dict[str, any]: Dicionário com informações do pré-processamento
+            Dict[str, Any]: Informações do pré-processamento
         """
+        chave = (self._normalizar_query(query_original), obter_snapshot().versao)
+
+        with self._cache_lock:
+            resultado = self._cache.get(chave)
+            if resultado is not None:
+                self._cache.move_to_end(chave)
+                self._cache_stats["hits"] += 1
+        if resultado is not None:
+            self.logger.debug(f"Pré-processamento em cache: {query_original}")
+            return self._copiar_resultado(resultado, query_original)
+
+        resultado = self._preprocessar(chave[0])
+
+        with self._cache_lock:
+            self._cache_stats["misses"] += 1
+            self._cache[chave] = resultado
+            self._cache.move_to_end(chave)
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+                self._cache_stats["remocoes"] += 1
+
+        return self._copiar_resultado(resultado, query_original)
+
+    @staticmethod
+    def _copiar_resultado(resultado: Mapping[str, Any], query_original: str) -> Dict[str, Any]:
+        """Cópia mutável do resultado em cache, com a query exatamente como o usuário a escreveu"""
+        copia = descongelar(resultado)
+        copia["query_original"] = query_original
+        return copia
+
+    def obter_estatisticas_cache(self) -> Dict[str, Any]:
+        """
+        Estatísticas do cache de pré-processamento.
+
+        Returns:
+            Dict[str, Any]: hits, misses, remoções, taxa de acerto e ocupação
+        """
+        with self._cache_lock:
+            consultas = self._cache_stats["hits"] + self._cache_stats["misses"]
+            return {
+                **self._cache_stats,
+                "hit_rate": self._cache_stats["hits"] / consultas if consultas else 0.0,
+                "entradas": len(self._cache),
+                "max_entradas": self.max_cache
+            }
+
+    def limpar_cache(self) -> None:
+        """Remove todos os resultados memoizados."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _preprocessar(self, query_original: str) -> Mapping[str, Any]:
+        """Executa o pipeline de pré-processamento (sem cache)."""
         self.logger.info(f"Pré-processando query: {query_original}")
 
         # Detecta termos ambíguos
@@ -68,14 +146,14 @@ class QueryPreprocessor:
         # Gera termos de busca otimizados
         termos_busca = self._gerar_termos_busca(query_expandida, termos_ambiguos)
 
-        resultado = {
+        resultado = MappingProxyType({
             "query_original": query_original,
             "query_expandida": query_expandida,
-            "termos_ambiguos_detectados": termos_ambiguos,
+            "termos_ambiguos_detectados": tuple(termos_ambiguos),
             "contexto_geral": contexto_geral,
-            "termos_busca_otimizados": termos_busca,
+            "termos_busca_otimizados": tuple(termos_busca),
             "preprocessamento_realizado": True
-        }
+        })
 
         self.logger.info(f"Pré-processamento concluído: {len(termos_ambiguos)} termos expandidos")
         return resultado
@@ -129,35 +207,27 @@ class QueryPreprocessor:
         Returns:
             List[str]: Lista de termos de busca otimizados
         """
-        termos_busca = []
-
-        # Adiciona a query expandida completa
-        termos_busca.append(query_expandida)
+        # Query expandida completa, depois as expansões e por fim as variações
+        # (uma consulta ao glossário por termo; ordem estável para busca multi-query)
+        expansoes = [expandir_termo_ambiguo(termo) for termo in termos_ambiguos]
+        expansoes = [expansao for expansao in expansoes if expansao]
 
-        # Adiciona expansões individuais dos termos ambíguos
-        for termo in termos_ambiguos:
-            expansao = expandir_termo_ambiguo(termo)
-            if expansao:
-                termos_busca.append(expansao["expansao"])
-
-        # Adiciona variações dos termos
-        for termo in termos_ambiguos:
-            expansao = expandir_termo_ambiguo(termo)
-            if expansao and "variacoes" in expansao:
-                termos_busca.extend(expansao["variacoes"])
+        termos_busca = [query_expandida]
+        termos_busca.extend(expansao["expansao"] for expansao in expansoes)
+        for expansao in expansoes:
+            termos_busca.extend(expansao.get("variacoes", []))
 
-        # Remove duplicatas e limpa
-        termos_busca = list(set(termos_busca))
-        termos_busca = [termo.strip() for termo in termos_busca if termo.strip()]
+        # Remove duplicatas (mantendo a ordem) e limpa
+        termos_busca = list(dict.fromkeys(termo.strip() for termo in termos_busca if termo.strip()))
 
         return termos_busca
 
-    def validar_preprocessamento(self, resultado: Dict[str, any]) -> bool:
+    def validar_preprocessamento(self, resultado: Dict[str, Any]) -> bool:
         """
         Valida se o pré-processamento foi realizado corretamente.
 
         Args:
-            resultado (Dict[str, any]): Resultado do pré-processamento
+            resultado (Dict[str, Any]): Resultado do pré-processamento
 
         Returns:
             bool: True se válido, False caso contrário
@@ -189,10 +259,27 @@ class QueryPreprocessor:
         return True
 
 # =============================================================================
-# FUNÇÃO DE CONVENIÊNCIA
+# INSTÂNCIA COMPARTILHADA E FUNÇÃO DE CONVENIÊNCIA
 # =============================================================================
 
-def preprocessar_query_simples(query: str) -> Dict[str, any]:
+_PREPROCESSOR: Optional[QueryPreprocessor] = None
+_PREPROCESSOR_LOCK = threading.Lock()
+
+def obter_preprocessor() -> QueryPreprocessor:
+    """
+    Retorna o pré-processador compartilhado pelo processo (e seu cache).
+
+    Returns:
+        QueryPreprocessor: Instância única
+    """
+    global _PREPROCESSOR
+    if _PREPROCESSOR is None:
+        with _PREPROCESSOR_LOCK:
+            if _PREPROCESSOR is None:
+                _PREPROCESSOR = QueryPreprocessor(max_cache=int(os.getenv("PREPROCESSOR_CACHE_SIZE", "1024")))
+    return _PREPROCESSOR
+
+def preprocessar_query_simples(query: str) -> Dict[str, Any]:
     """
     Função de conveniência para pré-processar uma query.
 
@@ -200,16 +287,17 @@ def preprocessar_query_simples(query: str) -> Dict[str, any]:
         query (str): Query original
 
     Returns:
-        Dict[str, any]: Resultado do pré-processamento
+        Dict[str, Any]: Resultado do pré-processamento
     """
-    preprocessor = QueryPreprocessor()
-    return preprocessor.preprocessar_query(query)
+    return obter_preprocessor().preprocessar_query(query)
 
 # =============================================================================
 # TESTES DO MÓDULO
 # =============================================================================
 
 if __name__ == "__main__":
+    import json
+
     # Configura logging para testes
     logging.basicConfig(level=logging.INFO)
 
@@ -247,4 +335,16 @@ if __name__ == "__main__":
     print(f"   Resultado 1 válido: {valido1}")
     print(f"   Resultado 2 válido: {valido2}")
 
+    # Teste 4: Cache
+    print("\n4. Teste de cache:")
+    preprocessor.preprocessar_query("Qual o entendimento  sobre custeio de ART no DNIT?")
+    print(f"   Estatísticas: {preprocessor.obter_estatisticas_cache()}")
+
+    # Teste 5: Resultado é uma cópia serializável (o cache não é exposto)
+    print("\n5. Teste de serialização:")
+    resultado1["termos_busca_otimizados"].append("alterado")
+    resultado3 = preprocessor.preprocessar_query(query_teste1)
+    assert "alterado" not in resultado3["termos_busca_otimizados"]
+    print(f"   JSON: {len(json.dumps(resultado3, ensure_ascii=False))} caracteres")
+
     print("\n=== FIM DOS TESTES ===")
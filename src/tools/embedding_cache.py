@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💾 Cache de Embeddings em Dois Níveis
+LRU em memória + armazenamento em disco com TTL e vetores float32 mapeados em memória
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Raiz dos caches de dados em tempo de execução (fora do repositório versionado;
+# `.cache/` está no .gitignore). Independe do diretório de trabalho.
+RAIZ_CACHE_PADRAO = Path(__file__).resolve().parent.parent.parent / '.cache'
+
+
+def diretorio_cache(nome: str) -> str:
+    """Subdiretório `nome` da raiz de caches (CACHE_DIR, ou `.cache/` na raiz do projeto)"""
+    return os.path.join(os.getenv('CACHE_DIR', str(RAIZ_CACHE_PADRAO)), nome)
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza o texto para composição da chave (unicode NFC, caixa e espaços)"""
+    texto = unicodedata.normalize('NFC', texto or '')
+    return ' '.join(texto.lower().split())
+
+
+def gerar_chave(texto: str, modelo: str, task_type: str) -> str:
+    """Gera a chave do cache a partir de texto normalizado + modelo + task_type"""
+    base = f"{modelo}\x1f{task_type}\x1f{normalizar_texto(texto)}"
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings em dois níveis.
+
+    - Nível 1: LRU em memória limitado por `max_memoria` entradas.
+    - Nível 2: diretório em disco com um arquivo `vectors.f32` (matriz float32
+      contígua, somente append) lido via `np.memmap`, e um índice `index.jsonl`
+      com chave, linha e timestamp. Entradas mais antigas que `ttl` segundos são
+      tratadas como ausentes e descartadas na compactação.
+    """
+
+    VECTORS_FILE = 'vectors.f32'
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memoria: int = 1024,
+                 ttl: float = 7 * 24 * 3600, persistir: bool = True):
+        self.cache_dir = cache_dir
+        self.max_memoria = max_memoria
+        self.ttl = ttl
+        self.persistir = persistir and bool(cache_dir)
+        self._lock = threading.Lock()
+
+        self._memoria: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._indice_disco: Dict[str, Tuple[int, float]] = {}
+        self._dimensao: Optional[int] = None
+        self._linhas_disco = 0
+        self._mmap: Optional[np.memmap] = None
+
+        self._stats = {
+            'hits_memoria': 0,
+            'hits_disco': 0,
+            'misses': 0,
+            'gravacoes': 0,
+            'expirados': 0
+        }
+
+        if self.persistir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._carregar_disco()
+            except Exception as e:
+                logger.warning(f"Cache de embeddings em disco indisponível: {e}")
+                self.persistir = False
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def get(self, chave: str) -> Optional[List[float]]:
+        """Retorna o embedding em cache ou None"""
+        with self._lock:
+            vetor = self._memoria.get(chave)
+            if vetor is not None:
+                self._memoria.move_to_end(chave)
+                self._stats['hits_memoria'] += 1
+                return vetor
+
+            vetor = self._ler_disco(chave)
+            if vetor is not None:
+                self._stats['hits_disco'] += 1
+                self._guardar_memoria(chave, vetor)
+                return vetor
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, chave: str, vetor: List[float]) -> None:
+        """Armazena o embedding nos dois níveis"""
+        if not vetor:
+            return
+        with self._lock:
+            self._guardar_memoria(chave, vetor)
+            if self.persistir and chave not in self._indice_disco:
+                try:
+                    self._gravar_disco(chave, vetor)
+                    self._stats['gravacoes'] += 1
+                except Exception as e:
+                    logger.warning(f"Erro ao gravar embedding em disco: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de acerto/erro e ocupação do cache"""
+        with self._lock:
+            hits = self._stats['hits_memoria'] + self._stats['hits_disco']
+            total = hits + self._stats['misses']
+            return {
+                **self._stats,
+                'hits': hits,
+                'hit_rate': hits / total if total else 0.0,
+                'entradas_memoria': len(self._memoria),
+                'entradas_disco': len(self._indice_disco),
+                'max_memoria': self.max_memoria,
+                'ttl': self.ttl
+            }
+
+    def clear(self) -> None:
+        """Limpa os dois níveis do cache"""
+        with self._lock:
+            self._memoria.clear()
+            self._indice_disco.clear()
+            self._mmap = None
+            self._linhas_disco = 0
+            self._dimensao = None
+            if self.persistir:
+                for nome in (self.VECTORS_FILE, self.INDEX_FILE):
+                    caminho = os.path.join(self.cache_dir, nome)
+                    if os.path.exists(caminho):
+                        os.remove(caminho)
+
+    # ------------------------------------------------------------------
+    # Nível 1 - memória
+    # ------------------------------------------------------------------
+
+    def _guardar_memoria(self, chave: str, vetor: List[float]) -> None:
+        self._memoria[chave] = vetor
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Nível 2 - disco
+    # ------------------------------------------------------------------
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.cache_dir, nome)
+
+    def _carregar_disco(self) -> None:
+        """
+        Carrega o índice do disco e compacta entradas expiradas. Uma linha
+        parcial no fim de `vectors.f32` (queda no meio de um append) é
+        descartada, para que os próximos appends fiquem alinhados.
+        """
+        index_path = self._caminho(self.INDEX_FILE)
+        vectors_path = self._caminho(self.VECTORS_FILE)
+        if not os.path.exists(vectors_path):
+            return
+        if not os.path.exists(index_path):
+            # Vetores sem índice não são alcançáveis: recomeça do zero
+            os.truncate(vectors_path, 0)
+            return
+
+        agora = time.time()
+        entradas = {}
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                self._dimensao = registro['dim']
+                entradas[registro['key']] = (registro['row'], registro['ts'])
+
+        if not self._dimensao:
+            os.truncate(vectors_path, 0)
+            return
+
+        tamanho = os.path.getsize(vectors_path)
+        total_linhas = tamanho // (4 * self._dimensao)
+        if tamanho != total_linhas * 4 * self._dimensao:
+            logger.warning(f"Cache de embeddings: descartando linha parcial no fim de {self.VECTORS_FILE}")
+            os.truncate(vectors_path, total_linhas * 4 * self._dimensao)
+        validas = {
+            chave: (linha, ts) for chave, (linha, ts) in entradas.items()
+            if linha < total_linhas and agora - ts <= self.ttl
+        }
+        self._stats['expirados'] += len(entradas) - len(validas)
+
+        if len(validas) < total_linhas:
+            self._compactar(validas, total_linhas)
+        else:
+            self._indice_disco = validas
+            self._linhas_disco = total_linhas
+
+        logger.info(f"Cache de embeddings carregado: {len(self._indice_disco)} entradas em disco")
+
+    def _compactar(self, validas: Dict[str, Tuple[int, float]], total_linhas: int) -> None:
+        """Reescreve os arquivos mantendo apenas entradas válidas"""
+        dim = self._dimensao
+        origem = np.memmap(self._caminho(self.VECTORS_FILE), dtype=np.float32, mode='r',
+                           shape=(total_linhas, dim)) if total_linhas else None
+
+        ordem = sorted(validas.items(), key=lambda item: item[1][0])
+        matriz = np.empty((len(ordem), dim), dtype=np.float32)
+        novo_indice = {}
+        for nova_linha, (chave, (linha, ts)) in enumerate(ordem):
+            matriz[nova_linha] = origem[linha]
+            novo_indice[chave] = (nova_linha, ts)
+        del origem
+
+        tmp_vectors = self._caminho(self.VECTORS_FILE + '.tmp')
+        tmp_index = self._caminho(self.INDEX_FILE + '.tmp')
+        matriz.tofile(tmp_vectors)
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            for chave, (linha, ts) in novo_indice.items():
+                f.write(json.dumps({'key': chave, 'row': linha, 'ts': ts, 'dim': dim}) + '\n')
+        os.replace(tmp_vectors, self._caminho(self.VECTORS_FILE))
+        os.replace(tmp_index, self._caminho(self.INDEX_FILE))
+
+        self._indice_disco = novo_indice
+        self._linhas_disco = len(ordem)
+        self._mmap = None
+
+    def _mapear(self) -> Optional[np.memmap]:
+        """Mapeia (ou remapeia, se o arquivo cresceu) a matriz de vetores"""
+        if self._mmap is None or self._mmap.shape[0] < self._linhas_disco:
+            if not self._linhas_disco:
+                return None
+            self._mmap = np.memmap(self._caminho(self.VECTORS_FILE), dtype=np.float32, mode='r',
+                                   shape=(self._linhas_disco, self._dimensao))
+        return self._mmap
+
+    def _ler_disco(self, chave: str) -> Optional[List[float]]:
+        if not self.persistir:
+            return None
+        entrada = self._indice_disco.get(chave)
+        if entrada is None:
+            return None
+
+        linha, ts = entrada
+        if time.time() - ts > self.ttl:
+            del self._indice_disco[chave]
+            self._stats['expirados'] += 1
+            return None
+
+        matriz = self._mapear()
+        if matriz is None:
+            return None
+        return matriz[linha].tolist()
+
+    def _gravar_disco(self, chave: str, vetor: List[float]) -> None:
+        if self._dimensao is None:
+            self._dimensao = len(vetor)
+        elif len(vetor) != self._dimensao:
+            logger.warning(f"Dimensão de embedding inesperada ({len(vetor)} != {self._dimensao}), não persistido")
+            return
+
+        ts = time.time()
+        with open(self._caminho(self.VECTORS_FILE), 'ab') as f:
+            f.write(np.asarray(vetor, dtype=np.float32).tobytes())
+        with open(self._caminho(self.INDEX_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': chave, 'row': self._linhas_disco, 'ts': ts, 'dim': self._dimensao}) + '\n')
+
+        self._indice_disco[chave] = (self._linhas_disco, ts)
+        self._linhas_disco += 1
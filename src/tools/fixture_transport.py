@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎞️ Gravação e Reprodução de Chamadas Externas (Gemini e Pinecone)
+Camada de transporte plugável para PineconeSearchTool e ResearchAgent:
+
+- live (padrão): chamadas reais, sem nenhuma camada extra
+- record: faz as chamadas reais e grava cada par requisição/resposta em um
+  arquivo JSONL comprimido (gzip)
+- replay: responde a partir das gravações (índice em memória por hash da
+  requisição), com latência injetada configurável, sem rede nem API keys
+
+Configuração (variáveis de ambiente):
+    FIXTURE_MODE=live|record|replay
+    FIXTURE_PATH=.cursor/fixtures/gravacao.jsonl.gz
+    FIXTURE_LATENCY=0.05  ou  embed=0.03,pinecone=0.05,generate=1.5
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import numpy as np
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('live', 'record', 'replay')
+CAMINHO_PADRAO = '.cursor/fixtures/gravacao.jsonl.gz'
+
+
+class FixtureAusente(KeyError):
+    """Requisição sem gravação correspondente no modo replay"""
+
+
+def modo_fixture() -> str:
+    """Modo configurado em FIXTURE_MODE (live, record ou replay)"""
+    modo = os.getenv('FIXTURE_MODE', 'live').lower()
+    if modo not in MODOS:
+        raise ValueError(f"FIXTURE_MODE inválido: {modo} (use {', '.join(MODOS)})")
+    return modo
+
+
+def interpretar_latencias(valor: Optional[str]) -> Dict[str, float]:
+    """'0.05' -> mesma latência para tudo; 'embed=0.03,generate=1.5' -> por tipo de chamada"""
+    if not valor:
+        return {}
+    if '=' not in valor:
+        return {'*': float(valor)}
+    latencias = {}
+    for parte in valor.split(','):
+        tipo, _, segundos = parte.partition('=')
+        latencias[tipo.strip()] = float(segundos)
+    return latencias
+
+
+# =============================================================================
+# ARMAZENAMENTO
+# =============================================================================
+
+class FixtureStore:
+    """
+    Gravações indexadas em memória pela chave (hash da requisição canônica).
+
+    O arquivo é um JSONL gzip, uma linha por chamada: {"chave", "tipo",
+    "resumo", "resposta"}. No modo record as linhas são acrescentadas como
+    novos membros gzip (o arquivo continua legível por `gzip.open`).
+    """
+
+    def __init__(self, caminho: str, modo: str, latencias: Optional[Dict[str, float]] = None):
+        self.caminho = Path(caminho)
+        self.modo = modo
+        self.latencias = latencias or {}
+        self._respostas: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.stats = {'gravadas': 0, 'reproduzidas': 0, 'ausentes': 0}
+        self._carregar()
+
+    @staticmethod
+    def chave(tipo: str, requisicao: Any) -> str:
+        canonica = json.dumps([tipo, requisicao], ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(canonica.encode('utf-8')).hexdigest()
+
+    def _carregar(self) -> None:
+        if not self.caminho.exists():
+            if self.modo == 'replay':
+                logger.warning("Arquivo de fixtures não encontrado: %s", self.caminho)
+            return
+        with gzip.open(self.caminho, 'rt', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    self._respostas[registro['chave']] = registro['resposta']
+        logger.info("Fixtures carregadas de %s: %d gravações", self.caminho, len(self._respostas))
+
+    def latencia(self, tipo: str) -> float:
+        return self.latencias.get(tipo, self.latencias.get('*', 0.0))
+
+    def buscar(self, tipo: str, requisicao: Any) -> Any:
+        resposta = self._respostas.get(self.chave(tipo, requisicao))
+        if resposta is None:
+            self.stats['ausentes'] += 1
+            raise FixtureAusente(f"Sem gravação para a chamada {tipo} (grave com FIXTURE_MODE=record)")
+        self.stats['reproduzidas'] += 1
+        return resposta
+
+    def gravar(self, tipo: str, requisicao: Any, resposta: Any, resumo: str = '') -> None:
+        chave = self.chave(tipo, requisicao)
+        registro = json.dumps({'chave': chave, 'tipo': tipo, 'resumo': resumo[:120], 'resposta': resposta},
+                              ensure_ascii=False)
+        with self._lock:
+            if chave in self._respostas:
+                return
+            self._respostas[chave] = resposta
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.caminho, 'at', encoding='utf-8') as f:
+                f.write(registro + '\n')
+            self.stats['gravadas'] += 1
+
+    def __len__(self) -> int:
+        return len(self._respostas)
+
+
+_stores: Dict[str, FixtureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def obter_store() -> Optional[FixtureStore]:
+    """Store compartilhado do processo para o FIXTURE_PATH atual (None no modo live)"""
+    modo = modo_fixture()
+    if modo == 'live':
+        return None
+    caminho = os.getenv('FIXTURE_PATH', CAMINHO_PADRAO)
+    with _stores_lock:
+        store = _stores.get(caminho)
+        if store is None or store.modo != modo:
+            store = _stores[caminho] = FixtureStore(caminho, modo,
+                                                    interpretar_latencias(os.getenv('FIXTURE_LATENCY')))
+        return store
+
+
+# =============================================================================
+# HTTP (PINECONE)
+# =============================================================================
+
+def _requisicao_http(metodo: str, url: str, corpo: Optional[bytes]) -> Dict[str, Any]:
+    """Forma canônica da requisição: método, caminho com query string e corpo JSON (sem host)"""
+    caminho = httpx.URL(url)
+    try:
+        dados = json.loads(corpo) if corpo else None
+    except ValueError:
+        dados = corpo.decode('utf-8', 'replace')
+    if isinstance(dados, dict) and isinstance(dados.get('vector'), list):
+        # O vetor pode vir do cache de embeddings (float32): a chave usa a mesma precisão
+        vetor = np.asarray(dados['vector'], dtype=np.float32).tobytes()
+        dados = {**dados, 'vector': hashlib.sha1(vetor).hexdigest()}
+    return {'metodo': metodo.upper(), 'caminho': caminho.raw_path.decode('ascii'), 'corpo': dados}
+
+
+class FixtureHTTPAdapter(BaseAdapter):
+    """Adaptador do `requests` que grava ou reproduz as chamadas ao Pinecone"""
+
+    def __init__(self, store: FixtureStore, interno: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.store = store
+        self.interno = interno
+
+    def send(self, request, **kwargs):
+        corpo = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        requisicao = _requisicao_http(request.method, request.url, corpo)
+
+        if self.store.modo == 'replay':
+            time.sleep(self.store.latencia('pinecone'))
+            gravada = self.store.buscar('pinecone', requisicao)
+            response = requests.Response()
+            response.status_code = gravada['status']
+            response._content = gravada['corpo'].encode('utf-8')
+            response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+            response.url = request.url
+            response.request = request
+            response.encoding = 'utf-8'
+            return response
+
+        response = self.interno.send(request, **kwargs)
+        if response.status_code == 200:
+            self.store.gravar('pinecone', requisicao, {'status': 200, 'corpo': response.text},
+                              resumo=requisicao['caminho'])
+        return response
+
+    def close(self):
+        if self.interno is not None:
+            self.interno.close()
+
+
+class FixtureAsyncTransport(httpx.AsyncBaseTransport):
+    """Transporte do `httpx` que grava ou reproduz as chamadas assíncronas ao Pinecone"""
+
+    def __init__(self, store: FixtureStore, interno: Optional[httpx.AsyncBaseTransport] = None):
+        self.store = store
+        self.interno = interno
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        requisicao = _requisicao_http(request.method, str(request.url), await request.aread())
+
+        if self.store.modo == 'replay':
+            await asyncio.sleep(self.store.latencia('pinecone'))
+            gravada = self.store.buscar('pinecone', requisicao)
+            return httpx.Response(gravada['status'], content=gravada['corpo'].encode('utf-8'),
+                                  headers={'Content-Type': 'application/json'}, request=request)
+
+        response = await self.interno.handle_async_request(request)
+        conteudo = await response.aread()
+        if response.status_code == 200:
+            self.store.gravar('pinecone', requisicao, {'status': 200, 'corpo': conteudo.decode('utf-8')},
+                              resumo=requisicao['caminho'])
+        return httpx.Response(response.status_code, headers=response.headers, content=conteudo, request=request)
+
+    async def aclose(self) -> None:
+        if self.interno is not None:
+            await self.interno.aclose()
+
+
+def envolver_adaptador_http(adaptador: BaseAdapter) -> BaseAdapter:
+    """Adaptador a montar na sessão do `requests` (o próprio adaptador no modo live)"""
+    store = obter_store()
+    if store is None:
+        return adaptador
+    return FixtureHTTPAdapter(store, adaptador if store.modo == 'record' else None)
+
+
+def criar_transporte_async(http2: bool, limits: httpx.Limits) -> Optional[httpx.AsyncBaseTransport]:
+    """Transporte para o httpx.AsyncClient (None no modo live: o cliente cria o padrão)"""
+    store = obter_store()
+    if store is None:
+        return None
+    interno = httpx.AsyncHTTPTransport(http2=http2, limits=limits) if store.modo == 'record' else None
+    return FixtureAsyncTransport(store, interno)
+
+
+# =============================================================================
+# GEMINI
+# =============================================================================
+
+class FixtureEmbedder:
+    """Mesma interface de `genai.embed_content(_async)`, gravando ou reproduzindo os embeddings"""
+
+    def __init__(self, store: FixtureStore):
+        self.store = store
+
+    @staticmethod
+    def _requisicao(model: str, content: Any, task_type: Optional[str]) -> Dict[str, Any]:
+        return {'modelo': model, 'conteudo': content, 'task_type': task_type}
+
+    def embed_content(self, model: str, content: Any, task_type: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        requisicao = self._requisicao(model, content, task_type)
+        if self.store.modo == 'replay':
+            time.sleep(self.store.latencia('embed'))
+            return {'embedding': self.store.buscar('embed', requisicao)}
+
+        import google.generativeai as genai
+        result = genai.embed_content(model=model, content=content, task_type=task_type, **kwargs)
+        self.store.gravar('embed', requisicao, result['embedding'], resumo=str(content))
+        return result
+
+    async def embed_content_async(self, model: str, content: Any, task_type: Optional[str] = None,
+                                  **kwargs) -> Dict[str, Any]:
+        requisicao = self._requisicao(model, content, task_type)
+        if self.store.modo == 'replay':
+            await asyncio.sleep(self.store.latencia('embed'))
+            return {'embedding': self.store.buscar('embed', requisicao)}
+
+        import google.generativeai as genai
+        result = await genai.embed_content_async(model=model, content=content, task_type=task_type, **kwargs)
+        self.store.gravar('embed', requisicao, result['embedding'], resumo=str(content))
+        return result
+
+
+def criar_embedder():
+    """Provedor de embeddings: o módulo `genai` no modo live, FixtureEmbedder nos demais"""
+    store = obter_store()
+    if store is None:
+        import google.generativeai as genai
+        return genai
+    return FixtureEmbedder(store)
+
+
+class _Resposta:
+    """Resposta (ou fragmento de stream) com o atributo `text`, como a do SDK"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FixtureGenerativeModel:
+    """
+    Envolve um `genai.GenerativeModel` gravando ou reproduzindo `generate_content_async`.
+
+    A gravação guarda os fragmentos do texto; a mesma gravação serve às chamadas
+    com e sem `stream=True`. No replay, a latência de 'generate' é aplicada
+    antes da resposta (ou do primeiro fragmento).
+    """
+
+    def __init__(self, store: FixtureStore, nome: str, modelo=None):
+        self.store = store
+        self.nome = nome
+        self.modelo = modelo
+
+    def _requisicao(self, prompt: Any) -> Dict[str, Any]:
+        return {'modelo': self.nome, 'prompt': prompt}
+
+    async def generate_content_async(self, prompt: Any, stream: bool = False, **kwargs):
+        requisicao = self._requisicao(prompt)
+
+        if self.store.modo == 'replay':
+            await asyncio.sleep(self.store.latencia('generate'))
+            fragmentos = self.store.buscar('generate', requisicao)
+            return self._reproduzir(fragmentos) if stream else _Resposta(''.join(fragmentos))
+
+        if not stream:
+            response = await self.modelo.generate_content_async(prompt, **kwargs)
+            self.store.gravar('generate', requisicao, [response.text], resumo=str(prompt)[-120:])
+            return response
+
+        response = await self.modelo.generate_content_async(prompt, stream=True, **kwargs)
+        return self._gravar_stream(requisicao, response, str(prompt))
+
+    @staticmethod
+    async def _reproduzir(fragmentos: List[str]) -> AsyncIterator[_Resposta]:
+        for fragmento in fragmentos:
+            yield _Resposta(fragmento)
+
+    async def _gravar_stream(self, requisicao: Dict[str, Any], response, prompt: str) -> AsyncIterator[Any]:
+        fragmentos = []
+        async for chunk in response:
+            fragmentos.append(chunk.text or '')
+            yield chunk
+        self.store.gravar('generate', requisicao, fragmentos, resumo=prompt[-120:])
+
+
+def envolver_modelo(modelo, nome: str):
+    """Modelo do LLM a usar: o próprio no modo live, FixtureGenerativeModel nos demais"""
+    store = obter_store()
+    if store is None:
+        return modelo
+    return FixtureGenerativeModel(store, nome, modelo)
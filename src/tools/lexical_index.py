@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔤 Índice Lexical BM25 (busca híbrida)
+Índice invertido incremental com postings em arrays compactos e fusão RRF
+"""
+
+import re
+import math
+import threading
+import unicodedata
+from array import array
+from typing import List, Dict, Any, Tuple, Iterable
+
+import numpy as np
+
+# Stopwords do português (já sem acentos, pois a tokenização dobra acentos)
+STOPWORDS_PT = frozenset("""
+a ao aos as com como da das de do dos e em entre ha na nas no nos o os ou para pela pelas pelo pelos
+por qual quais que se sem ser seu seus sua suas sob sobre um uma umas uns foi sao esta este isso
+nº n
+""".split())
+
+# Números com pontos de milhar ("8.112") e referências com barra ("30/2022", "8.112/1990")
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)*(?:/\d+)?")
+
+
+def dobrar_acentos(texto: str) -> str:
+    """Remove acentos e converte para minúsculas ("Técnica" -> "tecnica")"""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Tokenização para textos jurídicos em português.
+
+    - dobra acentos e caixa;
+    - remove pontos de milhar ("8.112" -> "8112") e mantém referências com barra
+      como um token ("30/2022"), emitindo também o número principal ("30");
+    - descarta stopwords e reduz plurais ao singular (ver `reduzir_plural`).
+    """
+    tokens = []
+    for bruto in _TOKEN_RE.findall(dobrar_acentos(texto or '')):
+        if bruto[0].isdigit():
+            token = bruto.replace('.', '')
+            tokens.append(token)
+            if '/' in token:
+                tokens.append(token.split('/', 1)[0])
+        elif bruto not in STOPWORDS_PT:
+            tokens.append(reduzir_plural(bruto))
+    return tokens
+
+
+_VOGAIS = frozenset('aeiou')
+
+
+def reduzir_plural(token: str) -> str:
+    """
+    Plural -> singular para as formas regulares do português (texto já sem acentos),
+    de modo que singular e plural gerem o mesmo termo: "servidores" -> "servidor",
+    "anotacoes" -> "anotacao", "gerais" -> "geral", "papeis" -> "papel",
+    "itens" -> "item", "luzes" -> "luz", "licencas" -> "licenca".
+    """
+    if len(token) <= 3 or not token.endswith('s'):
+        return token
+    if token.endswith(('oes', 'aes')):
+        return token[:-3] + 'ao'
+    if token.endswith('ais') and len(token) > 4:
+        return token[:-2] + 'l'
+    if token.endswith('eis') and len(token) > 5:
+        return token[:-3] + 'el'
+    if token.endswith(('res', 'zes')) and len(token) > 4 and token[-4] in _VOGAIS:
+        return token[:-2]
+    if token.endswith('ns'):
+        return token[:-2] + 'm'
+    return token[:-1]
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 construído incrementalmente.
+
+    Cada termo guarda duas listas paralelas `array('I')` (documento interno e
+    frequência), de modo que a pontuação de um termo é vetorizada com
+    `np.frombuffer` sem copiar as postings para objetos Python.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        self._vocab: Dict[str, int] = {}
+        self._post_docs: List[array] = []
+        self._post_tfs: List[array] = []
+        self._doc_lengths = array('I')
+        self._total_length = 0
+
+        self._doc_ids: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doc_metadata: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_index
+
+    # ------------------------------------------------------------------
+    # Indexação
+    # ------------------------------------------------------------------
+
+    def add_document(self, doc_id: str, metadata: Dict[str, Any]) -> bool:
+        """Indexa `numero_nota_tecnica` + `texto_original`; ignora documentos já indexados"""
+        if doc_id in self._doc_index:
+            return False
+
+        texto = f"{metadata.get('numero_nota_tecnica', '')} {metadata.get('texto_original', '')}"
+        frequencias: Dict[str, int] = {}
+        for token in tokenizar(texto):
+            frequencias[token] = frequencias.get(token, 0) + 1
+
+        with self._lock:
+            if doc_id in self._doc_index:
+                return False
+
+            interno = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._doc_index[doc_id] = interno
+            self._doc_metadata.append(metadata)
+
+            comprimento = sum(frequencias.values())
+            self._doc_lengths.append(comprimento)
+            self._total_length += comprimento
+
+            for termo, tf in frequencias.items():
+                termo_id = self._vocab.get(termo)
+                if termo_id is None:
+                    termo_id = len(self._post_docs)
+                    self._vocab[termo] = termo_id
+                    self._post_docs.append(array('I'))
+                    self._post_tfs.append(array('I'))
+                self._post_docs[termo_id].append(interno)
+                self._post_tfs[termo_id].append(tf)
+
+        return True
+
+    def add_matches(self, matches: Iterable[Dict[str, Any]]) -> int:
+        """Indexa matches no formato do Pinecone ({'id', 'metadata'}); retorna quantos eram novos"""
+        return sum(self.add_document(match.get('id', 'N/A'), match.get('metadata', {}) or {})
+                   for match in matches if match.get('id') not in self._doc_index)
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Retorna [(doc_id, score_bm25, metadata)] em ordem decrescente de score"""
+        termos = set(tokenizar(query))
+
+        with self._lock:
+            total_docs = len(self._doc_ids)
+            if not total_docs or not termos:
+                return []
+
+            comprimentos = np.frombuffer(self._doc_lengths, dtype=np.uint32)[:total_docs].astype(np.float32)
+            norma = self.k1 * (1 - self.b + self.b * comprimentos / (self._total_length / total_docs))
+            scores = np.zeros(total_docs, dtype=np.float32)
+
+            for termo in termos:
+                termo_id = self._vocab.get(termo)
+                if termo_id is None:
+                    continue
+                docs = np.frombuffer(self._post_docs[termo_id], dtype=np.uint32)
+                tfs = np.frombuffer(self._post_tfs[termo_id], dtype=np.uint32).astype(np.float32)
+                df = docs.shape[0]
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norma[docs])
+
+            candidatos = np.flatnonzero(scores)
+            if not candidatos.size:
+                return []
+            k = min(top_k, candidatos.size)
+            top = candidatos[np.argpartition(-scores[candidatos], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+
+            return [(self._doc_ids[i], float(scores[i]), self._doc_metadata[i]) for i in top]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do índice"""
+        with self._lock:
+            return {
+                'documentos': len(self._doc_ids),
+                'termos': len(self._vocab),
+                'postings': sum(len(p) for p in self._post_docs)
+            }
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """Reciprocal Rank Fusion: score(d) = soma de 1 / (k + posição de d em cada ranking)"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for posicao, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + posicao)
+    return fused
+
+
+# ==========================================
+# TESTES DO MÓDULO
+# ==========================================
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO ÍNDICE LEXICAL BM25")
+    print("=" * 50)
+
+    indice = BM25Index()
+    indice.add_matches([
+        {'id': 'nt-1', 'metadata': {'numero_nota_tecnica': 'NT 1/2020',
+                                    'texto_original': 'Aposentadoria de servidores regidos pela Lei 8.112/1990'}},
+        {'id': 'nt-30', 'metadata': {'numero_nota_tecnica': 'NT 30/2022',
+                                     'texto_original': 'Pensão por morte e acumulação de benefícios'}},
+        {'id': 'nt-7', 'metadata': {'numero_nota_tecnica': 'NT 7/2021',
+                                    'texto_original': 'Licença para capacitação do servidor'}}
+    ])
+
+    for singular, plural in [("servidor", "servidores"), ("anotação", "anotações"), ("licença", "licenças"),
+                             ("lei", "leis"), ("item", "itens"), ("geral", "gerais")]:
+        assert tokenizar(singular) == tokenizar(plural), (singular, plural)
+    print("✅ Singular e plural geram o mesmo termo")
+
+    for consulta in ["Nota Técnica 30/2022", "lei 8112", "licença capacitação servidores"]:
+        print(f"\n🔍 '{consulta}' -> {tokenizar(consulta)}")
+        for doc_id, score, _ in indice.search(consulta, top_k=3):
+            print(f"  • {doc_id}: {score:.4f}")
+
+    print(f"\n📊 RRF: {reciprocal_rank_fusion([['nt-1', 'nt-7'], ['nt-7', 'nt-30']])}")
+    print(f"📊 Estatísticas: {indice.get_stats()}")
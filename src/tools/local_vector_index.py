@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 Índice Vetorial Local (substituto e fallback do Pinecone)
+Carrega um snapshot exportado do namespace e responde top-k com NumPy
+"""
+
+import os
+import json
+import time
+import logging
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorIndex:
+    """
+    Índice vetorial em processo com a mesma forma de resposta do Pinecone.
+
+    Formato do snapshot (diretório):
+    - `manifest.json`: {"dim", "count", "metric", "created_at"}
+    - `vectors.f32`: matriz float32 contígua (count × dim), linhas normalizadas
+    - `metadata.jsonl`: uma linha por vetor com {"id", "metadata"}
+
+    A matriz é lida via `np.memmap`. Até `ivf_min_size` vetores a busca é exata
+    (um produto matriz-vetor + argpartition); acima disso é construído um índice
+    IVF (k-means esférico) e apenas as `nprobe` listas mais próximas são varridas.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    VECTORS_FILE = 'vectors.f32'
+    METADATA_FILE = 'metadata.jsonl'
+
+    def __init__(self, snapshot_dir: str, ivf_min_size: int = 50000, nprobe: int = 8):
+        self.snapshot_dir = snapshot_dir
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+
+        with open(os.path.join(snapshot_dir, self.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        self.dim = self.manifest['dim']
+        self.count = self.manifest['count']
+        self.matrix = np.memmap(os.path.join(snapshot_dir, self.VECTORS_FILE), dtype=np.float32,
+                                mode='r', shape=(self.count, self.dim))
+
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        with open(os.path.join(snapshot_dir, self.METADATA_FILE), 'r', encoding='utf-8') as f:
+            for linha in f:
+                registro = json.loads(linha)
+                self.ids.append(registro['id'])
+                self.metadata.append(registro.get('metadata', {}))
+
+        self._ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        if self.count >= ivf_min_size:
+            self._build_ivf()
+
+        logger.info(f"Índice local carregado: {self.count} vetores ({'IVF' if self._ivf else 'exato'})")
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def save_snapshot(cls, snapshot_dir: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Grava um snapshot a partir de registros {"id", "values", "metadata"}
+        (mesmo formato retornado pelo endpoint /vectors/fetch do Pinecone).
+        """
+        os.makedirs(snapshot_dir, exist_ok=True)
+        vectors_path = os.path.join(snapshot_dir, cls.VECTORS_FILE)
+        metadata_path = os.path.join(snapshot_dir, cls.METADATA_FILE)
+
+        dim = None
+        count = 0
+        with open(vectors_path + '.tmp', 'wb') as vf, open(metadata_path + '.tmp', 'w', encoding='utf-8') as mf:
+            for record in records:
+                vector = np.asarray(record['values'], dtype=np.float32)
+                if dim is None:
+                    dim = vector.shape[0]
+                elif vector.shape[0] != dim:
+                    raise ValueError(f"Dimensão inconsistente no vetor {record['id']}")
+
+                norm = np.linalg.norm(vector)
+                vf.write((vector / norm if norm else vector).tobytes())
+                mf.write(json.dumps({'id': record['id'], 'metadata': record.get('metadata', {})},
+                                    ensure_ascii=False) + '\n')
+                count += 1
+
+        os.replace(vectors_path + '.tmp', vectors_path)
+        os.replace(metadata_path + '.tmp', metadata_path)
+        with open(os.path.join(snapshot_dir, cls.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'count': count, 'metric': 'cosine', 'created_at': time.time()}, f)
+
+        return count
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+
+    def query(self, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """Retorna os top-k matches no formato do Pinecone ({'id', 'score', 'metadata'})"""
+        if not self.count or not vector:
+            return []
+
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if not norm or q.shape[0] != self.dim:
+            return []
+        q /= norm
+
+        if self._ivf is not None:
+            rows = self._ivf_candidates(q)
+            scores = self.matrix[rows] @ q
+        else:
+            rows = None
+            scores = self.matrix @ q
+
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for i in top:
+            row = int(rows[i]) if rows is not None else int(i)
+            matches.append({'id': self.ids[row], 'score': float(scores[i]), 'metadata': self.metadata[row]})
+        return matches
+
+    def describe(self) -> Dict[str, Any]:
+        """Estatísticas no formato de describe_index_stats"""
+        return {
+            'dimension': self.dim,
+            'totalVectorCount': self.count,
+            'backend': 'local',
+            'ivf': self._ivf is not None
+        }
+
+    # ------------------------------------------------------------------
+    # IVF
+    # ------------------------------------------------------------------
+
+    def _build_ivf(self, iterations: int = 10, chunk: int = 65536) -> None:
+        """Treina centróides (k-means esférico sobre amostra) e agrupa as linhas por lista"""
+        nlist = max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(self.matrix[np.sort(rng.choice(self.count, min(self.count, nlist * 40), replace=False))])
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assignments = np.concatenate([
+            np.argmax(self.matrix[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, self.count, chunk)
+        ])
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.searchsorted(assignments[order], np.arange(nlist + 1))
+        self._ivf = (centroids, order, offsets)
+
+    def _ivf_candidates(self, q: np.ndarray) -> np.ndarray:
+        centroids, order, offsets = self._ivf
+        nprobe = min(self.nprobe, centroids.shape[0])
+        probes = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe]
+        return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probes]))
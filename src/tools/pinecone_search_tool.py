@@ -6,17 +6,37 @@ Utiliza o host específico que está funcionando
 """
 
 import os
+import sys
 import time
+import asyncio
+import logging
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 import google.generativeai as genai
-import numpy as np
 from dotenv import load_dotenv
 
+# Adiciona o diretório src ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tools.embedding_cache import EmbeddingCache, diretorio_cache, gerar_chave
+from tools.local_vector_index import LocalVectorIndex
+from tools.lexical_index import BM25Index, reciprocal_rank_fusion
+from tools.stage_metrics import STAGE_METRICS
+from tools.search_events import SearchEvent, configurar_log_assincrono
+from tools.fixture_transport import (
+    modo_fixture, criar_embedder, envolver_adaptador_http, criar_transporte_async
+)
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 @dataclass
 class SearchResult:
     """Resultado de busca padronizado"""
@@ -32,19 +52,28 @@ class PineconeSearchTool:
 
     def __init__(self):
         # Configurar Google AI
+        # Modo de fixtures (live, record ou replay); no replay nenhuma API key é necessária
+        self.fixture_mode = modo_fixture()
+
         gemini_api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-        if not gemini_api_key:
+        if not gemini_api_key and self.fixture_mode != 'replay':
             raise Exception("GEMINI_API_KEY não encontrada no .env")
 
-        genai.configure(api_key=gemini_api_key)
+        if gemini_api_key:
+            genai.configure(api_key=gemini_api_key)
+        self.embedder = criar_embedder()
+
+        # Backend de busca: 'pinecone' (padrão, com fallback local se LOCAL_INDEX_PATH existir) ou 'local'
+        search_backend = os.getenv('SEARCH_BACKEND', 'pinecone').lower()
 
         # Configurar Pinecone com host personalizado
         pinecone_api_key = os.getenv('PINECONE_API_KEY')
-        if not pinecone_api_key:
+        if not pinecone_api_key and search_backend != 'local' and self.fixture_mode != 'replay':
             raise Exception("PINECONE_API_KEY não encontrada no .env")
 
         # Host personalizado que funciona
         self.custom_host = "agentes-juridicos-10b89ab.svc.aped-4627-b74a.pinecone.io"
+        self.base_url = os.getenv('PINECONE_BASE_URL', f"https://{self.custom_host}").rstrip('/')
         self.api_key = pinecone_api_key
 
         # Configurações otimizadas
@@ -53,138 +82,494 @@ class PineconeSearchTool:
             'top_k': 15,
             'similarity_threshold': 0.3,
             'final_result_count': 10,
-            'task_type': 'retrieval_query'
+            'task_type': 'retrieval_query',
+            'embedding_cache_dir': os.getenv('EMBEDDING_CACHE_DIR', diretorio_cache('embeddings')),
+            'embedding_cache_size': int(os.getenv('EMBEDDING_CACHE_SIZE', '1024')),
+            'embedding_cache_ttl': float(os.getenv('EMBEDDING_CACHE_TTL', str(7 * 24 * 3600))),
+            'connect_timeout': float(os.getenv('PINECONE_CONNECT_TIMEOUT', '3.05')),
+            'read_timeout': float(os.getenv('PINECONE_READ_TIMEOUT', '15')),
+            'pool_size': int(os.getenv('PINECONE_POOL_SIZE', '10')),
+            'max_retries': int(os.getenv('PINECONE_MAX_RETRIES', '3')),
+            'retry_backoff': float(os.getenv('PINECONE_RETRY_BACKOFF', '0.3')),
+            'http2': os.getenv('PINECONE_HTTP2', 'false').lower() == 'true',
+            'max_concurrent_queries': int(os.getenv('PINECONE_MAX_CONCURRENCY', '4')),
+            'search_backend': search_backend,
+            'local_index_path': os.getenv('LOCAL_INDEX_PATH', ''),
+            'hybrid_search': os.getenv('HYBRID_SEARCH', 'true').lower() == 'true',
+            'rrf_k': int(os.getenv('RRF_K', '60'))
         }
 
-        print(f"✅ PineconeSearchTool configurado com host personalizado: {self.custom_host}")
+        # Índice vetorial local (backend principal ou fallback do Pinecone)
+        self.local_index = self._load_local_index()
+
+        # Índice lexical BM25 do corpus: só existe com um snapshot local carregado. Sem ele,
+        # a busca híbrida apenas reordena os candidatos densos da própria consulta
+        self.lexical_index = BM25Index()
+        if self.local_index is not None and self.config['hybrid_search']:
+            for doc_id, metadata in zip(self.local_index.ids, self.local_index.metadata):
+                self.lexical_index.add_document(doc_id, metadata)
+
+        # Sessão HTTP persistente (pool keep-alive + retry com backoff)
+        self.session = self._create_http_session()
+
+        # Cliente assíncrono (criado sob demanda dentro do event loop)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+        # Cache de embeddings (LRU em memória + disco com TTL)
+        self.embedding_cache = EmbeddingCache(
+            cache_dir=self.config['embedding_cache_dir'],
+            max_memoria=self.config['embedding_cache_size'],
+            ttl=self.config['embedding_cache_ttl']
+        )
+
+        # Diagnóstico: um evento estruturado por busca, entregue por fila não bloqueante
+        self.last_search: Optional[SearchEvent] = None
+        if os.getenv('SEARCH_LOG_QUEUE', 'true').lower() == 'true':
+            configurar_log_assincrono(logger, os.getenv('SEARCH_LOG_LEVEL'))
+
+        logger.info("PineconeSearchTool configurado com host personalizado: %s", self.custom_host)
+
+    def _load_local_index(self) -> Optional[LocalVectorIndex]:
+        """Carrega o snapshot local configurado em LOCAL_INDEX_PATH, se houver"""
+        path = self.config['local_index_path']
+        if path:
+            try:
+                return LocalVectorIndex(path)
+            except Exception as e:
+                logger.warning("Erro ao carregar índice local '%s': %s", path, e)
+
+        if self.config['search_backend'] == 'local':
+            raise Exception("SEARCH_BACKEND=local requer LOCAL_INDEX_PATH com um snapshot válido")
+        return None
+
+    def _create_http_session(self) -> requests.Session:
+        """Cria sessão HTTP com pool de conexões keep-alive e retry em 429/5xx"""
+        retry = Retry(
+            total=self.config['max_retries'],
+            backoff_factor=self.config['retry_backoff'],
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config['pool_size'],
+            max_retries=retry
+        )
+
+        adapter = envolver_adaptador_http(adapter)
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Api-Key': self.api_key or '',
+            'Content-Type': 'application/json'
+        })
+        return session
+
+    @property
+    def _timeout(self):
+        """Timeout (connect, read) das requisições ao Pinecone"""
+        return (self.config['connect_timeout'], self.config['read_timeout'])
+
+    def close(self):
+        """Fecha o pool de conexões HTTP"""
+        self.session.close()
 
     def _generate_embedding(self, text: str) -> List[float]:
-        """Gera embedding usando text-embedding-004"""
+        """Gera embedding usando text-embedding-004 (com cache por texto normalizado)"""
+        cache_key = gerar_chave(text, self.config['embedding_model'], self.config['task_type'])
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            result = genai.embed_content(
+            result = self.embedder.embed_content(
                 model=self.config['embedding_model'],
                 content=text,
                 task_type=self.config['task_type']
             )
-            return result['embedding']
+            embedding = result['embedding']
+            self.embedding_cache.put(cache_key, embedding)
+            return embedding
         except Exception as e:
-            print(f"❌ Erro ao gerar embedding: {e}")
+            logger.error("Erro ao gerar embedding: %s", e)
             return []
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache de embeddings"""
+        return self.embedding_cache.get_stats()
+
+    def _query_payload(self, vector: List[float], top_k: int) -> Dict[str, Any]:
+        """Payload da query no formato da API do Pinecone"""
+        return {
+            'vector': vector,
+            'topK': top_k,
+            'includeMetadata': True
+        }
+
     def _query_pinecone_custom(self, vector: List[float], top_k: int = 5) -> List[Dict]:
         """Executa query no Pinecone usando host personalizado"""
         try:
             # URL para query no host personalizado
-            query_url = f"https://{self.custom_host}/query"
-
-            # Headers necessários
-            headers = {
-                'Api-Key': self.api_key,
-                'Content-Type': 'application/json'
-            }
+            query_url = f"{self.base_url}/query"
 
-            # Payload da query
-            payload = {
-                'vector': vector,
-                'topK': top_k,
-                'includeMetadata': True
-            }
-
-            # Executa query
-            response = requests.post(query_url, headers=headers, json=payload, timeout=30)
+            # Executa query (headers de autenticação já configurados na sessão)
+            response = self.session.post(query_url, json=self._query_payload(vector, top_k), timeout=self._timeout)
 
             if response.status_code == 200:
                 data = response.json()
                 return data.get('matches', [])
             else:
-                print(f"❌ Erro na query: {response.status_code} - {response.text}")
-                return []
+                logger.error("Erro na query: %s - %s", response.status_code, response.text)
+                return self._fallback_query(vector, top_k)
 
         except Exception as e:
-            print(f"❌ Erro na query personalizada: {e}")
+            logger.error("Erro na query personalizada: %s", e)
+            return self._fallback_query(vector, top_k)
+
+    def _fallback_query(self, vector: List[float], top_k: int) -> List[Dict]:
+        """Usa o índice local quando o Pinecone falha (se houver snapshot carregado)"""
+        if self.local_index is None:
             return []
+        logger.warning("Pinecone indisponível, usando índice local")
+        return self.local_index.query(vector, top_k)
+
+    def _query_index(self, vector: List[float], top_k: int) -> List[Dict]:
+        """Encaminha a query para o backend configurado"""
+        if self.config['search_backend'] == 'local':
+            return self.local_index.query(vector, top_k)
+        return self._query_pinecone_custom(vector, top_k)
+
+    async def _aquery_index(self, vector: List[float], top_k: int) -> List[Dict]:
+        """Versão assíncrona de _query_index (o índice local não faz I/O)"""
+        if self.config['search_backend'] == 'local':
+            return self.local_index.query(vector, top_k)
+        return await self._aquery_pinecone_custom(vector, top_k)
+
+    def _fuse_lexical(self, query: str, matches: List[Dict], top_k: int) -> List[Dict]:
+        """
+        Busca híbrida: funde o ranking denso e o BM25 com RRF (a ordem final segue o RRF).
+
+        Com snapshot local, o BM25 percorre o corpus inteiro e pode trazer documentos que
+        a busca densa não trouxe; eles entram marcados com `origem='lexical'`, score 0.0
+        (não há cosseno para eles) e o BM25 em `bm25`. Sem snapshot, o BM25 é montado só
+        com os candidatos densos desta consulta e apenas os reordena, de modo que o
+        resultado não depende de consultas anteriores.
+        """
+        if not self.config['hybrid_search']:
+            return matches
+
+        dense = [m for m in matches if m.get('score', 0) >= self.config['similarity_threshold']]
+        if len(self.lexical_index):
+            lexical = self.lexical_index.search(query, top_k)
+        else:
+            candidatos = BM25Index()
+            candidatos.add_matches(dense)
+            lexical = candidatos.search(query, top_k)
+        if not lexical:
+            return dense
+
+        by_id = {m.get('id', 'N/A'): m for m in dense}
+        fused = reciprocal_rank_fusion(
+            [[m.get('id', 'N/A') for m in dense], [doc_id for doc_id, _, _ in lexical]],
+            k=self.config['rrf_k']
+        )
+
+        for doc_id, bm25_score, metadata in lexical:
+            if doc_id not in by_id:
+                by_id[doc_id] = {'id': doc_id, 'score': 0.0, 'metadata': metadata,
+                                 'origem': 'lexical', 'bm25': bm25_score}
+
+        return sorted(by_id.values(), key=lambda m: fused.get(m.get('id', 'N/A'), 0.0), reverse=True)[:top_k]
+
+    def _build_results(self, matches: List[Dict], limit: Optional[int] = None,
+                       event: Optional[SearchEvent] = None) -> List[SearchResult]:
+        """Filtra os matches por similaridade e converte para SearchResult"""
+        # Filtrar por threshold de similaridade (matches só lexicais não têm cosseno e passam direto)
+        filtered_matches = [
+            match for match in matches
+            if match.get('score', 0) >= self.config['similarity_threshold'] or match.get('origem') == 'lexical'
+        ]
+
+        # Converter para SearchResult
+        search_results = []
+        for match in filtered_matches[:limit or self.config['final_result_count']]:
+            metadata = match.get('metadata', {})
+
+            search_result = SearchResult(
+                documento_id=match.get('id', 'N/A'),
+                titulo=metadata.get('numero_nota_tecnica', 'N/A'),
+                conteudo=metadata.get('texto_original', '')[:2000] + '...' if len(metadata.get('texto_original', '')) > 2000 else metadata.get('texto_original', ''),
+                score=match.get('score', 0),
+                fonte='bm25' if match.get('origem') == 'lexical' else 'pinecone_custom',
+                metadata={
+                    'numero_processo': metadata.get('numero_processo'),
+                    'objeto': metadata.get('objeto'),
+                    'fonte_sei': metadata.get('fonte_sei'),
+                    'referencia_cabecalho': metadata.get('referencia_cabecalho')
+                }
+            )
+            search_results.append(search_result)
+
+        # Estatísticas finais (calculadas sob demanda a partir do evento)
+        if event is not None:
+            event.apos_filtro = len(filtered_matches)
+            event.threshold = self.config['similarity_threshold']
+            event.scores = [r.score for r in search_results]
+            self._emit_search_event(event)
+
+        return search_results
+
+    def _emit_search_event(self, event: SearchEvent) -> None:
+        """Publica o evento da busca; nenhuma string é montada se o nível INFO estiver desabilitado"""
+        self.last_search = event
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s", event, extra={'search_event': event})
+
+    def get_last_search_stats(self) -> Dict[str, Any]:
+        """Tempos, contagens e estatísticas de score da última busca"""
+        return self.last_search.to_dict() if self.last_search else {}
 
     def search(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> List[SearchResult]:
         """Executa busca no Pinecone usando host personalizado"""
-        print(f"🔍 Buscando: '{query}'")
+        event = SearchEvent(query=query, modo='sync', top_k=top_k)
 
         # Gerar embedding da query
-        start_time = time.time()
+        start_time = time.perf_counter()
         query_embedding = self._generate_embedding(query)
-        embedding_time = time.time() - start_time
+        embedding_time = time.perf_counter() - start_time
+        STAGE_METRICS.observe('embed', embedding_time)
 
         if not query_embedding:
-            print("❌ Falha ao gerar embedding da query")
+            logger.error("Falha ao gerar embedding da query")
             return []
 
-        print(f"  • Embedding gerado em {embedding_time:.3f}s")
-        print(f"  • Dimensões: {len(query_embedding)}")
+        event.embedding_time = embedding_time
+        event.dimensoes = len(query_embedding)
 
         # Executar busca no Pinecone usando host personalizado
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             # Executa query
-            matches = self._query_pinecone_custom(query_embedding, top_k)
-            search_time = time.time() - start_time
-
-            print(f"  • Busca executada em {search_time:.3f}s")
-            print(f"  • Resultados brutos: {len(matches)}")
-
-            # Filtrar por threshold de similaridade
-            filtered_matches = [
-                match for match in matches
-                if match.get('score', 0) >= self.config['similarity_threshold']
-            ]
-
-            print(f"  • Após filtro (>={self.config['similarity_threshold']}): {len(filtered_matches)}")
-
-            # Converter para SearchResult
-            search_results = []
-            for match in filtered_matches[:self.config['final_result_count']]:
-                metadata = match.get('metadata', {})
-
-                search_result = SearchResult(
-                    documento_id=match.get('id', 'N/A'),
-                    titulo=metadata.get('numero_nota_tecnica', 'N/A'),
-                    conteudo=metadata.get('texto_original', '')[:2000] + '...' if len(metadata.get('texto_original', '')) > 2000 else metadata.get('texto_original', ''),
-                    score=match.get('score', 0),
-                    fonte='pinecone_custom',
-                    metadata={
-                        'numero_processo': metadata.get('numero_processo'),
-                        'objeto': metadata.get('objeto'),
-                        'fonte_sei': metadata.get('fonte_sei'),
-                        'referencia_cabecalho': metadata.get('referencia_cabecalho')
-                    }
+            matches = self._query_index(query_embedding, top_k)
+            search_time = time.perf_counter() - start_time
+            STAGE_METRICS.observe('pinecone_query', search_time)
+
+            event.search_time = search_time
+            event.resultados_brutos = len(matches)
+
+            return self._build_results(self._fuse_lexical(query, matches, top_k), event=event)
+
+        except Exception as e:
+            logger.error("Erro na busca: %s", e)
+            return []
+
+    # ------------------------------------------------------------------
+    # Caminho assíncrono (não bloqueia o event loop do uvicorn)
+    # ------------------------------------------------------------------
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Cria (lazy) o cliente HTTP assíncrono com pool keep-alive"""
+        if self._async_client is None or self._async_client.is_closed:
+            http2 = self.config['http2']
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("Pacote 'h2' não instalado, usando HTTP/1.1")
+                    http2 = False
+
+            limits = httpx.Limits(
+                max_connections=self.config['pool_size'],
+                max_keepalive_connections=self.config['pool_size']
+            )
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    'Api-Key': self.api_key or '',
+                    'Content-Type': 'application/json'
+                },
+                timeout=httpx.Timeout(self.config['read_timeout'], connect=self.config['connect_timeout']),
+                limits=limits,
+                http2=http2,
+                transport=criar_transporte_async(http2, limits)
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Fecha o cliente HTTP assíncrono"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    async def _agenerate_embedding(self, text: str) -> List[float]:
+        """Versão assíncrona de _generate_embedding"""
+        cache_key = gerar_chave(text, self.config['embedding_model'], self.config['task_type'])
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            result = await self.embedder.embed_content_async(
+                model=self.config['embedding_model'],
+                content=text,
+                task_type=self.config['task_type']
+            )
+            embedding = result['embedding']
+            self.embedding_cache.put(cache_key, embedding)
+            return embedding
+        except Exception as e:
+            logger.error("Erro ao gerar embedding: %s", e)
+            return []
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        """Embedding da query (reaproveita o cache quando a busca já o calculou)"""
+        return await self._agenerate_embedding(text)
+
+    async def _agenerate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings de vários textos em uma única chamada (apenas os ausentes do cache)"""
+        cache_keys = [gerar_chave(text, self.config['embedding_model'], self.config['task_type']) for text in texts]
+        embeddings = [self.embedding_cache.get(key) for key in cache_keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            try:
+                result = await self.embedder.embed_content_async(
+                    model=self.config['embedding_model'],
+                    content=[texts[i] for i in missing],
+                    task_type=self.config['task_type']
                 )
-                search_results.append(search_result)
-
-            # Estatísticas finais
-            if search_results:
-                scores = [r.score for r in search_results]
-                print(f"  • Resultados finais: {len(search_results)}")
-                print(f"  • Score médio: {np.mean(scores):.4f}")
-                print(f"  • Score range: {np.min(scores):.4f} - {np.max(scores):.4f}")
-            else:
-                print("  ⚠️ Nenhum resultado atende aos critérios de qualidade")
+                for i, embedding in zip(missing, result['embedding']):
+                    embeddings[i] = embedding
+                    self.embedding_cache.put(cache_keys[i], embedding)
+            except Exception as e:
+                logger.error("Erro ao gerar embeddings em lote: %s", e)
+
+        return [embedding or [] for embedding in embeddings]
+
+    async def _aquery_pinecone_custom(self, vector: List[float], top_k: int = 5) -> List[Dict]:
+        """Versão assíncrona de _query_pinecone_custom, com retry/backoff em 429/5xx"""
+        client = self._get_async_client()
+        payload = self._query_payload(vector, top_k)
+
+        for attempt in range(self.config['max_retries'] + 1):
+            try:
+                response = await client.post('/query', json=payload)
+
+                if response.status_code == 200:
+                    return response.json().get('matches', [])
+                if response.status_code not in (429, 500, 502, 503, 504) or attempt == self.config['max_retries']:
+                    logger.error("Erro na query: %s - %s", response.status_code, response.text)
+                    return self._fallback_query(vector, top_k)
+
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else \
+                    self.config['retry_backoff'] * (2 ** attempt)
+
+            except httpx.TransportError as e:
+                if attempt == self.config['max_retries']:
+                    logger.error("Erro na query personalizada: %s", e)
+                    return self._fallback_query(vector, top_k)
+                delay = self.config['retry_backoff'] * (2 ** attempt)
+
+            await asyncio.sleep(delay)
+
+        return []
+
+    async def asearch(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> List[SearchResult]:
+        """Versão assíncrona de search (embedding e query sem bloquear o event loop)"""
+        event = SearchEvent(query=query, modo='async', top_k=top_k)
+
+        start_time = time.perf_counter()
+        query_embedding = await self._agenerate_embedding(query)
+        embedding_time = time.perf_counter() - start_time
+        STAGE_METRICS.observe('embed', embedding_time)
+
+        if not query_embedding:
+            logger.error("Falha ao gerar embedding da query")
+            return []
+
+        event.embedding_time = embedding_time
+        event.dimensoes = len(query_embedding)
+
+        try:
+            start_time = time.perf_counter()
+            matches = await self._aquery_index(query_embedding, top_k)
+            search_time = time.perf_counter() - start_time
+            STAGE_METRICS.observe('pinecone_query', search_time)
 
-            return search_results
+            event.search_time = search_time
+            event.resultados_brutos = len(matches)
+
+            return self._build_results(self._fuse_lexical(query, matches, top_k), event=event)
+
+        except Exception as e:
+            logger.error("Erro na busca: %s", e)
+            return []
+
+    async def search_many(self, queries: List[str], top_k: int = 5,
+                          max_results: Optional[int] = None) -> List[SearchResult]:
+        """
+        Busca várias queries de uma vez: embeddings em um único lote e queries no
+        Pinecone em paralelo (limitadas por semáforo), com merge e deduplicação por
+        documento_id mantendo o maior score.
+        """
+        queries = list(dict.fromkeys(query for query in queries if query and query.strip()))
+        if not queries:
+            return []
+
+        event = SearchEvent(query=' | '.join(queries), modo=f'lote x{len(queries)}', top_k=top_k)
+
+        start_time = time.perf_counter()
+        embeddings = await self._agenerate_embeddings(queries)
+        embedding_time = time.perf_counter() - start_time
+        STAGE_METRICS.observe('embed', embedding_time)
+        event.embedding_time = embedding_time
+        event.dimensoes = next((len(vector) for vector in embeddings if vector), 0)
+
+        semaphore = asyncio.Semaphore(self.config['max_concurrent_queries'])
+
+        async def bounded_query(vector: List[float]) -> List[Dict]:
+            async with semaphore:
+                return await self._aquery_index(vector, top_k)
+
+        try:
+            start_time = time.perf_counter()
+            match_lists = await asyncio.gather(*(bounded_query(vector) for vector in embeddings if vector))
+            search_time = time.perf_counter() - start_time
+            STAGE_METRICS.observe('pinecone_query', search_time)
+            event.search_time = search_time
+
+            # Merge com deduplicação por documento_id (mantém o maior score)
+            best_matches: Dict[str, Dict] = {}
+            for matches in match_lists:
+                for match in matches:
+                    doc_id = match.get('id', 'N/A')
+                    if doc_id not in best_matches or match.get('score', 0) > best_matches[doc_id].get('score', 0):
+                        best_matches[doc_id] = match
+
+            merged = sorted(best_matches.values(), key=lambda match: match.get('score', 0), reverse=True)
+            event.resultados_brutos = len(merged)
+
+            return self._build_results(merged, limit=max_results, event=event)
 
         except Exception as e:
-            print(f"❌ Erro na busca: {e}")
+            logger.error("Erro na busca em lote: %s", e)
             return []
 
     def get_index_stats(self) -> Dict[str, Any]:
         """Obtém estatísticas do índice usando host personalizado"""
-        try:
-            stats_url = f"https://{self.custom_host}/describe_index_stats"
+        if self.config['search_backend'] == 'local':
+            return self.local_index.describe()
 
-            headers = {
-                'Api-Key': self.api_key,
-                'Content-Type': 'application/json'
-            }
+        try:
+            stats_url = f"{self.base_url}/describe_index_stats"
 
-            response = requests.post(stats_url, headers=headers, timeout=30)
+            response = self.session.post(stats_url, timeout=self._timeout)
 
             if response.status_code == 200:
                 return response.json()
@@ -194,6 +579,40 @@ class PineconeSearchTool:
         except Exception as e:
             return {"error": str(e)}
 
+    def export_snapshot(self, snapshot_dir: str, namespace: str = '', batch_size: int = 100) -> int:
+        """
+        Exporta o namespace do Pinecone (vetores + metadata) para um snapshot do
+        LocalVectorIndex, usando os endpoints /vectors/list e /vectors/fetch.
+        """
+        def iter_records():
+            pagination_token = None
+            while True:
+                params = {'namespace': namespace, 'limit': batch_size}
+                if pagination_token:
+                    params['paginationToken'] = pagination_token
+                listing = self.session.get(f"{self.base_url}/vectors/list", params=params, timeout=self._timeout)
+                listing.raise_for_status()
+                data = listing.json()
+
+                ids = [vector['id'] for vector in data.get('vectors', [])]
+                if ids:
+                    fetched = self.session.get(f"{self.base_url}/vectors/fetch",
+                                               params={'ids': ids, 'namespace': namespace}, timeout=self._timeout)
+                    fetched.raise_for_status()
+                    fetched_vectors = fetched.json().get('vectors', {})
+                    for vector_id in ids:
+                        record = fetched_vectors.get(vector_id)
+                        if record:
+                            yield record
+
+                pagination_token = data.get('pagination', {}).get('next')
+                if not pagination_token:
+                    break
+
+        total = LocalVectorIndex.save_snapshot(snapshot_dir, iter_records())
+        logger.info("Snapshot exportado: %d vetores em %s", total, snapshot_dir)
+        return total
+
 def test_custom_search_tool():
     """Função de teste da ferramenta personalizada"""
     print("🧪 TESTANDO FERRAMENTA DE BUSCA PERSONALIZADA")
@@ -236,4 +655,5 @@ def test_custom_search_tool():
         print(f"❌ Erro no teste: {e}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_custom_search_tool()
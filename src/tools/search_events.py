@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📝 Eventos Estruturados da Busca
+Um registro por busca, formatado apenas se o nível estiver habilitado e entregue
+por uma fila não bloqueante (QueueHandler + QueueListener)
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field, asdict
+from functools import cached_property
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Any, Optional
+
+
+@dataclass
+class SearchEvent:
+    """
+    Resumo de uma busca (tempos, contagens e scores).
+
+    As estatísticas dos scores (média, mínimo, máximo) só são calculadas quando
+    `score_stats` é acessado — ao formatar o registro de log ou ao consultar
+    `PineconeSearchTool.get_last_search_stats()`.
+    """
+
+    query: str
+    modo: str = 'sync'
+    top_k: int = 0
+    dimensoes: int = 0
+    embedding_time: float = 0.0
+    search_time: float = 0.0
+    resultados_brutos: int = 0
+    apos_filtro: int = 0
+    threshold: float = 0.0
+    scores: List[float] = field(default_factory=list)
+
+    @cached_property
+    def score_stats(self) -> Dict[str, float]:
+        if not self.scores:
+            return {}
+        return {
+            'medio': sum(self.scores) / len(self.scores),
+            'min': min(self.scores),
+            'max': max(self.scores)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'resultados_finais': len(self.scores), 'score_stats': self.score_stats}
+
+    def __str__(self) -> str:
+        texto = (
+            f"🔍 Busca ({self.modo}) '{self.query}': embedding {self.embedding_time:.3f}s "
+            f"({self.dimensoes} dims), busca {self.search_time:.3f}s, "
+            f"{self.resultados_brutos} brutos, {self.apos_filtro} após filtro (>={self.threshold}), "
+            f"{len(self.scores)} finais"
+        )
+        stats = self.score_stats
+        if stats:
+            texto += f", score médio {stats['medio']:.4f} ({stats['min']:.4f} - {stats['max']:.4f})"
+        return texto
+
+
+class _NonFormattingQueueHandler(QueueHandler):
+    """
+    QueueHandler que enfileira o registro sem formatá-lo.
+
+    O `prepare` padrão formata a mensagem na thread que emitiu o log; aqui a
+    formatação (incluindo `SearchEvent.__str__`) fica para a thread do listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _RootForwarder(logging.Handler):
+    """Entrega o registro aos handlers do logger raiz (configurados pela aplicação)"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def configurar_log_assincrono(logger: logging.Logger, level: Optional[str] = None) -> None:
+    """
+    Faz o `logger` publicar em uma fila atendida por uma thread de fundo.
+
+    A chamada de log só enfileira o registro; formatação e escrita (stdout,
+    arquivo) acontecem no listener, que repassa os registros aos handlers do
+    logger raiz. Idempotente.
+    """
+    global _listener
+
+    with _listener_lock:
+        if level:
+            logger.setLevel(level.upper())
+        if _listener is not None:
+            return
+
+        fila: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(_NonFormattingQueueHandler(fila))
+        logger.propagate = False
+
+        _listener = QueueListener(fila, _RootForwarder())
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Métricas por Etapa do Pipeline
+Histogramas de buckets fixos (p50/p95/p99) por etapa, exportados em JSON e no formato Prometheus
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Any, Optional, Tuple
+
+# Limites superiores dos buckets em segundos (o último bucket, +Inf, é implícito)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0
+)
+
+# Etapas instrumentadas, na ordem do pipeline
+STAGES: Tuple[str, ...] = (
+    'embed', 'pinecone_query', 'context_build', 'llm_call',
+    'json_parse', 'memory_save', 'chat_history_write', 'request'
+)
+
+
+class StageHistogram:
+    """Histograma de buckets fixos; `observe` é um bisect + três somas"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Quantil estimado por interpolação linear dentro do bucket (como histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        alvo = q * self.count
+        acumulado = 0
+        for i, n in enumerate(self.counts):
+            if acumulado + n >= alvo and n:
+                inferior = self.buckets[i - 1] if i > 0 else 0.0
+                superior = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(inferior + (superior - inferior) * (alvo - acumulado) / n, self.max)
+            acumulado += n
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.50), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'max': round(self.max, 6)
+        }
+
+
+class _Span:
+    """Context manager que mede a duração de uma etapa com `perf_counter`"""
+
+    __slots__ = ('_metrics', '_stage', '_start')
+
+    def __init__(self, metrics: "StageMetrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._metrics.observe(self._stage, time.perf_counter() - self._start)
+
+
+class StageMetrics:
+    """
+    Registro de histogramas por etapa.
+
+    Uso:
+        with STAGE_METRICS.span('llm_call'):
+            ...
+        STAGE_METRICS.observe('embed', segundos)
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, StageHistogram] = {stage: StageHistogram(buckets) for stage in STAGES}
+
+    def span(self, stage: str) -> _Span:
+        return _Span(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = StageHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {stage: StageHistogram(self.buckets) for stage in STAGES}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Resumo por etapa: count, sum, mean, p50, p95, p99 e max (segundos)"""
+        with self._lock:
+            return {stage: histogram.to_dict() for stage, histogram in self._histograms.items()}
+
+    def to_prometheus(self, metric: str = 'iajur_stage_duration_seconds') -> str:
+        """Exposição no formato texto do Prometheus (histograma com buckets cumulativos)"""
+        with self._lock:
+            histograms = [(stage, list(h.counts), h.count, h.total) for stage, h in self._histograms.items()]
+
+        linhas: List[str] = [
+            f"# HELP {metric} Duração das etapas do pipeline de consulta",
+            f"# TYPE {metric} histogram"
+        ]
+        for stage, counts, count, total in histograms:
+            acumulado = 0
+            for limite, n in zip(self.buckets, counts):
+                acumulado += n
+                linhas.append(f'{metric}_bucket{{stage="{stage}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            linhas.append(f'{metric}_sum{{stage="{stage}"}} {total}')
+            linhas.append(f'{metric}_count{{stage="{stage}"}} {count}')
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro global compartilhado por busca, agente e backend web
+STAGE_METRICS = StageMetrics()
+
+
+# ==========================================
+# TESTES DO MÓDULO
+# ==========================================
+
+if __name__ == "__main__":
+    import random
+
+    print("🧪 TESTANDO MÉTRICAS POR ETAPA")
+    print("=" * 50)
+
+    metricas = StageMetrics()
+    random.seed(0)
+    for _ in range(1000):
+        metricas.observe('pinecone_query', random.lognormvariate(-3, 0.5))
+        metricas.observe('llm_call', random.lognormvariate(1, 0.3))
+
+    for stage in ('pinecone_query', 'llm_call'):
+        print(f"📊 {stage}: {metricas.snapshot()[stage]}")
+
+    # Overhead por requisição: uma requisição instrumentada abre ~8 spans
+    n = 100000
+    inicio = time.perf_counter()
+    for _ in range(n):
+        with metricas.span('embed'):
+            pass
+    por_span = (time.perf_counter() - inicio) / n
+    print(f"⏱️ Overhead: {por_span * 1e6:.2f}µs por span, ~{por_span * len(STAGES) * 1e6:.2f}µs por requisição")
+
+    print("\n" + "\n".join(metricas.to_prometheus().splitlines()[:5]))
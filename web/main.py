@@ -7,19 +7,19 @@ Backend FastAPI integrado com o agente de pesquisa existente
 import os
 import sys
 import time
+import asyncio
 import json
 import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Union
 from pathlib import Path
-from collections import deque, defaultdict
 
 # Adiciona o diretório raiz ao path para importar os módulos do agente
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -29,163 +29,142 @@ import logging
 
 # Importa o agente de pesquisa jurídica
 from src.agents.research_agent import ResearchAgent
+# Mesmo módulo usado pelo agente (src/ já está no path após o import acima)
+from tools.stage_metrics import STAGE_METRICS
+from memory.chat_journal import ChatJournal
+from memory.session_store import criar_session_store
+from memory.context_relevance import ConversationContextFilter, codificar_embedding
 
 # Configuração do logger
 logger = logging.getLogger(__name__)
 
-# Configuração do chat memory
-CHAT_HISTORY_PATH = Path(__file__).parent.parent / ".cursor" / "memory" / "chat_history.json"
+# Configuração do chat memory: diário append-only (JSONL) com retenção e compactação em segundo plano
+CHAT_HISTORY_PATH = Path(__file__).parent.parent / ".cursor" / "memory" / "chat_history.jsonl"
+CHAT_HISTORY_LEGACY_PATH = CHAT_HISTORY_PATH.with_suffix(".json")
+chat_journal = ChatJournal(
+    str(CHAT_HISTORY_PATH),
+    max_entradas=int(os.getenv('CHAT_HISTORY_MAX_ENTRIES', '1000')),
+    max_dias=float(os.getenv('CHAT_HISTORY_MAX_DAYS', '30')) or None,
+    caminho_legado=str(CHAT_HISTORY_LEGACY_PATH)
+)
 
-# Módulo de memória por sessão - 10 iterações por sessão
-session_memories = defaultdict(lambda: deque(maxlen=10))
+# Módulo de memória por sessão - 10 iterações por sessão, com limite de sessões (LRU),
+# expiração por inatividade e orçamento de memória. SESSION_BACKEND=sqlite compartilha
+# a memória entre os workers do uvicorn (--workers N) por um arquivo SQLite em modo WAL
+session_store = criar_session_store(
+    caminho=os.getenv('SESSION_DB_PATH', str(CHAT_HISTORY_PATH.parent / "sessions.db")),
+    max_sessoes=int(os.getenv('SESSION_MAX_SESSIONS', '10000')),
+    max_interacoes=int(os.getenv('SESSION_MAX_INTERACTIONS', '10')),
+    ttl=float(os.getenv('SESSION_TTL', str(2 * 3600))),
+    max_bytes=int(os.getenv('SESSION_MAX_BYTES', str(64 * 1024 * 1024))) or None
+)
 
 # Rate limiting para evitar sobrecarga (baseado no MCP Memory Service)
-last_context_update = defaultdict(float)
 CONTEXT_UPDATE_COOLDOWN = 2.0  # 2 segundos entre atualizações de contexto
 
-def load_chat_history() -> list:
-    """Carrega o histórico de chat do arquivo JSON"""
+# Seleção das interações anteriores por similaridade de embedding, com limiar e orçamento de tokens
+context_filter = ConversationContextFilter(
+    threshold=float(os.getenv('CONTEXT_RELEVANCE_THRESHOLD', '0.8')),
+    token_budget=int(os.getenv('CONVERSATION_CONTEXT_TOKEN_BUDGET', '300'))
+)
+
+def load_chat_history(offset: int = 0, limit: Optional[int] = None) -> list:
+    """Carrega uma página do histórico de chat (ordem cronológica; offset conta a partir da mais recente)"""
     try:
-        if CHAT_HISTORY_PATH.exists():
-            with open(CHAT_HISTORY_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        return chat_journal.ler(offset=offset, limite=chat_journal.max_entradas if limit is None else limit)
     except Exception as e:
         logger.error(f"Erro ao carregar chat history: {e}")
         return []
 
 def save_chat_entry(user_message: str, assistant_response: str) -> None:
-    """Salva uma nova entrada no chat history"""
+    """Salva uma nova entrada no chat history (enfileirada; gravada em segundo plano)"""
     try:
-        history = load_chat_history()
-
-        # Adiciona nova entrada
-        new_entry = {
+        chat_journal.append({
             "user": user_message,
             "assistant": assistant_response,
             "timestamp": datetime.now().isoformat()
-        }
-        history.append(new_entry)
-
-        # Mantém apenas as últimas 100 entradas
-        if len(history) > 100:
-            history = history[-100:]
-
-        # Salva no arquivo
-        CHAT_HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(CHAT_HISTORY_PATH, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"Chat entry salva: {len(history)} entradas no histórico")
+        })
     except Exception as e:
         logger.error(f"Erro ao salvar chat entry: {e}")
 
 # Funções do módulo de memória por sessão
-def add_to_memory(session_id: str, pergunta: str, resposta: Union[str, Dict[str, Any]]):
-    """Adiciona uma interação à memória da conversa da sessão"""
+# (chamadas ao backend via session_store.executar: o SQLite roda fora do event loop)
+async def add_to_memory(session_id: str, pergunta: str, resposta: Union[str, Dict[str, Any]],
+                        query_embedding: Optional[List[float]] = None) -> Optional[int]:
+    """Adiciona uma interação à memória da conversa da sessão; retorna o total de interações"""
     try:
-        session_memories[session_id].append({
+        total = await session_store.executar('adicionar', session_id, {
             'pergunta': pergunta,
             'resposta': resposta,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'embedding': codificar_embedding(query_embedding),
+            'tokens': context_filter.tokens_interacao(pergunta, resumir_resposta(resposta))
         })
-        logger.info(f"Memória da sessão {session_id[:8]} atualizada: {len(session_memories[session_id])}/10 interações")
+        logger.info(f"Memória da sessão {session_id[:8]} atualizada: {total}/{session_store.max_interacoes} interações")
+        return total
     except Exception as e:
         logger.error(f"Erro ao adicionar à memória: {e}")
+        return None
 
-def get_context(session_id: str):
+async def get_context(session_id: str) -> List[Dict[str, Any]]:
     """Retorna o contexto atual da conversa da sessão"""
-    return list(session_memories[session_id])
+    return await session_store.executar('obter', session_id)
+
+def interacao_publica(interacao: Dict[str, Any]) -> Dict[str, Any]:
+    """Interação sem os campos internos da seleção de contexto (embedding, tokens)"""
+    return {chave: valor for chave, valor in interacao.items() if chave not in ('embedding', 'tokens')}
 
-def is_followup(session_id: str) -> bool:
+async def is_followup(session_id: str) -> bool:
     """Verifica se é uma pergunta de follow-up na sessão"""
-    return len(session_memories[session_id]) > 0
+    return await session_store.executar('tamanho', session_id) > 0
 
-def clear_memory(session_id: str = None):
+async def clear_memory(session_id: str = None):
     """Limpa a memória da conversa (sessão específica ou todas)"""
     if session_id:
-        session_memories[session_id].clear()
+        await session_store.executar('limpar', session_id)
         logger.info(f"Memória da sessão {session_id[:8]} limpa")
     else:
-        session_memories.clear()
-        logger.info("Todas as memórias de sessão limpas")
+        total = await session_store.executar('limpar')
+        logger.info(f"Todas as memórias de sessão limpas ({total} sessões)")
+
+def resumir_resposta(resposta: Union[str, Dict[str, Any]]) -> str:
+    """Trecho da resposta usado no contexto da conversa"""
+    if isinstance(resposta, dict) and 'resposta_imediata' in resposta:
+        return resposta.get('resposta_imediata', {}).get('conteudo', '')[:100]
+    return str(resposta)[:100]
 
-def format_context_for_agent(context: List[Dict], current_question: str) -> str:
-    """Formata o contexto de forma otimizada baseado no MCP Memory Service"""
+def format_context_for_agent(context: List[Dict], query_embedding: Optional[List[float]]) -> str:
+    """
+    Formata as interações anteriores relevantes para a pergunta atual (similaridade de embedding);
+    sem embedding ou sem nenhuma acima do limiar, usa a interação mais recente
+    """
     if not context:
         return ""
 
-    # Detecta tópicos da pergunta atual para filtrar contexto relevante
-    current_topics = extract_topics(current_question)
-
-    # Filtra apenas interações relevantes (últimas 3 + relevantes por tópico)
-    relevant_interactions = filter_relevant_context(context, current_topics)
+    with STAGE_METRICS.span('conversation_context'):
+        relevant_interactions, relatorio = context_filter.selecionar(query_embedding, context)
 
     if not relevant_interactions:
+        logger.info(f"📝 Nenhuma interação anterior relevante ({relatorio['interacoes']} avaliadas)")
         return ""
 
     # Formato compacto e eficiente
     context_text = "\n\n🧠 **Contexto da Conversa**\n"
 
-    for interaction in relevant_interactions[-3:]:  # Máximo 3 interações
-        pergunta = interaction.get('pergunta', '')
-        resposta = interaction.get('resposta', '')
-
-        # Extrai apenas o essencial da resposta
-        if isinstance(resposta, dict) and 'resposta_imediata' in resposta:
-            resposta_texto = resposta.get('resposta_imediata', {}).get('conteudo', '')[:100]
-        else:
-            resposta_texto = str(resposta)[:100]
-
-        context_text += f"• **P**: {pergunta}\n"
-        context_text += f"  **R**: {resposta_texto}...\n\n"
+    for interaction in relevant_interactions:
+        context_text += f"• **P**: {interaction.get('pergunta', '')}\n"
+        context_text += f"  **R**: {resumir_resposta(interaction.get('resposta', ''))}...\n\n"
 
     context_text += "Use este contexto para responder de forma consistente e contextualizada.\n"
 
+    if relatorio['fallback']:
+        logger.info(f"📝 Nenhuma interação acima do limiar: usando as {relatorio['selecionadas']} mais recentes "
+                    f"({relatorio['tokens']} tokens)")
+    else:
+        logger.info(f"📝 Contexto selecionado: {relatorio['selecionadas']}/{relatorio['interacoes']} interações, "
+                    f"{relatorio['tokens']} tokens, scores {relatorio['scores']}")
     return context_text
 
-def extract_topics(question: str) -> List[str]:
-    """Extrai tópicos principais da pergunta para filtragem de contexto"""
-    question_lower = question.lower()
-    topics = []
-
-    # Palavras-chave jurídicas comuns
-    legal_keywords = {
-        'art': ['art', 'anotação', 'responsabilidade', 'técnica'],
-        'rrt': ['rrt', 'registro', 'responsabilidade'],
-        'trt': ['trt', 'termo', 'responsabilidade'],
-        'servidor': ['servidor', 'público', 'federal', 'estadual'],
-        'dnit': ['dnit', 'departamento', 'infraestrutura'],
-        'crea': ['crea', 'conselho', 'engenharia', 'arquitetura'],
-        'pagamento': ['pagamento', 'custeio', 'taxa', 'valor'],
-        'cargo': ['cargo', 'função', 'atribuição', 'competência']
-    }
-
-    for topic, keywords in legal_keywords.items():
-        if any(keyword in question_lower for keyword in keywords):
-            topics.append(topic)
-
-    return topics
-
-def filter_relevant_context(context: List[Dict], current_topics: List[str]) -> List[Dict]:
-    """Filtra contexto relevante baseado nos tópicos atuais"""
-    if not current_topics:
-        return context[-2:]  # Retorna apenas as últimas 2 se não há tópicos específicos
-
-    relevant = []
-
-    # Prioriza interações com tópicos similares
-    for interaction in context:
-        pergunta = interaction.get('pergunta', '').lower()
-        if any(topic in pergunta for topic in current_topics):
-            relevant.append(interaction)
-
-    # Se não encontrou tópicos similares, pega as últimas 2
-    if not relevant:
-        relevant = context[-2:]
-
-    return relevant
-
 # Instância do orquestrador (inicializada lazy)
 orchestrator = None
 
@@ -215,6 +194,13 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("👋 Encerrando IA-JUR...")
+    if orchestrator is not None and getattr(orchestrator, 'search_tool', None):
+        await orchestrator.search_tool.aclose()
+        orchestrator.search_tool.close()
+    if orchestrator is not None and getattr(orchestrator, 'answer_cache', None):
+        await asyncio.to_thread(orchestrator.answer_cache.close)
+    chat_journal.close()
+    session_store.close()
 
 # Configuração do FastAPI
 app = FastAPI(
@@ -246,6 +232,7 @@ class ConsultaRequest(BaseModel):
     """Modelo para requisição de consulta jurídica"""
     pergunta: str = Field(..., min_length=10, max_length=2000, description="Pergunta jurídica a ser processada")
     session_id: Optional[str] = Field(None, description="ID da sessão para memória contextual")
+    bypass_cache: bool = Field(False, description="Ignora o cache semântico de respostas")
 
     @field_validator('pergunta')
     @classmethod
@@ -272,6 +259,9 @@ class MetricasResponse(BaseModel):
     tempo_medio: float
     fontes_totais: int
     uptime: str
+    cache_embeddings: Optional[Dict[str, Any]] = None  # Acertos/erros do cache de embeddings
+    cache_respostas: Optional[Dict[str, Any]] = None  # Taxa de acerto e latência economizada do cache semântico
+    sessoes: Optional[Dict[str, Any]] = None  # Tamanho do armazenamento de sessões e contadores de remoção
 
 # Variáveis globais para métricas
 metrics = {
@@ -330,13 +320,130 @@ async def root(request: Request):
     """Página principal do IA-JUR"""
     return templates.TemplateResponse("index.html", {"request": request})
 
+async def obter_embedding_pergunta(pergunta: str) -> List[float]:
+    """Embedding da pergunta pelo cache da ferramenta de busca (o mesmo usado na busca)"""
+    try:
+        return await get_orchestrator().search_tool.aget_embedding(pergunta)
+    except Exception as e:
+        logger.warning(f"Erro ao obter embedding da pergunta: {e}")
+        return []
+
+async def preparar_pergunta_com_contexto(pergunta: str, session_id: str) -> tuple:
+    """
+    Formata a pergunta com o contexto da sessão (com rate limiting);
+    retorna (pergunta, is_followup, embedding da pergunta ou None)
+    """
+    # Obtém contexto da sessão
+    context = await get_context(session_id)
+    is_followup_question = await is_followup(session_id)
+
+    # Formata pergunta com contexto se houver (otimizado com rate limiting)
+    pergunta_com_contexto = pergunta
+    query_embedding = None
+    current_time = time.time()
+
+    if context and is_followup_question:
+        # Rate limiting para evitar sobrecarga
+        if current_time - await session_store.executar('ultimo_contexto', session_id) > CONTEXT_UPDATE_COOLDOWN:
+            query_embedding = await obter_embedding_pergunta(pergunta)
+            context_text = format_context_for_agent(context, query_embedding)
+            if context_text:  # Só adiciona se há contexto relevante
+                pergunta_com_contexto = pergunta + context_text
+                await session_store.executar('marcar_contexto', session_id, current_time)
+                logger.info(f"📝 Consulta com contexto otimizado: {len(context)} interações, {len(context_text)} chars")
+        else:
+            logger.info(f"⏱️ Rate limiting ativo para sessão {session_id[:8]}")
+
+    return pergunta_com_contexto, is_followup_question, query_embedding
+
+async def finalizar_consulta(pergunta: str, session_id: str, is_followup_question: bool,
+                             resultado: Dict[str, Any], start_time: float,
+                             query_embedding: Optional[List[float]] = None) -> ConsultaResponse:
+    """Converte o resultado do agente em ConsultaResponse, atualizando métricas, memória e histórico"""
+    global metrics
+
+    end_time = time.time()
+    duracao = end_time - start_time
+
+    # Extrai informações do resultado (mapeia campos do agente de pesquisa jurídica)
+    synthesis = resultado.get('synthesis', 'Resposta não disponível')
+
+    # Verifica se a resposta é JSON estruturado
+    try:
+        json_response = json.loads(synthesis)
+
+        # Se for JSON válido, usa a estrutura estruturada
+        if 'resposta_imediata' in json_response:
+            resposta_completa = json_response
+            fontes = json_response.get('total_documents', resultado.get('total_documents', 0))
+        else:
+            # Fallback para formato antigo
+            resposta_completa = synthesis
+            fontes = resultado.get('total_documents', 0)
+
+    except (json.JSONDecodeError, TypeError):
+        # Se não for JSON válido, usa formato antigo
+        resposta_completa = synthesis
+        fontes = resultado.get('total_documents', 0)
+
+    workflow_id = f"wf_{int(time.time())}"
+
+    # Atualiza métricas
+    metrics["total_consultas"] += 1
+    metrics["consultas_pesquisa"] += 1
+    metrics["fontes_totais"] += fontes  # fontes é um número, não uma lista
+    metrics["consultas_tempo"].append(duracao)
+
+    # Calcula tempo médio (últimas 10 consultas)
+    if len(metrics["consultas_tempo"]) > 10:
+        metrics["consultas_tempo"] = metrics["consultas_tempo"][-10:]
+    metrics["tempo_medio"] = sum(metrics["consultas_tempo"]) / len(metrics["consultas_tempo"])
+
+    STAGE_METRICS.observe('request', duracao)
+
+    logger.info(f"✅ Consulta processada em {duracao:.2f}s")
+
+    # Adiciona à memória da conversa da sessão
+    with STAGE_METRICS.span('memory_save'):
+        interacoes_sessao = await add_to_memory(session_id, pergunta, resposta_completa, query_embedding)
+    if interacoes_sessao is None:
+        interacoes_sessao = await session_store.executar('tamanho', session_id)
+
+    # Salva no chat history (mantém compatibilidade)
+    # IMPORTANTE: Salva apenas a pergunta original e a resposta completa
+    try:
+        with STAGE_METRICS.span('chat_history_write'):
+            save_chat_entry(pergunta, resposta_completa)
+    except Exception as e:
+        logger.warning(f"Erro ao salvar chat history: {e}")
+
+    # Adiciona informações de contexto à resposta
+    response_data = {
+        'resposta_completa': resposta_completa,
+        'fontes': fontes,
+        'workflow_id': workflow_id,
+        'duracao': duracao,
+        'timestamp': datetime.now().isoformat(),
+        'is_followup': is_followup_question,
+        'session_id': session_id,
+        'contexto': {
+            'memoria_atual': interacoes_sessao,
+            'total_interacoes': interacoes_sessao,
+            'sessao': session_id[:8]
+        }
+    }
+
+    return ConsultaResponse(**response_data)
+
+def formatar_evento_sse(evento: str, dados: Any) -> str:
+    """Serializa um evento no formato Server-Sent Events"""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
 @app.post("/api/consulta", response_model=ConsultaResponse)
 async def processar_consulta(consulta: ConsultaRequest):
     """
     Processa uma consulta jurídica usando o agente existente
     """
-    global metrics
-
     if not consulta.pergunta.strip():
         raise HTTPException(status_code=400, detail="Pergunta não pode estar vazia")
 
@@ -349,113 +456,77 @@ async def processar_consulta(consulta: ConsultaRequest):
         # Obtém o orquestrador simplificado
         orch = get_orchestrator()
 
-        # Obtém contexto da sessão
-        context = get_context(session_id)
-        is_followup_question = is_followup(session_id)
-
-        # Formata pergunta com contexto se houver (otimizado com rate limiting)
-        pergunta_com_contexto = consulta.pergunta
-        current_time = time.time()
-
-        if context and is_followup_question:
-            # Rate limiting para evitar sobrecarga
-            if current_time - last_context_update[session_id] > CONTEXT_UPDATE_COOLDOWN:
-                context_text = format_context_for_agent(context, consulta.pergunta)
-                if context_text:  # Só adiciona se há contexto relevante
-                    pergunta_com_contexto = consulta.pergunta + context_text
-                    last_context_update[session_id] = current_time
-                    logger.info(f"📝 Consulta com contexto otimizado: {len(context)} interações, {len(context_text)} chars")
-            else:
-                logger.info(f"⏱️ Rate limiting ativo para sessão {session_id[:8]}")
+        pergunta_com_contexto, is_followup_question, query_embedding = await preparar_pergunta_com_contexto(
+            consulta.pergunta, session_id
+        )
 
         # Processa a consulta com agente de pesquisa jurídica
         logger.info(f"🔍 Processando consulta: {consulta.pergunta[:100]}...")
-        resultado = await orch.process(pergunta_com_contexto)
-
-        end_time = time.time()
-        duracao = end_time - start_time
+        # A busca usa a pergunta sem o contexto da conversa: reaproveita o embedding (em cache)
+        # calculado para selecionar o contexto, sem outra ida ao Gemini antes da busca
+        resultado = await orch.process(pergunta_com_contexto, bypass_cache=consulta.bypass_cache,
+                                       search_query=consulta.pergunta)
 
-        # Extrai informações do resultado (mapeia campos do agente de pesquisa jurídica)
-        synthesis = resultado.get('synthesis', 'Resposta não disponível')
-
-        # Verifica se a resposta é JSON estruturado
-        try:
-            import json
-            json_response = json.loads(synthesis)
-
-            # Se for JSON válido, usa a estrutura estruturada
-            if 'resposta_imediata' in json_response:
-                resposta_completa = json_response
-                fontes = json_response.get('total_documents', resultado.get('total_documents', 0))
-            else:
-                # Fallback para formato antigo
-                resposta_completa = synthesis
-                fontes = resultado.get('total_documents', 0)
-
-        except (json.JSONDecodeError, TypeError):
-            # Se não for JSON válido, usa formato antigo
-            resposta_completa = synthesis
-            fontes = resultado.get('total_documents', 0)
+        # A busca embedou a própria pergunta: o embedding sai do cache
+        query_embedding = query_embedding or await obter_embedding_pergunta(consulta.pergunta)
+        return await finalizar_consulta(consulta.pergunta, session_id, is_followup_question, resultado,
+                                        start_time, query_embedding)
 
-        workflow_id = f"wf_{int(time.time())}"
+    except Exception as e:
+        logger.error(f"❌ Erro ao processar consulta: {e}")
 
-        # Atualiza métricas
-        metrics["total_consultas"] += 1
-        metrics["consultas_pesquisa"] += 1
-        metrics["fontes_totais"] += fontes  # fontes é um número, não uma lista
-        metrics["consultas_tempo"].append(duracao)
+        # Retorna erro estruturado
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro interno ao processar consulta: {str(e)}"
+        )
 
-        # Calcula tempo médio (últimas 10 consultas)
-        if len(metrics["consultas_tempo"]) > 10:
-            metrics["consultas_tempo"] = metrics["consultas_tempo"][-10:]
-        metrics["tempo_medio"] = sum(metrics["consultas_tempo"]) / len(metrics["consultas_tempo"])
+@app.post("/api/consulta/stream")
+async def processar_consulta_stream(consulta: ConsultaRequest):
+    """
+    Processa uma consulta jurídica em streaming (Server-Sent Events).
 
-        logger.info(f"✅ Consulta processada em {duracao:.2f}s")
+    Eventos: `resultados` (logo após a busca), `token` (fragmentos do Gemini),
+    `final` (ConsultaResponse completo) ou `erro`.
+    """
+    if not consulta.pergunta.strip():
+        raise HTTPException(status_code=400, detail="Pergunta não pode estar vazia")
 
-        # Sistema simplificado gerencia contexto internamente
+    session_id = consulta.session_id or str(uuid.uuid4())
+    start_time = time.time()
 
-        # Adiciona à memória da conversa da sessão
-        add_to_memory(session_id, consulta.pergunta, resposta_completa)
+    try:
+        orch = get_orchestrator()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro interno ao processar consulta: {str(e)}")
 
-        # Obtém contexto atualizado
-        context_atualizado = get_context(session_id)
+    pergunta_com_contexto, is_followup_question, query_embedding = await preparar_pergunta_com_contexto(
+        consulta.pergunta, session_id
+    )
 
-        # Salva no chat history (mantém compatibilidade)
-        # IMPORTANTE: Salva apenas a pergunta original e a resposta completa
+    async def eventos():
         try:
-            save_chat_entry(consulta.pergunta, resposta_completa)
+            logger.info(f"🔍 Processando consulta (stream): {consulta.pergunta[:100]}...")
+            async for evento in orch.process_stream(pergunta_com_contexto, bypass_cache=consulta.bypass_cache,
+                                                    search_query=consulta.pergunta):
+                if evento['tipo'] == 'final':
+                    embedding = query_embedding or await obter_embedding_pergunta(consulta.pergunta)
+                    resposta = await finalizar_consulta(
+                        consulta.pergunta, session_id, is_followup_question, evento['dados'], start_time,
+                        embedding
+                    )
+                    yield formatar_evento_sse('final', resposta.model_dump())
+                else:
+                    yield formatar_evento_sse(evento['tipo'], evento['dados'])
         except Exception as e:
-            logger.warning(f"Erro ao salvar chat history: {e}")
-
-        # Adiciona informações de contexto à resposta
-        response_data = {
-            'resposta_completa': resposta_completa,
-            'fontes': fontes,
-            'workflow_id': workflow_id,
-            'duracao': duracao,
-            'timestamp': datetime.now().isoformat(),
-            'is_followup': is_followup_question,
-            'session_id': session_id,
-            'contexto': {
-                'memoria_atual': len(session_memories[session_id]),
-                'total_interacoes': len(session_memories[session_id]),
-                'sessao': session_id[:8]
-            }
-        }
+            logger.error(f"❌ Erro ao processar consulta (stream): {e}")
+            yield formatar_evento_sse('erro', {'detail': f"Erro interno ao processar consulta: {str(e)}"})
 
-        return ConsultaResponse(**response_data)
-
-    except Exception as e:
-        end_time = time.time()
-        duracao = end_time - start_time
-
-        logger.error(f"❌ Erro ao processar consulta: {e}")
-
-        # Retorna erro estruturado
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro interno ao processar consulta: {str(e)}"
-        )
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/metricas", response_model=MetricasResponse)
 async def obter_metricas():
@@ -469,14 +540,44 @@ async def obter_metricas():
     uptime_minutes = int((uptime % 3600) // 60)
     uptime_str = f"{uptime_hours}h {uptime_minutes}m"
 
+    # Estatísticas do cache de embeddings (apenas se o orquestrador já foi inicializado)
+    cache_embeddings = None
+    cache_respostas = None
+    if orchestrator is not None and getattr(orchestrator, 'search_tool', None):
+        cache_embeddings = orchestrator.search_tool.get_cache_stats()
+    if orchestrator is not None and getattr(orchestrator, 'answer_cache', None):
+        cache_respostas = orchestrator.answer_cache.get_stats()
+
     return MetricasResponse(
         total_consultas=metrics["total_consultas"],
         consultas_pesquisa=metrics["consultas_pesquisa"],
         tempo_medio=round(metrics["tempo_medio"], 2),
         fontes_totais=metrics["fontes_totais"],
-        uptime=uptime_str
+        uptime=uptime_str,
+        cache_embeddings=cache_embeddings,
+        cache_respostas=cache_respostas,
+        sessoes=await session_store.executar('get_stats')
     )
 
+@app.get("/api/metrics/stages")
+async def obter_metricas_etapas(format: str = "json"):
+    """
+    Histogramas de duração por etapa do pipeline (embed, pinecone_query, context_build,
+    llm_call, json_parse, conversation_context, memory_save, chat_history_write, request).
+
+    `format=json` (padrão): count, sum, mean, p50, p95, p99 e max em segundos.
+    `format=prometheus`: formato texto de exposição do Prometheus.
+    """
+    if format == "prometheus":
+        return PlainTextResponse(STAGE_METRICS.to_prometheus(), media_type="text/plain; version=0.0.4")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Formato deve ser 'json' ou 'prometheus'")
+
+    return {
+        "etapas": STAGE_METRICS.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/health")
 async def health_check():
     """
@@ -515,15 +616,22 @@ async def system_info():
     }
 
 @app.get("/api/chat-history")
-async def get_chat_history():
+async def get_chat_history(limit: int = 10, offset: int = 0):
     """
-    Retorna o histórico de chat
+    Retorna uma página do histórico de chat (por padrão, as 10 entradas mais recentes)
     """
+    if limit < 1 or limit > 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="Use 1 <= limit <= 100 e offset >= 0")
+
     try:
-        history = load_chat_history()
+        history = await asyncio.to_thread(load_chat_history, offset, limit)
+        total = chat_journal.total()
         return {
-            "total_entries": len(history),
-            "history": history[-10:],  # Últimas 10 entradas
+            "total_entries": total,
+            "history": history,
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + len(history) < total,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -539,17 +647,17 @@ async def get_context_info(session_id: Optional[str] = None):
         if not session_id:
             return {
                 "status": "Módulo de memória por sessão ativo",
-                "total_sessoes": len(session_memories),
-                "sessoes_ativas": list(session_memories.keys())[:5],  # Primeiras 5 sessões
+                "total_sessoes": await session_store.executar('__len__'),
+                "sessoes_ativas": [sessao['session_id'] for sessao in await session_store.executar('resumo', 5)],  # 5 mais recentes
                 "timestamp": datetime.now().isoformat()
             }
 
-        context = get_context(session_id)
+        context = [interacao_publica(interacao) for interacao in await get_context(session_id)]
         return {
             "status": "Módulo de memória ativo",
             "session_id": session_id,
-            "memoria_atual": len(session_memories[session_id]),
-            "max_interacoes": 10,
+            "memoria_atual": len(context),
+            "max_interacoes": session_store.max_interacoes,
             "contexto": context,
             "timestamp": datetime.now().isoformat()
         }
@@ -563,7 +671,8 @@ async def clear_context(session_id: Optional[str] = None):
     Limpa o contexto de conversação (sessão específica ou todas)
     """
     try:
-        clear_memory(session_id)
+        total_sessoes = await session_store.executar('__len__')
+        await clear_memory(session_id)
         if session_id:
             return {
                 "message": f"Memória da sessão {session_id[:8]} limpa com sucesso",
@@ -574,7 +683,7 @@ async def clear_context(session_id: Optional[str] = None):
         else:
             return {
                 "message": "Todas as memórias de sessão limpas com sucesso",
-                "total_sessoes_limpas": len(session_memories),
+                "total_sessoes_limpas": total_sessoes,
                 "timestamp": datetime.now().isoformat()
             }
     except Exception as e:
@@ -589,24 +698,21 @@ async def get_memory_info(session_id: Optional[str] = None):
     try:
         if not session_id:
             return {
-                "total_sessoes": len(session_memories),
+                "total_sessoes": await session_store.executar('__len__'),
                 "sessoes_ativas": [
-                    {
-                        "session_id": sid[:8],
-                        "interacoes": len(mem),
-                        "memoria_cheia": len(mem) >= 10
-                    }
-                    for sid, mem in list(session_memories.items())[:10]
+                    {**sessao, "session_id": sessao['session_id'][:8]}
+                    for sessao in await session_store.executar('resumo', 10)
                 ],
+                "armazenamento": await session_store.executar('get_stats'),
                 "timestamp": datetime.now().isoformat()
             }
 
-        context = get_context(session_id)
+        context = [interacao_publica(interacao) for interacao in await get_context(session_id)]
         return {
             "session_id": session_id,
-            "total_interacoes": len(session_memories[session_id]),
-            "max_interacoes": 10,
-            "memoria_cheia": len(session_memories[session_id]) >= 10,
+            "total_interacoes": len(context),
+            "max_interacoes": session_store.max_interacoes,
+            "memoria_cheia": len(context) >= session_store.max_interacoes,
             "interacoes": context,
             "timestamp": datetime.now().isoformat()
         }
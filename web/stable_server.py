@@ -47,7 +47,7 @@ async def lifespan(app: FastAPI):
         # Inicializa ContextManager primeiro (mais rápido)
         logger.info("📝 Inicializando ContextManager...")
         from src.memory.context_manager import ContextManager
-        context_manager = ContextManager(max_context_size=10)
+        context_manager = ContextManager(max_interactions=10)
         logger.info("✅ ContextManager inicializado")
 
         # Inicializa orquestrador
@@ -64,6 +64,9 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("🛑 Finalizando IA-JUR...")
+        if context_manager is not None:
+            # Grava o que estiver pendente no buffer write-behind da memória
+            await context_manager.aclose()
 
 # Cria a aplicação FastAPI
 app = FastAPI(
@@ -198,7 +201,7 @@ Por favor, responda à consulta atual considerando o contexto das conversas ante
         workflow_id = resultado.get('metadata', {}).get('workflow_id', f"wf_{int(time.time())}")
 
         # Adiciona interação ao contexto
-        context_manager.add_interaction(consulta.pergunta, resposta_completa)
+        await context_manager.add_interaction(consulta.pergunta, resposta_completa)
 
         logger.info(f"✅ Consulta processada em {duracao:.2f}s")
 
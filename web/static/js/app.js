@@ -91,19 +91,15 @@ class IAJURApp {
         const startTime = Date.now();
 
         try {
-            const response = await fetch('/api/consulta', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ pergunta: pergunta })
-            });
-
-            if (!response.ok) {
-                throw new Error(`Erro HTTP: ${response.status}`);
+            let data;
+            try {
+                data = await this.consultarStream(pergunta);
+            } catch (streamError) {
+                // Fallback para o endpoint sem streaming
+                console.warn('Streaming indisponível, usando /api/consulta:', streamError);
+                data = await this.consultarSemStream(pergunta);
             }
 
-            const data = await response.json();
             const endTime = Date.now();
             const duracao = ((endTime - startTime) / 1000).toFixed(2);
 
@@ -124,6 +120,113 @@ class IAJURApp {
         }
     }
 
+    async consultarSemStream(pergunta) {
+        const response = await fetch('/api/consulta', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ pergunta: pergunta })
+        });
+
+        if (!response.ok) {
+            throw new Error(`Erro HTTP: ${response.status}`);
+        }
+
+        return response.json();
+    }
+
+    async consultarStream(pergunta) {
+        // Consulta via Server-Sent Events: fontes chegam primeiro, depois o texto do Gemini
+        const response = await fetch('/api/consulta/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            body: JSON.stringify({ pergunta: pergunta })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`Erro HTTP: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder('utf-8');
+        let buffer = '';
+        let textoParcial = '';
+        let final = null;
+
+        while (final === null) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+
+            // Eventos SSE são separados por linha em branco
+            let separador;
+            while ((separador = buffer.indexOf('\n\n')) !== -1) {
+                const bloco = buffer.slice(0, separador);
+                buffer = buffer.slice(separador + 2);
+
+                let evento = 'message';
+                let dados = '';
+                bloco.split('\n').forEach(linha => {
+                    if (linha.startsWith('event:')) evento = linha.slice(6).trim();
+                    else if (linha.startsWith('data:')) dados += linha.slice(5).trim();
+                });
+                if (!dados) continue;
+
+                const payload = JSON.parse(dados);
+
+                if (evento === 'resultados') {
+                    this.ocultarLoading();
+                    this.mostrarStreamIniciado(payload);
+                } else if (evento === 'token') {
+                    textoParcial += payload;
+                    this.atualizarStream(textoParcial);
+                } else if (evento === 'final') {
+                    final = payload;
+                } else if (evento === 'erro') {
+                    throw new Error(payload.detail || 'Erro no streaming');
+                }
+            }
+        }
+
+        if (final === null) {
+            throw new Error('Stream encerrado sem resposta final');
+        }
+
+        return final;
+    }
+
+    mostrarStreamIniciado(dados) {
+        // Exibe as fontes recuperadas enquanto o Gemini ainda está gerando
+        document.getElementById('duracao').textContent = '...';
+        document.getElementById('fontes').textContent = `${dados.total_documents || 0} fontes`;
+        document.getElementById('workflow-id').textContent = 'gerando...';
+
+        const fontes = (dados.principais_fontes || []).map(fonte => `<li>${fonte}</li>`).join('');
+        document.getElementById('resposta-completa').innerHTML = `
+            <div class="secao-resposta">
+                <h3 class="titulo-secao">Principais Fontes</h3>
+                <div class="conteudo-secao"><ul class="lista-fontes">${fontes}</ul></div>
+            </div>
+            <div class="secao-resposta">
+                <div class="conteudo-secao resposta-streaming" id="resposta-streaming"></div>
+            </div>
+        `;
+        document.getElementById('resultados').classList.remove('hidden');
+    }
+
+    atualizarStream(texto) {
+        const destino = document.getElementById('resposta-streaming');
+        if (destino) {
+            // textContent evita interpretar o JSON parcial como HTML
+            destino.textContent = texto;
+        }
+    }
+
     mostrarLoading() {
         document.getElementById('loading').classList.remove('hidden');
     }